@@ -0,0 +1,259 @@
+"""Two-level response cache for the external phone specifications API.
+
+Lookups of brands, brand phone lists and phone details are cached in an
+in-memory LRU backed by a SQLite file, so repeat syncs and admin browsing
+are served locally and survive restarts. Each namespace has its own TTL.
+After the TTL an entry is still served for `stale_ttl` seconds while a
+single background fetch refreshes it (stale-while-revalidate); concurrent
+misses for the same key share one upstream call.
+"""
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteStore:
+    """Blocking key/value store; called from worker threads"""
+
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, stored_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        return (json.loads(row[0]), row[1]) if row else None
+
+    def set(self, key: str, value: Any, stored_at: float):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, stored_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), stored_at)
+            )
+            self._conn.commit()
+
+    def delete_prefix(self, prefix: str) -> int:
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM responses WHERE key LIKE ? ESCAPE '\\'",
+                                        (prefix.replace("%", "\\%").replace("_", "\\_") + "%",))
+            self._conn.commit()
+        return cursor.rowcount
+
+    def purge(self, older_than: float) -> int:
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM responses WHERE stored_at < ?", (older_than,))
+            self._conn.commit()
+        return cursor.rowcount
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class ResponseCache:
+    """Memory LRU + optional SQLite store with per-namespace TTLs and stale-while-revalidate"""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_entries: int = 5000,
+        ttl: float = 21600.0,
+        stale_ttl: float = 86400.0,
+        ttls: Optional[Dict[str, float]] = None
+    ):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.ttls = dict(ttls or {})
+        self.path = path
+        # Opened on first use so forked worker processes never share a connection
+        self._store: Optional[SQLiteStore] = None
+        # Entries keep their wall-clock store time so ages stay valid across restarts
+        self._memory: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._revalidating: Set[asyncio.Task] = set()
+        self.counters = {
+            "memory_hits": 0, "disk_hits": 0, "stale_hits": 0, "misses": 0,
+            "revalidations": 0, "fetch_errors": 0, "stale_on_error": 0
+        }
+
+    @property
+    def store(self) -> Optional[SQLiteStore]:
+        if self._store is None and self.path:
+            self._store = SQLiteStore(self.path)
+        return self._store
+
+    async def open(self):
+        """Open the SQLite store ahead of the first lookup"""
+        if self.path:
+            await asyncio.to_thread(lambda: self.store)
+
+    @staticmethod
+    def make_key(namespace: str, key: str) -> str:
+        return f"{namespace}:{key}"
+
+    def _ttl(self, namespace: str) -> float:
+        return self.ttls.get(namespace, self.ttl)
+
+    def _remember(self, cache_key: str, value: Any, stored_at: float):
+        self._memory[cache_key] = (value, stored_at)
+        self._memory.move_to_end(cache_key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    async def _lookup(self, cache_key: str) -> Optional[Tuple[Any, float, str]]:
+        """(value, stored_at, level) from memory, then from disk"""
+        entry = self._memory.get(cache_key)
+        if entry is not None:
+            self._memory.move_to_end(cache_key)
+            return entry[0], entry[1], "memory"
+        if self.store is None:
+            return None
+        try:
+            entry = await asyncio.to_thread(self.store.get, cache_key)
+        except Exception as e:
+            logger.error(f"Error reading API cache: {str(e)}")
+            return None
+        if entry is None:
+            return None
+        self._remember(cache_key, *entry)
+        return entry[0], entry[1], "disk"
+
+    async def _store(self, cache_key: str, value: Any):
+        stored_at = time.time()
+        self._remember(cache_key, value, stored_at)
+        if self.store is not None:
+            try:
+                await asyncio.to_thread(self.store.set, cache_key, value, stored_at)
+            except Exception as e:
+                logger.error(f"Error writing API cache: {str(e)}")
+
+    async def _fetch(self, cache_key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Call the upstream once per key, however many callers are waiting"""
+        future = self._inflight.get(cache_key)
+        if future is not None:
+            return await asyncio.shield(future)
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[cache_key] = future
+        try:
+            value = await fetch()
+            # Empty answers are how the API client reports failures; never cache them
+            if value:
+                await self._store(cache_key, value)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception retrieved when nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            del self._inflight[cache_key]
+
+    async def _revalidate(self, cache_key: str, fetch: Callable[[], Awaitable[Any]]):
+        self.counters["revalidations"] += 1
+        try:
+            await self._fetch(cache_key, fetch)
+        except Exception as e:
+            self.counters["fetch_errors"] += 1
+            logger.error(f"Error revalidating {cache_key}: {str(e)}")
+
+    async def get_or_fetch(self, namespace: str, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Cached value for (namespace, key), calling `fetch` on a miss or in the background when stale"""
+        cache_key = self.make_key(namespace, key)
+        entry = await self._lookup(cache_key)
+        if entry is not None:
+            value, stored_at, level = entry
+            age = time.time() - stored_at
+            ttl = self._ttl(namespace)
+            if age < ttl:
+                self.counters[f"{level}_hits"] += 1
+                return value
+            if age < ttl + self.stale_ttl:
+                self.counters["stale_hits"] += 1
+                if cache_key not in self._inflight:
+                    task = asyncio.create_task(self._revalidate(cache_key, fetch))
+                    self._revalidating.add(task)
+                    task.add_done_callback(self._revalidating.discard)
+                return value
+
+        self.counters["misses"] += 1
+        try:
+            return await self._fetch(cache_key, fetch)
+        except Exception:
+            self.counters["fetch_errors"] += 1
+            if entry is None:
+                raise
+            # An expired answer beats no answer while the upstream is failing
+            self.counters["stale_on_error"] += 1
+            return entry[0]
+
+    async def invalidate(self, namespace: Optional[str] = None) -> int:
+        """Drop every entry (or every entry of one namespace) from both levels"""
+        prefix = self.make_key(namespace, "") if namespace else ""
+        dropped = [key for key in self._memory if key.startswith(prefix)]
+        for key in dropped:
+            del self._memory[key]
+        if self.store is None:
+            return len(dropped)
+        return await asyncio.to_thread(self.store.delete_prefix, prefix)
+
+    async def purge_expired(self) -> int:
+        """Remove on-disk entries past the longest TTL plus the stale window"""
+        if self.store is None:
+            return 0
+        longest = max([self.ttl, *self.ttls.values()]) + self.stale_ttl
+        return await asyncio.to_thread(self.store.purge, time.time() - longest)
+
+    async def close(self):
+        for task in list(self._revalidating):
+            task.cancel()
+        await asyncio.gather(*self._revalidating, return_exceptions=True)
+        if self._store is not None:
+            self._store.close()
+            self._store = None
+        self.path = None
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+    async def stats(self) -> Dict[str, Any]:
+        hits = self.counters["memory_hits"] + self.counters["disk_hits"] + self.counters["stale_hits"]
+        lookups = hits + self.counters["misses"]
+        disk_entries = None
+        if self.store is not None:
+            disk_entries = await asyncio.to_thread(self.store.count)
+        return {
+            **self.counters,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "max_memory_entries": self.max_entries,
+            "disk_entries": disk_entries,
+            "ttl_seconds": {"default": self.ttl, **self.ttls},
+            "stale_ttl_seconds": self.stale_ttl
+        }
@@ -0,0 +1,199 @@
+"""Content-addressed blob storage for listing photos and KYC documents.
+
+Blobs are keyed by the SHA-256 of their content, so identical uploads are
+stored once and a blob's address doubles as its ETag. Documents in MongoDB
+keep only the blob URL; the bytes live in the storage backend. Private
+blobs (KYC documents, import files) live in their own namespace and are
+only served to admins, so the same bytes uploaded as a public listing photo
+stay public under their own URL.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import shutil
+import uuid
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+from pydantic import BaseModel
+
+# Read/write granularity for streaming uploads and downloads
+CHUNK_SIZE = 1024 * 1024
+
+SHA256_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+class BlobRef(BaseModel):
+    sha256: str
+    size: int
+    content_type: str = "application/octet-stream"
+    private: bool = False
+
+
+def is_valid_sha256(value: str) -> bool:
+    return bool(SHA256_PATTERN.match(value or ""))
+
+
+class BlobStore:
+    """Interface implemented by blob storage backends; `private` selects the namespace"""
+
+    async def put_stream(self, chunks: AsyncIterator[bytes], content_type: Optional[str] = None,
+                         private: bool = False) -> BlobRef:
+        """Store a stream of chunks without holding the whole blob in memory"""
+        raise NotImplementedError
+
+    async def put_bytes(self, data: bytes, content_type: Optional[str] = None, private: bool = False) -> BlobRef:
+        """Store an in-memory blob"""
+        async def single_chunk():
+            yield data
+        return await self.put_stream(single_chunk(), content_type, private)
+
+    async def copy_to_private(self, sha256: str) -> Optional[BlobRef]:
+        """Store a copy of a public blob as private; None if neither copy exists"""
+        raise NotImplementedError
+
+    async def stat(self, sha256: str, private: bool = False) -> Optional[BlobRef]:
+        """Return the blob's metadata, or None if it is not stored"""
+        raise NotImplementedError
+
+    def read_range(self, sha256: str, start: int, end: int, private: bool = False) -> AsyncIterator[bytes]:
+        """Stream bytes start..end (inclusive) of a stored blob"""
+        raise NotImplementedError
+
+    async def delete(self, sha256: str, private: bool = False) -> bool:
+        raise NotImplementedError
+
+    def local_path(self, sha256: str, private: bool = False) -> Optional[Path]:
+        """Filesystem path of the blob when the backend keeps one, else None"""
+        return None
+
+
+class LocalBlobStore(BlobStore):
+    """Blob store on the local filesystem, sharded as <root>/ab/cd/<sha256> (<root>/private/... when private)"""
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.private_root = self.root / "private"
+        self.tmp_dir = self.root / "tmp"
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+
+    def _blob_path(self, sha256: str, private: bool = False) -> Path:
+        if not is_valid_sha256(sha256):
+            raise ValueError(f"Invalid blob id: {sha256}")
+        root = self.private_root if private else self.root
+        return root / sha256[:2] / sha256[2:4] / sha256
+
+    def _meta_path(self, sha256: str, private: bool = False) -> Path:
+        return self._blob_path(sha256, private).with_suffix(".json")
+
+    async def put_stream(self, chunks: AsyncIterator[bytes], content_type: Optional[str] = None,
+                         private: bool = False) -> BlobRef:
+        hasher = hashlib.sha256()
+        size = 0
+        tmp_path = self.tmp_dir / f"{uuid.uuid4().hex}.part"
+        handle = await asyncio.to_thread(open, tmp_path, "wb")
+        try:
+            async for chunk in chunks:
+                if not chunk:
+                    continue
+                hasher.update(chunk)
+                size += len(chunk)
+                await asyncio.to_thread(handle.write, chunk)
+            await asyncio.to_thread(handle.close)
+
+            sha256 = hasher.hexdigest()
+            ref = BlobRef(sha256=sha256, size=size, content_type=content_type or "application/octet-stream",
+                          private=private)
+            return await asyncio.to_thread(self._commit, tmp_path, ref)
+        finally:
+            if not handle.closed:
+                await asyncio.to_thread(handle.close)
+            if tmp_path.exists():
+                await asyncio.to_thread(tmp_path.unlink)
+
+    def _commit(self, tmp_path: Path, ref: BlobRef) -> BlobRef:
+        blob_path = self._blob_path(ref.sha256, ref.private)
+        if blob_path.exists():
+            # Same content is already stored in this namespace; keep the existing copy
+            return self._stat(ref.sha256, ref.private)
+        blob_path.parent.mkdir(parents=True, exist_ok=True)
+        # Metadata first: a blob is never visible without its content type
+        meta_tmp_path = tmp_path.with_suffix(".json.part")
+        try:
+            meta_tmp_path.write_text(json.dumps(ref.dict(exclude={"private"})))
+            os.replace(meta_tmp_path, blob_path.with_suffix(".json"))
+        finally:
+            if meta_tmp_path.exists():
+                meta_tmp_path.unlink()
+        os.replace(tmp_path, blob_path)
+        return ref
+
+    async def copy_to_private(self, sha256: str) -> Optional[BlobRef]:
+        if not is_valid_sha256(sha256):
+            return None
+        return await asyncio.to_thread(self._copy_to_private, sha256)
+
+    def _copy_to_private(self, sha256: str) -> Optional[BlobRef]:
+        existing = self._stat(sha256, private=True)
+        if existing is not None:
+            return existing
+        public = self._stat(sha256)
+        if public is None:
+            return None
+        tmp_path = self.tmp_dir / f"{uuid.uuid4().hex}.part"
+        try:
+            shutil.copyfile(self._blob_path(sha256), tmp_path)
+            return self._commit(tmp_path, BlobRef(**{**public.dict(), "private": True}))
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+    async def stat(self, sha256: str, private: bool = False) -> Optional[BlobRef]:
+        if not is_valid_sha256(sha256):
+            return None
+        return await asyncio.to_thread(self._stat, sha256, private)
+
+    def _stat(self, sha256: str, private: bool = False) -> Optional[BlobRef]:
+        blob_path = self._blob_path(sha256, private)
+        if not blob_path.exists():
+            return None
+        meta_path = self._meta_path(sha256, private)
+        if meta_path.exists():
+            # Visibility comes from the namespace, not from the stored metadata
+            return BlobRef(**{**json.loads(meta_path.read_text()), "private": private})
+        return BlobRef(sha256=sha256, size=blob_path.stat().st_size, private=private)
+
+    async def read_range(self, sha256: str, start: int, end: int, private: bool = False) -> AsyncIterator[bytes]:
+        handle = await asyncio.to_thread(open, self._blob_path(sha256, private), "rb")
+        try:
+            await asyncio.to_thread(handle.seek, start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = await asyncio.to_thread(handle.read, min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+        finally:
+            await asyncio.to_thread(handle.close)
+
+    async def delete(self, sha256: str, private: bool = False) -> bool:
+        if not is_valid_sha256(sha256):
+            return False
+        return await asyncio.to_thread(self._delete, sha256, private)
+
+    def _delete(self, sha256: str, private: bool = False) -> bool:
+        blob_path = self._blob_path(sha256, private)
+        if not blob_path.exists():
+            return False
+        blob_path.unlink()
+        meta_path = self._meta_path(sha256, private)
+        if meta_path.exists():
+            meta_path.unlink()
+        return True
+
+    def local_path(self, sha256: str, private: bool = False) -> Optional[Path]:
+        blob_path = self._blob_path(sha256, private)
+        return blob_path if blob_path.exists() else None
@@ -0,0 +1,302 @@
+"""Concurrent catalog sync from the phone specifications API into phone_specs.
+
+Every sync endpoint runs through CatalogSyncPipeline: brand phone lists are
+fanned out to a bounded pool of workers that fetch details under a token
+bucket rate limit, transform them and hand them to a batcher that upserts
+with unordered bulk writes keyed on (brand, model).
+
+Syncs are incremental: each document carries a fingerprint of its
+normalized content, and a batch only writes phones that are new or whose
+fingerprint changed, so a full resync leaves unchanged documents (and their
+updated_at) alone. A per-brand watermark records when each brand was last
+synced and what changed.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+# Fields only written when a phone is inserted for the first time
+INSERT_ONLY_FIELDS = ("_id", "created_at")
+
+DUPLICATE_KEY_ERROR = 11000
+
+FINGERPRINT_FIELD = "spec_fingerprint"
+
+# Fields that differ on every transform and are left out of the fingerprint
+VOLATILE_FIELDS = ("_id", "created_at", "updated_at", FINGERPRINT_FIELD)
+
+
+def spec_fingerprint(document: Dict[str, Any]) -> str:
+    """Stable hash of a transformed spec document's content"""
+    content = {k: v for k, v in document.items() if k not in VOLATILE_FIELDS}
+    encoded = json.dumps(content, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(encoded.encode("utf-8")).hexdigest()
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second with bursts up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class SyncResult:
+    """Counters collected over one sync run"""
+
+    def __init__(self, total_brands: int = 0):
+        self.total_brands = total_brands
+        self.total_phones = 0
+        self.successful_imports = 0
+        self.failed_imports = 0
+        self.inserted = 0  # Phones that were new to the catalog
+        self.updated = 0  # Existing phones whose content changed
+        self.unchanged = 0  # Existing phones skipped because their fingerprint matched
+        self.errors: List[str] = []
+        self.imported_phones: List[str] = []
+        # Per-brand counters for the sync watermarks
+        self.brands: Dict[str, Dict[str, int]] = {}
+
+    def brand_counts(self, brand_name: str) -> Dict[str, int]:
+        if brand_name not in self.brands:
+            self.brands[brand_name] = {"phones": 0, "inserted": 0, "updated": 0, "unchanged": 0, "failed": 0}
+        return self.brands[brand_name]
+
+    def fail(self, message: str, brand_name: Optional[str] = None):
+        self.failed_imports += 1
+        self.errors.append(message)
+        if brand_name is not None:
+            self.brand_counts(brand_name)["failed"] += 1
+
+    def record(self, brand_name: str, outcome: str, name: str):
+        """Count a phone that was inserted, updated or left unchanged"""
+        setattr(self, outcome, getattr(self, outcome) + 1)
+        self.brand_counts(brand_name)[outcome] += 1
+        self.successful_imports += 1
+        self.imported_phones.append(name)
+
+
+class CatalogSyncPipeline:
+    """Fetch, transform and batch-upsert phones for a list of brands"""
+
+    def __init__(
+        self,
+        collection,
+        api_client,
+        transform: Callable[[Dict], Optional[Dict]],
+        concurrency: int = 8,
+        rate_per_second: float = 20.0,
+        batch_size: int = 200,
+        watermarks=None
+    ):
+        self.collection = collection
+        self.watermarks = watermarks
+        self.api_client = api_client
+        self.transform = transform
+        self.concurrency = max(1, concurrency)
+        self.rate_limiter = TokenBucket(rate_per_second)
+        self.batch_size = max(1, batch_size)
+
+    async def sync_brands(self, brand_names: List[str]) -> SyncResult:
+        result = SyncResult(total_brands=len(brand_names))
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 4)
+        # (sync brand, document) pairs waiting to be written
+        batch: List[Tuple[str, Dict]] = []
+        batch_lock = asyncio.Lock()
+
+        async def flush():
+            async with batch_lock:
+                pending = batch[:]
+                batch.clear()
+            if pending:
+                await self._write_batch(pending, result)
+
+        async def worker():
+            while True:
+                item = await queue.get()
+                try:
+                    if item is None:
+                        return
+                    brand_name, device_name = item
+                    document = await self._fetch_document(device_name, brand_name, result)
+                    if document is None:
+                        continue
+                    async with batch_lock:
+                        batch.append((brand_name, document))
+                        full = len(batch) >= self.batch_size
+                    if full:
+                        await flush()
+                finally:
+                    queue.task_done()
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        try:
+            phone_lists = await asyncio.gather(
+                *(self._list_brand(brand_name, result) for brand_name in brand_names)
+            )
+            for brand_name, phones in zip(brand_names, phone_lists):
+                result.total_phones += len(phones)
+                result.brand_counts(brand_name)["phones"] += len(phones)
+                for phone in phones:
+                    device_name = phone.get("DeviceName", "")
+                    if not device_name or device_name == "Unknown":
+                        result.fail("Phone has no device name", brand_name)
+                        continue
+                    await queue.put((brand_name, device_name))
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                if not task.done():
+                    task.cancel()
+        await flush()
+        await self._save_watermarks(result)
+        return result
+
+    async def _list_brand(self, brand_name: str, result: SyncResult) -> List[Dict]:
+        try:
+            await self.rate_limiter.acquire()
+            phones = await self.api_client.get_brand_phones(brand_name)
+            if not phones:
+                result.errors.append(f"No phones found for brand {brand_name}")
+                return []
+            logger.info(f"Syncing brand: {brand_name} ({len(phones)} phones)")
+            return phones
+        except Exception as e:
+            result.errors.append(f"Error syncing brand {brand_name}: {str(e)}")
+            logger.error(f"Error syncing brand {brand_name}: {str(e)}")
+            return []
+
+    async def _fetch_document(self, device_name: str, brand_name: str, result: SyncResult) -> Optional[Dict]:
+        try:
+            await self.rate_limiter.acquire()
+            phone_details = await self.api_client.get_phone_details(device_name)
+            if not phone_details:
+                result.fail(f"Failed to fetch details for {device_name}", brand_name)
+                return None
+            document = self.transform(phone_details)
+            if not document:
+                result.fail(f"Failed to transform {device_name}", brand_name)
+                return None
+            document[FINGERPRINT_FIELD] = spec_fingerprint(document)
+            return document
+        except Exception as e:
+            result.fail(f"Error processing {device_name}: {str(e)}", brand_name)
+            logger.error(f"Error processing phone {device_name}: {str(e)}")
+            return None
+
+    def _upsert(self, document: Dict) -> UpdateOne:
+        updates = {k: v for k, v in document.items() if k not in INSERT_ONLY_FIELDS}
+        inserts = {k: document[k] for k in INSERT_ONLY_FIELDS if k in document}
+        return UpdateOne(
+            {"brand": document["brand"], "model": document["model"]},
+            {"$set": updates, "$setOnInsert": inserts},
+            upsert=True
+        )
+
+    async def _existing_fingerprints(self, documents: List[Dict]) -> Dict[Tuple[str, str], Optional[str]]:
+        """Fingerprints of the batch's phones that are already in the catalog"""
+        keys = {(document["brand"], document["model"]) for document in documents}
+        existing = {}
+        cursor = self.collection.find(
+            {"brand": {"$in": list({brand for brand, _ in keys})}, "model": {"$in": list({model for _, model in keys})}},
+            {"brand": 1, "model": 1, FINGERPRINT_FIELD: 1}
+        )
+        async for document in cursor:
+            key = (document.get("brand"), document.get("model"))
+            if key in keys:
+                existing[key] = document.get(FINGERPRINT_FIELD)
+        return existing
+
+    async def _write_batch(self, batch: List[Tuple[str, Dict]], result: SyncResult):
+        try:
+            existing = await self._existing_fingerprints([document for _, document in batch])
+        except Exception as e:
+            # Without the fingerprints every phone is written, as a full sync would
+            logger.error(f"Error reading sync fingerprints: {str(e)}")
+            existing = {}
+
+        pending: List[Tuple[str, Dict]] = []
+        for brand_name, document in batch:
+            key = (document["brand"], document["model"])
+            if key in existing and existing[key] == document[FINGERPRINT_FIELD]:
+                result.record(brand_name, "unchanged", f"{document['brand']} {document['model']}")
+            else:
+                pending.append((brand_name, document))
+        if not pending:
+            return
+
+        operations = [self._upsert(document) for _, document in pending]
+        failed_indexes = set()
+        upserted_indexes = set()
+        try:
+            write_result = await self.collection.bulk_write(operations, ordered=False)
+            upserted_indexes.update(write_result.upserted_ids or {})
+        except BulkWriteError as e:
+            upserted_indexes.update(upsert["index"] for upsert in e.details.get("upserted", []))
+            retry = []
+            for error in e.details.get("writeErrors", []):
+                if error.get("code") == DUPLICATE_KEY_ERROR:
+                    # Two upserts for a new (brand, model) raced; the retry matches the inserted document
+                    retry.append(error["index"])
+                else:
+                    failed_indexes.add(error["index"])
+            if retry:
+                try:
+                    await self.collection.bulk_write([operations[i] for i in retry], ordered=False)
+                except BulkWriteError:
+                    failed_indexes.update(retry)
+        except Exception as e:
+            logger.error(f"Error writing sync batch: {str(e)}")
+            failed_indexes = set(range(len(pending)))
+
+        for index, (brand_name, document) in enumerate(pending):
+            name = f"{document['brand']} {document['model']}"
+            if index in failed_indexes:
+                result.fail(f"Failed to save {name}", brand_name)
+            else:
+                result.record(brand_name, "inserted" if index in upserted_indexes else "updated", name)
+
+    async def _save_watermarks(self, result: SyncResult):
+        """Record when each brand was last synced and what changed"""
+        if self.watermarks is None or not result.brands:
+            return
+        now = datetime.utcnow()
+        operations = []
+        for brand_name, counts in result.brands.items():
+            update: Dict[str, Any] = {"$set": {"synced_at": now, "last_run": counts}}
+            if counts["inserted"] or counts["updated"]:
+                update["$set"]["changed_at"] = now
+            if not counts["failed"] and counts["phones"]:
+                update["$set"]["completed_at"] = now
+            operations.append(UpdateOne({"_id": brand_name}, update, upsert=True))
+        try:
+            await self.watermarks.bulk_write(operations, ordered=False)
+        except Exception as e:
+            logger.error(f"Error saving sync watermarks: {str(e)}")
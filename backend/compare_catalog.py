@@ -0,0 +1,122 @@
+"""Precomputed compare-view projection of the phone_specs collection.
+
+The compare picker needs a small, fixed set of display fields for every
+phone. Instead of transforming the whole collection on each request, the
+projection is built once, kept in memory together with its serialized JSON
+and ETag, and rebuilt lazily after a write marks it dirty (or after max_age
+as a safety net for writes made by other processes).
+"""
+import asyncio
+import hashlib
+import json
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Fields read from phone_specs to build a compare entry
+COMPARE_SPEC_PROJECTION = {
+    "brand": 1, "model": 1, "price_range_min": 1, "price_range_max": 1,
+    "storage_gb": 1, "ram_gb": 1, "battery_mah": 1, "camera_mp": 1,
+    "display_size": 1, "processor": 1, "operating_system": 1, "network_5g": 1
+}
+
+
+def build_compare_entry(phone: Dict[str, Any]) -> Dict[str, Any]:
+    """Transform a phone_specs document to the compare-friendly format"""
+    # Extract brand and model correctly
+    brand = phone.get("brand", "Unknown")
+    model = phone.get("model", "Unknown")
+
+    # Remove brand name from model if it's duplicated
+    if model.startswith(brand):
+        model = model[len(brand):].strip()
+
+    return {
+        "_id": str(phone.get("_id")),
+        "brand": brand,
+        "model": model,
+        "displayName": f"{brand} {model}",
+        "price": phone.get("price_range_min", 0),
+        "photos": ['/api/placeholder/300/200'],
+        "storage": f"{phone.get('storage_gb', 'N/A')}GB" if phone.get('storage_gb') else 'N/A',
+        "ram": f"{phone.get('ram_gb', 'N/A')}GB" if phone.get('ram_gb') else 'N/A',
+        "battery": f"{phone.get('battery_mah', 'N/A')} mAh" if phone.get('battery_mah') else 'N/A',
+        "camera": phone.get('camera_mp', 'N/A'),
+        "screen_size": phone.get('display_size', 'N/A'),
+        "processor": phone.get('processor', 'N/A'),
+        "operating_system": phone.get('operating_system', 'N/A'),
+        "network": "5G" if phone.get('network_5g') == 'Yes' else "4G",
+        "price_range": f"PKR {phone.get('price_range_min', 0)} - {phone.get('price_range_max', 0)}" if phone.get('price_range_min') else 'Price not available'
+    }
+
+
+def encode_payload(entries: List[Dict[str, Any]]) -> Tuple[bytes, str]:
+    """Serialize entries and derive a strong ETag from the bytes"""
+    body = json.dumps(entries, separators=(",", ":"), default=str).encode("utf-8")
+    return body, f'"{hashlib.sha1(body).hexdigest()}"'
+
+
+class CompareCatalog:
+    """In-memory compare projection with dirty tracking"""
+
+    def __init__(self, collection, max_age: float = 300.0):
+        self.collection = collection
+        self.max_age = max_age
+        self._entries: List[Dict[str, Any]] = []
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+        self._by_brand: Dict[str, List[Dict[str, Any]]] = {}
+        self._payload: Optional[Tuple[bytes, str]] = None
+        self._built_at = 0.0
+        self._dirty = True
+        self._lock = asyncio.Lock()
+
+    def mark_dirty(self):
+        """Called after phone_specs writes; the next read rebuilds the projection"""
+        self._dirty = True
+
+    def _stale(self) -> bool:
+        return self._dirty or time.monotonic() - self._built_at > self.max_age
+
+    async def refresh(self):
+        """Rebuild the projection if it is dirty or too old (one rebuild at a time)"""
+        if not self._stale():
+            return
+        async with self._lock:
+            if not self._stale():
+                return
+            # Cleared before reading so writes made during the rebuild mark it dirty again
+            self._dirty = False
+            entries = []
+            try:
+                async for phone in self.collection.find({}, COMPARE_SPEC_PROJECTION):
+                    entries.append(build_compare_entry(phone))
+            except Exception:
+                self._dirty = True
+                raise
+            by_brand: Dict[str, List[Dict[str, Any]]] = {}
+            for entry in entries:
+                by_brand.setdefault(str(entry["brand"]).lower(), []).append(entry)
+            self._entries = entries
+            self._by_id = {entry["_id"]: entry for entry in entries}
+            self._by_brand = by_brand
+            self._payload = encode_payload(entries)
+            self._built_at = time.monotonic()
+
+    async def payload(self, ids: Optional[Iterable[str]] = None, brand: Optional[str] = None) -> Tuple[bytes, str]:
+        """JSON body and ETag for the whole catalog, or for the selected ids / brand"""
+        await self.refresh()
+        if ids is None and brand is None:
+            return self._payload
+        if brand is not None:
+            entries = self._by_brand.get(brand.strip().lower(), [])
+        else:
+            entries = self._entries
+        if ids is not None:
+            if brand is None:
+                entries = [self._by_id[phone_id] for phone_id in dict.fromkeys(ids) if phone_id in self._by_id]
+            else:
+                wanted = set(ids)
+                entries = [entry for entry in entries if entry["_id"] in wanted]
+        return encode_payload(entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
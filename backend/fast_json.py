@@ -0,0 +1,110 @@
+"""Fast JSON responses for list endpoints.
+
+Documents returned by the listing and phone-spec endpoints are written by
+our own code paths, so they already have the shape of their response
+models. Re-validating them through Pydantic twice (once when the handler
+builds the models, again when FastAPI applies response_model) dominates the
+CPU time of a page. This module projects documents onto a model's fields
+without validation and encodes them straight to JSON bytes with orjson,
+falling back to the standard library when orjson is not installed.
+
+Routes keep their `response_model`, so the OpenAPI schema is unchanged;
+returning a FastJSONResponse simply bypasses response validation.
+"""
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type
+
+from bson import ObjectId
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from pydantic_core import PydanticUndefined
+
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library encoder
+    orjson = None
+
+# Headers of the injected response that must not be copied onto the new one
+SKIPPED_HEADERS = {"content-length", "content-type"}
+
+
+def _default(value: Any) -> Any:
+    """Encode the non-JSON types found in our documents"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json", by_alias=True)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, allow_nan=False,
+                      separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class ModelProjector:
+    """Copies a document's fields into a model's output shape without validating them"""
+
+    def __init__(self, model: Type[BaseModel]):
+        # (output key, document keys to read, default, default factory)
+        self.fields: List[Tuple[str, Tuple[str, ...], Any, Any]] = []
+        for name, field in model.model_fields.items():
+            alias = field.alias or name
+            sources = (alias, name) if alias != name else (name,)
+            default = None if field.default is PydanticUndefined else field.default
+            self.fields.append((alias, sources, default, field.default_factory))
+
+    def project(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        output = {}
+        for key, sources, default, factory in self.fields:
+            for source in sources:
+                if source in document:
+                    output[key] = document[source]
+                    break
+            else:
+                output[key] = factory() if factory is not None else default
+        return output
+
+
+_projectors: Dict[Type[BaseModel], ModelProjector] = {}
+
+
+def projector(model: Type[BaseModel]) -> ModelProjector:
+    if model not in _projectors:
+        _projectors[model] = ModelProjector(model)
+    return _projectors[model]
+
+
+def model_list_response(
+    documents: Iterable[Dict[str, Any]],
+    model: Type[BaseModel],
+    response: Optional[Response] = None
+) -> FastJSONResponse:
+    """Encode documents as a JSON list shaped like List[model], keeping headers set on `response`"""
+    model_projector = projector(model)
+    content = [model_projector.project(document) for document in documents]
+    headers = None
+    if response is not None:
+        headers = {key: value for key, value in response.headers.items() if key not in SKIPPED_HEADERS}
+    return FastJSONResponse(content=content, headers=headers)
@@ -0,0 +1,47 @@
+"""Gunicorn settings for serving the API with several worker processes.
+
+    gunicorn -c gunicorn.conf.py server:app
+
+Each worker is a uvicorn event loop (uvloop and httptools when installed),
+so CPU-bound work in one worker (bcrypt, serialization, imports, the sync
+transform) no longer stalls every request. The app is imported once in the
+master and forked (preload_app), which shares its memory and makes worker
+restarts cheap. Background components run on one worker only; see
+leader.py. Workers share their request metrics through METRICS_DIR,
+which is cleared when the master starts; see metrics.py.
+
+Signals to the master:
+    HUP      replace the workers gracefully (same code when preloaded)
+    USR2     start a new master with the new code, then TERM the old one
+    TTIN/TTOU  add / remove a worker
+Workers are also recycled after max_requests (+ jitter) requests.
+"""
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+bind = os.environ.get("BIND", "0.0.0.0:8001")
+# CPU-bound work dominates, so one worker per core
+workers = int(os.environ.get("WEB_CONCURRENCY", "0")) or multiprocessing.cpu_count()
+worker_class = "uvicorn_worker.UvicornWorker"
+preload_app = os.environ.get("GUNICORN_PRELOAD", "true").lower() == "true"
+
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", "10000"))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", "1000"))
+# Seconds a worker may be silent before it is killed, and to finish requests on shutdown
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", "5"))
+
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG") or None
+errorlog = "-"
+loglevel = os.environ.get("GUNICORN_LOG_LEVEL", "info")
+
+# Set before the app is imported, so every worker publishes its metrics here
+os.environ.setdefault("METRICS_DIR", os.path.join(tempfile.gettempdir(), "api-metrics"))
+
+
+def on_starting(server):
+    # Samples of a previous run would otherwise be counted again
+    shutil.rmtree(os.environ["METRICS_DIR"], ignore_errors=True)
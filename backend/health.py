@@ -0,0 +1,117 @@
+"""Startup steps and readiness of the API process.
+
+Startup work (Mongo connection, indexes, cache warm-up, the external client
+pool, background components) is registered as named steps that all run
+concurrently. A step that fails is retried in the background until it
+succeeds, so the process can start serving right away and report itself
+not ready until every step has completed. /api/readyz combines the step
+states with live checks (a Mongo ping); /api/healthz only says the process
+is up.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+StepFunction = Callable[[], Awaitable[Any]]
+
+
+class StepState:
+    """Outcome of one startup step"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.ok = False
+        self.attempts = 0
+        self.error: Optional[str] = None
+        self.duration_ms: Optional[float] = None
+
+    def report(self) -> Dict[str, Any]:
+        return {"ok": self.ok, "attempts": self.attempts, "error": self.error, "duration_ms": self.duration_ms}
+
+
+class Readiness:
+    """Runs startup steps concurrently, retries failures and answers readiness probes"""
+
+    def __init__(self, retry_interval: float = 5.0, check_timeout: float = 2.0):
+        self.retry_interval = retry_interval
+        self.check_timeout = check_timeout
+        self._steps: Dict[str, StepFunction] = {}
+        self._checks: Dict[str, StepFunction] = {}
+        self._states: Dict[str, StepState] = {}
+        self._tasks: List[asyncio.Task] = []
+        self.started_at = time.monotonic()
+        self.ready_after: Optional[float] = None
+
+    def add_step(self, name: str, step: StepFunction):
+        """Work that must succeed once before the process is ready"""
+        self._steps[name] = step
+        self._states[name] = StepState(name)
+
+    def add_check(self, name: str, check: StepFunction):
+        """Dependency probed on every readiness request"""
+        self._checks[name] = check
+
+    @property
+    def ready(self) -> bool:
+        return all(state.ok for state in self._states.values())
+
+    async def _run(self, name: str, step: StepFunction):
+        state = self._states[name]
+        while True:
+            state.attempts += 1
+            started = time.perf_counter()
+            try:
+                await step()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                state.error = str(e) or type(e).__name__
+                logger.error(f"Startup step {name} failed (attempt {state.attempts}): {state.error}")
+                await asyncio.sleep(self.retry_interval)
+                continue
+            state.ok = True
+            state.error = None
+            state.duration_ms = round((time.perf_counter() - started) * 1000, 1)
+            if self.ready and self.ready_after is None:
+                self.ready_after = round(time.monotonic() - self.started_at, 3)
+                logger.info(f"Ready {self.ready_after}s after startup")
+            return
+
+    async def start(self, wait: float = 5.0) -> bool:
+        """Start every step and wait up to `wait` seconds for them; unfinished ones keep running"""
+        self.started_at = time.monotonic()
+        self._tasks = [asyncio.create_task(self._run(name, step)) for name, step in self._steps.items()]
+        if self._tasks:
+            await asyncio.wait(self._tasks, timeout=wait)
+        return self.ready
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _probe(self, check: StepFunction) -> Optional[str]:
+        try:
+            await asyncio.wait_for(check(), timeout=self.check_timeout)
+            return None
+        except asyncio.TimeoutError:
+            return f"no answer within {self.check_timeout}s"
+        except Exception as e:
+            return str(e) or type(e).__name__
+
+    async def report(self) -> Dict[str, Any]:
+        """Readiness document; `ready` is False while a step is pending or a live check fails"""
+        names = list(self._checks)
+        errors = await asyncio.gather(*(self._probe(self._checks[name]) for name in names))
+        checks = {name: {"ok": error is None, "error": error} for name, error in zip(names, errors)}
+        ready = self.ready and all(check["ok"] for check in checks.values())
+        return {
+            "ready": ready,
+            "ready_after_seconds": self.ready_after,
+            "steps": {name: state.report() for name, state in self._states.items()},
+            "checks": checks
+        }
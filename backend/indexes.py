@@ -0,0 +1,191 @@
+"""Declarative MongoDB indexes.
+
+INDEXES lists every index the application relies on, per collection, with
+the queries it serves. reconcile_indexes() compares the list with what
+exists and builds only the missing indexes (all collections concurrently),
+so it is cheap to run on every startup. Unique indexes enforce what the
+write paths used to check with a lookup first; when existing duplicates
+prevent building one it is reported and the others are still built.
+index_report() joins the list with $indexStats to flag indexes that are
+missing, never used, or not declared here.
+"""
+import asyncio
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from pymongo import IndexModel
+from pymongo.errors import OperationFailure
+
+from spec_numbers import NUMERIC_FIELDS
+
+logger = logging.getLogger(__name__)
+
+IndexKeys = Sequence[Tuple[str, int]]
+
+
+def index_name(keys: IndexKeys) -> str:
+    """Name MongoDB drivers give an index by default ("brand_1_model_1")"""
+    return "_".join(f"{field}_{direction}" for field, direction in keys)
+
+
+class IndexSpec:
+    """One declared index"""
+
+    def __init__(self, collection: str, keys: IndexKeys, purpose: str, unique: bool = False):
+        self.collection = collection
+        self.keys = list(keys)
+        self.purpose = purpose
+        self.unique = unique
+        self.name = index_name(self.keys)
+
+    def model(self) -> IndexModel:
+        return IndexModel(self.keys, name=self.name, unique=self.unique)
+
+    def matches(self, info: Dict[str, Any]) -> bool:
+        """Whether an existing index (from list_indexes) has this key pattern and uniqueness"""
+        return list(info["key"].items()) == self.keys and bool(info.get("unique")) == self.unique
+
+
+def _listing_index(keys: IndexKeys, purpose: str) -> IndexSpec:
+    return IndexSpec("phone_listings", keys, purpose)
+
+
+# Exact-match facets the browse filters send, each indexed like the city and condition filters
+FILTER_FACETS = ("color", "storage", "ram", "battery", "battery_health", "network", "seller_type")
+
+
+INDEXES: List[IndexSpec] = [
+    _listing_index([("is_active", 1), ("created_at", -1), ("_id", -1)], "browse newest first, keyset pages"),
+    _listing_index([("is_active", 1), ("price", 1), ("_id", 1)], "browse by price"),
+    _listing_index([("is_active", 1), ("views", -1), ("_id", -1)], "browse most viewed"),
+    _listing_index([("is_active", 1), ("facets.brand", 1), ("created_at", -1), ("_id", -1)], "brand filter"),
+    _listing_index([("is_active", 1), ("facets.brand", 1), ("facets.model", 1)], "brand/model facets"),
+    _listing_index([("is_active", 1), ("facets.city", 1), ("created_at", -1), ("_id", -1)], "city filter"),
+    _listing_index([("is_active", 1), ("facets.condition", 1), ("created_at", -1), ("_id", -1)], "condition filter"),
+    *[_listing_index([("is_active", 1), (f"facets.{field}", 1), ("created_at", -1), ("_id", -1)], f"{field} filter")
+      for field in FILTER_FACETS],
+    _listing_index([("sort_date", -1), ("_id", -1)], "admin listing pages"),
+    *[_listing_index([("is_active", 1), (f"numeric.{field}", 1)], f"{field} range filter") for field in NUMERIC_FIELDS],
+    IndexSpec("accessories", [("is_active", 1), ("category", 1), ("created_at", -1), ("_id", -1)], "accessory browse"),
+    IndexSpec("users", [("email", 1)], "login and registration; one account per email", unique=True),
+    IndexSpec("users", [("created_at", -1), ("_id", -1)], "admin user pages"),
+    IndexSpec("users", [("role", 1), ("verification_status", 1), ("created_at", -1), ("_id", -1)], "pending approvals"),
+    IndexSpec("jobs", [("status", 1), ("created_at", 1)], "job queue claims"),
+    IndexSpec("phone_specs", [("brand", 1), ("model", 1)], "create/import/sync dedupe and sync upserts", unique=True),
+    IndexSpec("phone_specs", [("source", 1), ("updated_at", -1)], "sync status"),
+    *[IndexSpec("phone_specs", [(f"numeric.{field}", 1)], f"{field} range filter") for field in NUMERIC_FIELDS],
+]
+
+
+def by_collection(specs: Iterable[IndexSpec]) -> Dict[str, List[IndexSpec]]:
+    grouped: Dict[str, List[IndexSpec]] = {}
+    for spec in specs:
+        grouped.setdefault(spec.collection, []).append(spec)
+    return grouped
+
+
+async def _existing_indexes(collection) -> Dict[str, Dict[str, Any]]:
+    return {info["name"]: info async for info in collection.list_indexes()}
+
+
+async def _reconcile_collection(collection, specs: List[IndexSpec]) -> Dict[str, Any]:
+    existing = await _existing_indexes(collection)
+    missing = [spec for spec in specs if spec.name not in existing]
+    conflicting = [spec.name for spec in specs if spec.name in existing and not spec.matches(existing[spec.name])]
+    created: List[str] = []
+    failed: Dict[str, str] = {}
+
+    plain = [spec for spec in missing if not spec.unique]
+    if plain:
+        await collection.create_indexes([spec.model() for spec in plain])
+        created.extend(spec.name for spec in plain)
+    # Unique indexes one at a time: existing duplicates fail only that build
+    for spec in missing:
+        if not spec.unique:
+            continue
+        try:
+            await collection.create_indexes([spec.model()])
+            created.append(spec.name)
+        except OperationFailure as e:
+            failed[spec.name] = str(e)
+            logger.error(f"Could not create unique index {spec.name} on {collection.name}: {str(e)}")
+    if created:
+        logger.info(f"Created indexes on {collection.name}: {', '.join(created)}")
+    for name in conflicting:
+        logger.warning(f"Index {name} on {collection.name} differs from its declaration; drop it to rebuild")
+    return {"created": created, "failed": failed, "conflicting": conflicting}
+
+
+async def reconcile_indexes(db, specs: Iterable[IndexSpec] = INDEXES) -> Dict[str, Dict[str, Any]]:
+    """Build the declared indexes that do not exist yet; connection errors propagate"""
+    grouped = by_collection(specs)
+    results = await asyncio.gather(*(_reconcile_collection(db[name], group) for name, group in grouped.items()))
+    return dict(zip(grouped, results))
+
+
+async def _index_usage(collection) -> Dict[str, Dict[str, Any]]:
+    """Accesses per index name, summed over the hosts $indexStats reports"""
+    usage: Dict[str, Dict[str, Any]] = {}
+    async for stat in collection.aggregate([{"$indexStats": {}}]):
+        entry = usage.setdefault(stat["name"], {"ops": 0, "since": None})
+        accesses = stat.get("accesses") or {}
+        entry["ops"] += int(accesses.get("ops", 0))
+        since = accesses.get("since")
+        if since is not None and (entry["since"] is None or since < entry["since"]):
+            entry["since"] = since
+    return usage
+
+
+async def _collection_report(collection, specs: List[IndexSpec]) -> Dict[str, Any]:
+    existing = await _existing_indexes(collection)
+    declared = {spec.name: spec for spec in specs}
+    usage: Optional[Dict[str, Dict[str, Any]]]
+    usage_error = None
+    try:
+        usage = await _index_usage(collection)
+    except Exception as e:
+        usage = None
+        usage_error = str(e)
+
+    indexes = []
+    for name, info in existing.items():
+        spec = declared.get(name)
+        stats = usage.get(name) if usage is not None else None
+        flags = []
+        if name != "_id_" and spec is None:
+            flags.append("undeclared")
+        if spec is not None and not spec.matches(info):
+            flags.append("conflicting")
+        # Unique indexes earn their keep by enforcing the constraint
+        if stats is not None and stats["ops"] == 0 and name != "_id_" and not info.get("unique"):
+            flags.append("unused")
+        indexes.append({
+            "name": name,
+            "keys": list(info["key"].items()),
+            "unique": bool(info.get("unique")),
+            "purpose": spec.purpose if spec else None,
+            "ops": stats["ops"] if stats else None,
+            "since": stats["since"] if stats else None,
+            "flags": flags
+        })
+    missing = [
+        {"name": spec.name, "keys": spec.keys, "unique": spec.unique, "purpose": spec.purpose}
+        for spec in specs if spec.name not in existing
+    ]
+    return {"indexes": indexes, "missing": missing, "usage_error": usage_error}
+
+
+async def index_report(db, specs: Iterable[IndexSpec] = INDEXES) -> Dict[str, Any]:
+    """Declared vs existing indexes with $indexStats usage, per collection"""
+    grouped = by_collection(specs)
+    reports = await asyncio.gather(*(_collection_report(db[name], group) for name, group in grouped.items()))
+    collections = dict(zip(grouped, reports))
+    return {
+        "collections": collections,
+        "summary": {
+            "missing": sum(len(report["missing"]) for report in reports),
+            "unused": sum(1 for report in reports for index in report["indexes"] if "unused" in index["flags"]),
+            "undeclared": sum(1 for report in reports for index in report["indexes"] if "undeclared" in index["flags"]),
+            "conflicting": sum(1 for report in reports for index in report["indexes"] if "conflicting" in index["flags"])
+        }
+    }
@@ -0,0 +1,358 @@
+"""Cross-worker invalidation of in-process caches.
+
+Each worker keeps its own caches (user principals, the spec catalogs, the
+listing search index). Writers refresh their own worker's caches directly;
+this bus tells the other workers. It tails one MongoDB change stream over
+the watched collections and hands typed events to the handlers subscribed
+to each collection. The stream's resume token is saved periodically so a
+restarted worker replays what happened while it was down. Handlers can
+subscribe to a set of fields; updates that touch none of the fields their
+collection's handlers asked for are dropped by the stream's $match, so hot
+counters (listing views) never reach the workers. Update events carry no
+document: handlers that need it look it up.
+
+Change streams need a replica set. Where they are unavailable the bus falls
+back to version counters: write paths call notify(), which bumps a counter
+document per collection and keeps the latest events on it, and every
+worker polls the counters and replays the events it has not seen (or
+invalidates the whole collection when it fell too far behind).
+"""
+import asyncio
+import inspect
+import logging
+import os
+import time
+import uuid
+from datetime import datetime
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Union
+
+logger = logging.getLogger(__name__)
+
+# Error codes after which a change stream cannot be resumed from its token
+UNRESUMABLE_ERROR_CODES = {260, 280, 286}
+STREAM_STATE_ID = "change_stream"
+VERSION_STATE_PREFIX = "version:"
+
+
+class ChangeOperation(str, Enum):
+    INSERT = "insert"
+    UPDATE = "update"
+    REPLACE = "replace"
+    DELETE = "delete"
+    # Anything in the collection may have changed (bulk writes, lost history)
+    INVALIDATE = "invalidate"
+
+
+class InvalidationMode(str, Enum):
+    AUTO = "auto"
+    CHANGE_STREAM = "change_stream"
+    POLL = "poll"
+    OFF = "off"
+
+
+class InvalidationEvent:
+    """One change to a watched collection"""
+
+    __slots__ = ("collection", "operation", "document_id", "document", "source")
+
+    def __init__(
+        self,
+        collection: str,
+        operation: ChangeOperation,
+        document_id: Any = None,
+        document: Optional[Dict[str, Any]] = None,
+        source: str = InvalidationMode.CHANGE_STREAM.value
+    ):
+        self.collection = collection
+        self.operation = operation
+        self.document_id = document_id
+        # Full document after the change, when the source provides it
+        self.document = document
+        self.source = source
+
+    def __repr__(self) -> str:
+        return f"InvalidationEvent({self.collection}, {self.operation.value}, {self.document_id!r}, source={self.source})"
+
+
+InvalidationHandler = Callable[[InvalidationEvent], Union[None, Awaitable[None]]]
+
+
+def event_from_change(change: Dict[str, Any]) -> InvalidationEvent:
+    """Map a change stream document to an event"""
+    collection = change.get("ns", {}).get("coll")
+    try:
+        operation = ChangeOperation(change.get("operationType"))
+    except ValueError:
+        # drop, rename, dropDatabase and the like
+        operation = ChangeOperation.INVALIDATE
+    document_id = (change.get("documentKey") or {}).get("_id")
+    return InvalidationEvent(collection, operation, document_id, change.get("fullDocument"))
+
+
+def updated_fields(change: Dict[str, Any]) -> Set[str]:
+    """Top-level fields an update change set, removed or truncated"""
+    description = change.get("updateDescription") or {}
+    paths = list(description.get("updatedFields") or {})
+    paths.extend(description.get("removedFields") or [])
+    paths.extend(item.get("field", "") for item in description.get("truncatedArrays") or [])
+    return {path.split(".", 1)[0] for path in paths}
+
+
+def touches_fields_expr(fields: Iterable[str]) -> Dict[str, Any]:
+    """Aggregation expression: the update change touches one of the top-level `fields`"""
+    paths = {"$concatArrays": [
+        {"$map": {"input": {"$objectToArray": {"$ifNull": ["$updateDescription.updatedFields", {}]}}, "in": "$$this.k"}},
+        {"$ifNull": ["$updateDescription.removedFields", []]},
+        {"$map": {"input": {"$ifNull": ["$updateDescription.truncatedArrays", []]}, "in": "$$this.field"}}
+    ]}
+    return {"$gt": [{"$size": {"$filter": {
+        "input": paths,
+        "cond": {"$in": [{"$arrayElemAt": [{"$split": ["$$this", "."]}, 0]}, sorted(fields)]}
+    }}}, 0]}
+
+
+class InvalidationBus:
+    """Delivers changes made by any worker to the caches subscribed in this one"""
+
+    def __init__(
+        self,
+        db,
+        collections: Iterable[str],
+        mode: str = InvalidationMode.AUTO.value,
+        poll_interval: float = 2.0,
+        history: int = 200,
+        max_resume_age: float = 3600.0,
+        state_collection: str = "invalidation_state"
+    ):
+        self.db = db
+        self.collections = list(collections)
+        self.mode = InvalidationMode(mode)
+        self.poll_interval = poll_interval
+        self.history = max(1, history)
+        self.max_resume_age = max_resume_age
+        self.state_collection = state_collection
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.active_mode: Optional[InvalidationMode] = None
+        self._handlers: Dict[str, List[InvalidationHandler]] = {name: [] for name in self.collections}
+        # Fields whose updates matter per collection; None when every update does
+        self._fields: Dict[str, Optional[Set[str]]] = {name: set() for name in self.collections}
+        self._versions: Dict[str, int] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._token_saved_at = 0.0
+        self.counters = {"events": 0, "handler_errors": 0, "collection_resets": 0, "notified": 0, "stream_restarts": 0}
+
+    @property
+    def state(self):
+        return self.db[self.state_collection]
+
+    def subscribe(self, collection: str, handler: InvalidationHandler, fields: Optional[Iterable[str]] = None):
+        """Call `handler` with the events of `collection` (plain or async function)
+
+        With `fields`, change stream updates that touch none of these top-level
+        fields are not delivered; inserts, replaces and deletes always are.
+        """
+        if collection not in self._handlers:
+            raise ValueError(f"Collection {collection} is not watched")
+        self._handlers[collection].append(handler)
+        if fields is None:
+            self._fields[collection] = None
+        elif self._fields[collection] is not None:
+            self._fields[collection].update(fields)
+
+    async def dispatch(self, event: InvalidationEvent):
+        self.counters["events"] += 1
+        if event.operation == ChangeOperation.INVALIDATE:
+            self.counters["collection_resets"] += 1
+        for handler in self._handlers.get(event.collection, []):
+            try:
+                result = handler(event)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                self.counters["handler_errors"] += 1
+                logger.error(f"Error handling {event}: {str(e)}")
+
+    async def notify(self, collection: str, operation: ChangeOperation, document_id: Any = None):
+        """Announce a write made by this worker; only needed when other workers poll for changes"""
+        if self.active_mode != InvalidationMode.POLL:
+            return
+        event = {"op": operation.value, "id": document_id, "origin": self.worker_id}
+        try:
+            await self.state.update_one(
+                {"_id": VERSION_STATE_PREFIX + collection},
+                {"$inc": {"version": 1}, "$push": {"events": {"$each": [event], "$slice": -self.history}}},
+                upsert=True
+            )
+            self.counters["notified"] += 1
+        except Exception as e:
+            logger.error(f"Error publishing invalidation for {collection}: {str(e)}")
+
+    async def start(self):
+        if self._task is not None or self.mode == InvalidationMode.OFF:
+            return
+        # Assigned per process: the app may be imported before gunicorn forks its workers
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        if self.mode in (InvalidationMode.AUTO, InvalidationMode.CHANGE_STREAM):
+            try:
+                stream = await self._open_stream()
+            except Exception as e:
+                if self.mode == InvalidationMode.CHANGE_STREAM:
+                    raise
+                logger.warning(f"Change streams unavailable, polling version counters instead: {str(e)}")
+            else:
+                self.active_mode = InvalidationMode.CHANGE_STREAM
+                self._task = asyncio.create_task(self._watch_loop(stream))
+                return
+        self.active_mode = InvalidationMode.POLL
+        self._versions = await self._read_versions()
+        self._task = asyncio.create_task(self._poll_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self.active_mode = None
+
+    # Change streams
+
+    async def _load_resume_token(self) -> Optional[Dict[str, Any]]:
+        state = await self.state.find_one({"_id": STREAM_STATE_ID})
+        if not state or not state.get("resume_token"):
+            return None
+        # Caches are rebuilt at startup; replaying a long outage would only repeat that work
+        if (datetime.utcnow() - state["saved_at"]).total_seconds() > self.max_resume_age:
+            return None
+        return state["resume_token"]
+
+    async def _save_resume_token(self, token: Optional[Dict[str, Any]], force: bool = False):
+        if token is None or (not force and time.monotonic() - self._token_saved_at < 1.0):
+            return
+        self._token_saved_at = time.monotonic()
+        try:
+            await self.state.update_one(
+                {"_id": STREAM_STATE_ID},
+                {"$set": {"resume_token": token, "saved_at": datetime.utcnow(), "worker": self.worker_id}},
+                upsert=True
+            )
+        except Exception as e:
+            logger.error(f"Error saving change stream resume token: {str(e)}")
+
+    def _stream_pipeline(self) -> List[Dict[str, Any]]:
+        match: Dict[str, Any] = {"ns.coll": {"$in": self.collections}}
+        filtered = {name: fields for name, fields in self._fields.items() if fields is not None}
+        if filtered:
+            match["$or"] = [
+                {"operationType": {"$ne": "update"}},
+                {"ns.coll": {"$nin": list(filtered)}},
+                *({"ns.coll": name, "$expr": touches_fields_expr(fields)} for name, fields in filtered.items())
+            ]
+        return [{"$match": match}]
+
+    def _wanted(self, change: Dict[str, Any]) -> bool:
+        """Same test as the stream's $match, for servers or mocks that pass everything"""
+        if change.get("operationType") != "update":
+            return True
+        fields = self._fields.get(change.get("ns", {}).get("coll"), None)
+        return fields is None or bool(fields & updated_fields(change))
+
+    async def _open_stream(self, resume: bool = True):
+        token = await self._load_resume_token() if resume else None
+        stream = self.db.watch(self._stream_pipeline(), resume_after=token)
+        # The cursor is created lazily; fetch once so an unsupported deployment fails here
+        first = await stream.try_next()
+        if first is not None:
+            await self._handle_change(first)
+        return stream
+
+    async def _handle_change(self, change: Dict[str, Any]):
+        if change.get("operationType") in ("invalidate", "dropDatabase"):
+            for collection in self.collections:
+                await self.dispatch(InvalidationEvent(collection, ChangeOperation.INVALIDATE))
+            return
+        event = event_from_change(change)
+        if event.collection in self._handlers and self._wanted(change):
+            await self.dispatch(event)
+
+    async def _watch_loop(self, stream):
+        resume = True
+        while True:
+            if stream is None:
+                try:
+                    stream = await self._open_stream(resume=resume)
+                except Exception as e:
+                    logger.error(f"Error reopening change stream: {str(e)}")
+                    await asyncio.sleep(self.poll_interval)
+                    continue
+            try:
+                async with stream:
+                    async for change in stream:
+                        await self._handle_change(change)
+                        await self._save_resume_token(stream.resume_token)
+                # The stream was invalidated (dropDatabase); start over from now
+                resume = False
+            except asyncio.CancelledError:
+                await self._save_resume_token(stream.resume_token, force=True)
+                raise
+            except Exception as e:
+                self.counters["stream_restarts"] += 1
+                resume = getattr(e, "code", None) not in UNRESUMABLE_ERROR_CODES
+                logger.error(f"Change stream failed ({'resuming' if resume else 'restarting'}): {str(e)}")
+                if resume:
+                    await self._save_resume_token(stream.resume_token, force=True)
+                else:
+                    # Events were lost; everything may be stale
+                    for collection in self.collections:
+                        await self.dispatch(InvalidationEvent(collection, ChangeOperation.INVALIDATE))
+                await asyncio.sleep(self.poll_interval)
+            stream = None
+
+    # Version counter polling
+
+    async def _read_versions(self) -> Dict[str, int]:
+        ids = [VERSION_STATE_PREFIX + name for name in self.collections]
+        versions = {name: 0 for name in self.collections}
+        async for state in self.state.find({"_id": {"$in": ids}}, {"version": 1}):
+            versions[state["_id"][len(VERSION_STATE_PREFIX):]] = state.get("version", 0)
+        return versions
+
+    async def poll(self):
+        """Deliver events announced by other workers since the last poll"""
+        ids = [VERSION_STATE_PREFIX + name for name in self.collections]
+        async for state in self.state.find({"_id": {"$in": ids}}):
+            collection = state["_id"][len(VERSION_STATE_PREFIX):]
+            version = state.get("version", 0)
+            seen = self._versions.get(collection, 0)
+            if version <= seen:
+                continue
+            self._versions[collection] = version
+            events = state.get("events", [])
+            missed = version - seen
+            if missed > len(events):
+                await self.dispatch(InvalidationEvent(collection, ChangeOperation.INVALIDATE, source=InvalidationMode.POLL.value))
+                continue
+            for event in events[-missed:]:
+                if event.get("origin") == self.worker_id:
+                    continue
+                await self.dispatch(InvalidationEvent(
+                    collection, ChangeOperation(event["op"]), event.get("id"), source=InvalidationMode.POLL.value
+                ))
+
+    async def _poll_loop(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.poll()
+            except Exception as e:
+                logger.error(f"Error polling invalidation versions: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode.value,
+            "active_mode": self.active_mode.value if self.active_mode else None,
+            "worker_id": self.worker_id,
+            "collections": {name: len(handlers) for name, handlers in self._handlers.items()},
+            "versions_seen": dict(self._versions) if self.active_mode == InvalidationMode.POLL else None,
+            **self.counters
+        }
@@ -0,0 +1,292 @@
+"""Background job runner for long-running syncs and imports.
+
+Jobs are persisted in the `jobs` collection and claimed atomically by a
+bounded pool of worker tasks, so a request only has to submit a job and
+return its id. Handlers report progress counters and save checkpoints as
+they go; jobs left running by a stopped process are requeued on startup
+and resume from their last checkpoint. A job whose worker keeps dying is
+failed once it has been claimed `max_attempts` times.
+"""
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+ACTIVE_STATUSES = [JobStatus.QUEUED.value, JobStatus.RUNNING.value]
+
+
+class JobCancelled(Exception):
+    """Raised inside a handler when its job has been cancelled"""
+
+
+class JobContext:
+    """Handle passed to job handlers for progress, checkpoints and cancellation"""
+
+    def __init__(self, runner: "JobRunner", job: Dict[str, Any]):
+        self.runner = runner
+        self.job_id = job["_id"]
+        self.params = job.get("params") or {}
+        self.checkpoint = job.get("checkpoint")
+        self.progress: Dict[str, Any] = dict(job.get("progress") or {})
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    async def update_progress(self, **counters):
+        """Record progress counters (absolute values) on the job document"""
+        self.progress.update(counters)
+        await self.runner.collection.update_one(
+            {"_id": self.job_id},
+            {"$set": {
+                **{f"progress.{name}": value for name, value in counters.items()},
+                "heartbeat_at": datetime.utcnow()
+            }}
+        )
+
+    async def save_checkpoint(self, checkpoint: Any):
+        """Persist the position a restarted job should resume from"""
+        self.checkpoint = checkpoint
+        await self.runner.collection.update_one(
+            {"_id": self.job_id},
+            {"$set": {"checkpoint": checkpoint, "heartbeat_at": datetime.utcnow()}}
+        )
+
+    async def check_cancelled(self):
+        """Raise JobCancelled if the job was cancelled here or by another worker"""
+        if not self._cancelled:
+            job = await self.runner.collection.find_one({"_id": self.job_id}, {"cancel_requested": 1})
+            self._cancelled = bool(job and job.get("cancel_requested"))
+        if self._cancelled:
+            raise JobCancelled()
+
+
+JobHandler = Callable[[JobContext], Awaitable[Optional[Dict[str, Any]]]]
+# Called with the job document once it is completed, failed or cancelled for good
+JobCleanup = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+class JobRunner:
+    """Bounded pool of workers executing persisted jobs"""
+
+    def __init__(self, collection, workers: int = 2, poll_interval: float = 2.0, stale_after: float = 60.0,
+                 max_attempts: int = 3):
+        self.collection = collection
+        self.workers = max(1, workers)
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.max_attempts = max(1, max_attempts)
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._handlers: Dict[str, JobHandler] = {}
+        self._cleanups: Dict[str, JobCleanup] = {}
+        self._running: Dict[str, JobContext] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+
+    def register(self, job_type: str, handler: JobHandler, cleanup: Optional[JobCleanup] = None):
+        """Run `handler` for jobs of this type and `cleanup` once such a job is finished for good"""
+        self._handlers[job_type] = handler
+        if cleanup is not None:
+            self._cleanups[job_type] = cleanup
+
+    @property
+    def job_types(self) -> List[str]:
+        return sorted(self._handlers)
+
+    @property
+    def running_count(self) -> int:
+        return len(self._running)
+
+    async def submit(self, job_type: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        if job_type not in self._handlers:
+            raise ValueError(f"Unknown job type: {job_type}")
+        now = datetime.utcnow()
+        job = {
+            "_id": str(uuid.uuid4()),
+            "type": job_type,
+            "params": params or {},
+            "status": JobStatus.QUEUED.value,
+            "progress": {},
+            "checkpoint": None,
+            "result": None,
+            "error": None,
+            "cancel_requested": False,
+            "attempts": 0,
+            "created_at": now,
+            "updated_at": now
+        }
+        await self.collection.insert_one(job)
+        self._wakeup.set()
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"_id": job_id})
+
+    async def list(self, status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        query = {"status": status} if status else {}
+        return await self.collection.find(query).sort("created_at", -1).limit(limit).to_list(length=limit)
+
+    async def queue_depth(self) -> int:
+        return await self.collection.count_documents({"status": JobStatus.QUEUED.value})
+
+    async def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Cancel a queued job outright, or ask a running one to stop at its next check"""
+        now = datetime.utcnow()
+        job = await self.collection.find_one_and_update(
+            {"_id": job_id, "status": JobStatus.QUEUED.value},
+            {"$set": {"status": JobStatus.CANCELLED.value, "cancel_requested": True,
+                      "finished_at": now, "updated_at": now}},
+            return_document=ReturnDocument.AFTER
+        )
+        if job:
+            await self._cleanup(job)
+            return job
+        job = await self.collection.find_one_and_update(
+            {"_id": job_id, "status": JobStatus.RUNNING.value},
+            {"$set": {"cancel_requested": True, "updated_at": now}},
+            return_document=ReturnDocument.AFTER
+        )
+        if job and job_id in self._running:
+            self._running[job_id].cancel()
+        return job or await self.get(job_id)
+
+    async def start(self):
+        """Requeue orphaned jobs and start the worker pool"""
+        if self._tasks:
+            return
+        # Assigned per process: the app may be imported before gunicorn forks its workers
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        await self.recover()
+        self._tasks = [asyncio.create_task(self._worker_loop()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """Stop the workers; interrupted jobs go back to the queue to resume later"""
+        for task in self._tasks:
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def recover(self):
+        """Requeue jobs whose worker stopped heartbeating, or fail them once out of attempts"""
+        stale_before = datetime.utcnow() - timedelta(seconds=self.stale_after)
+        stale = {"status": JobStatus.RUNNING.value, "heartbeat_at": {"$lt": stale_before}}
+        exhausted = await self.collection.find(
+            {**stale, "attempts": {"$gte": self.max_attempts}}, {"_id": 1}
+        ).to_list(length=100)
+        for job in exhausted:
+            now = datetime.utcnow()
+            job = await self.collection.find_one_and_update(
+                {"_id": job["_id"], **stale},
+                {"$set": {"status": JobStatus.FAILED.value, "worker": None,
+                          "error": f"Gave up after {self.max_attempts} interrupted attempts",
+                          "finished_at": now, "updated_at": now}},
+                return_document=ReturnDocument.AFTER
+            )
+            if job:
+                logger.error(f"Job {job['_id']} ({job['type']}) failed after {job['attempts']} attempts")
+                await self._cleanup(job)
+        result = await self.collection.update_many(
+            {**stale, "attempts": {"$lt": self.max_attempts}},
+            {"$set": {"status": JobStatus.QUEUED.value, "worker": None, "updated_at": datetime.utcnow()}}
+        )
+        if result.modified_count:
+            logger.info(f"Requeued {result.modified_count} interrupted jobs")
+
+    async def _cleanup(self, job: Dict[str, Any]):
+        cleanup = self._cleanups.get(job["type"])
+        if cleanup is None:
+            return
+        try:
+            await cleanup(job)
+        except Exception as e:
+            logger.error(f"Error cleaning up job {job['_id']} ({job['type']}): {str(e)}")
+
+    async def _claim(self) -> Optional[Dict[str, Any]]:
+        now = datetime.utcnow()
+        return await self.collection.find_one_and_update(
+            {"status": JobStatus.QUEUED.value, "type": {"$in": self.job_types}},
+            {"$set": {"status": JobStatus.RUNNING.value, "worker": self.worker_id,
+                      "started_at": now, "heartbeat_at": now, "updated_at": now},
+             "$inc": {"attempts": 1}},
+            sort=[("created_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def _worker_loop(self):
+        while True:
+            try:
+                job = await self._claim()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error claiming job: {str(e)}")
+                job = None
+            if job is None:
+                try:
+                    await self.recover()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Error recovering jobs: {str(e)}")
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+
+    async def _heartbeat(self, job_id: str):
+        interval = max(self.stale_after / 3, 1.0)
+        while True:
+            await asyncio.sleep(interval)
+            await self.collection.update_one({"_id": job_id}, {"$set": {"heartbeat_at": datetime.utcnow()}})
+
+    async def _run(self, job: Dict[str, Any]):
+        context = JobContext(self, job)
+        self._running[context.job_id] = context
+        heartbeat = asyncio.create_task(self._heartbeat(context.job_id))
+        update: Dict[str, Any]
+        try:
+            if job.get("cancel_requested"):
+                raise JobCancelled()
+            result = await self._handlers[job["type"]](context)
+            update = {"status": JobStatus.COMPLETED.value, "result": result}
+        except JobCancelled:
+            update = {"status": JobStatus.CANCELLED.value}
+        except asyncio.CancelledError:
+            # Worker shutdown: leave the job for the next process to resume
+            await self.collection.update_one(
+                {"_id": context.job_id},
+                {"$set": {"status": JobStatus.QUEUED.value, "worker": None, "updated_at": datetime.utcnow()}}
+            )
+            raise
+        except Exception as e:
+            logger.error(f"Job {context.job_id} ({job['type']}) failed: {str(e)}")
+            update = {"status": JobStatus.FAILED.value, "error": str(e)}
+        finally:
+            heartbeat.cancel()
+            self._running.pop(context.job_id, None)
+        now = datetime.utcnow()
+        await self.collection.update_one(
+            {"_id": context.job_id},
+            {"$set": {**update, "finished_at": now, "updated_at": now}}
+        )
+        await self._cleanup({**job, **update})
@@ -0,0 +1,155 @@
+"""Election of one process to run the background components.
+
+When the app runs in several worker processes (or containers) the job
+runner, the stats reconciler and the startup backfills must run only once.
+Every process competes for a lease document; the holder renews it every
+lease/3 seconds and runs the registered components, the others stand by.
+Components start in background tasks, so a slow one (the backfills) never
+holds up lease renewal or the process's readiness.
+If the holder stops or dies its lease is released or expires and another
+process takes over.
+"""
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+ComponentHook = Callable[[], Awaitable[Any]]
+
+
+class LeaderElection:
+    """Lease-based leader election with components started on election and stopped on demotion"""
+
+    def __init__(self, collection, name: str = "background", lease_seconds: float = 15.0):
+        self.collection = collection
+        self.name = name
+        self.lease_seconds = max(3.0, lease_seconds)
+        self.candidate_id: Optional[str] = None
+        self.is_leader = False
+        self._components: List[Tuple[str, ComponentHook, Optional[ComponentHook]]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._starting: Dict[str, asyncio.Task] = {}
+        self._lease_valid_until = 0.0
+        self.counters = {"elections": 0, "demotions": 0, "renew_errors": 0}
+
+    def register(self, name: str, start: ComponentHook, stop: Optional[ComponentHook] = None):
+        """Run `start` when this process becomes leader and `stop` when it loses the lease"""
+        self._components.append((name, start, stop))
+
+    async def _acquire(self) -> bool:
+        """Take or renew the lease; False when another live process holds it"""
+        now = datetime.utcnow()
+        try:
+            lease = await self.collection.find_one_and_update(
+                {"_id": self.name, "$or": [{"holder": self.candidate_id}, {"expires_at": {"$lt": now}}]},
+                {"$set": {"holder": self.candidate_id, "renewed_at": now,
+                          "expires_at": now + timedelta(seconds=self.lease_seconds)}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # The lease exists and is held by someone else
+            return False
+        return lease is not None and lease.get("holder") == self.candidate_id
+
+    async def _start_component(self, name: str, start: ComponentHook):
+        try:
+            await start()
+        except Exception as e:
+            logger.error(f"Error starting {name}: {str(e)}")
+        finally:
+            self._starting.pop(name, None)
+
+    async def _promote(self):
+        self.is_leader = True
+        self.counters["elections"] += 1
+        logger.info(f"{self.candidate_id} elected to run background components")
+        for name, start, _ in self._components:
+            self._starting[name] = asyncio.create_task(self._start_component(name, start))
+
+    async def _demote(self):
+        self.is_leader = False
+        self.counters["demotions"] += 1
+        # Interrupt components still starting; the backfills pick up where they stopped
+        starting = list(self._starting.values())
+        for task in starting:
+            task.cancel()
+        await asyncio.gather(*starting, return_exceptions=True)
+        for name, _, stop in reversed(self._components):
+            if stop is None:
+                continue
+            try:
+                await stop()
+            except Exception as e:
+                logger.error(f"Error stopping {name}: {str(e)}")
+
+    async def _step(self):
+        """One acquire/renew attempt, promoting or demoting this process as needed"""
+        try:
+            leader = await self._acquire()
+        except Exception as e:
+            self.counters["renew_errors"] += 1
+            logger.error(f"Error renewing leader lease: {str(e)}")
+            # Keep running until the lease could have passed to someone else
+            leader = self.is_leader and time.monotonic() < self._lease_valid_until
+        else:
+            if leader:
+                # Renewal margin: another process may take over once our last write expires
+                self._lease_valid_until = time.monotonic() + self.lease_seconds * 2 / 3
+        if leader and not self.is_leader:
+            await self._promote()
+        elif not leader and self.is_leader:
+            logger.warning(f"{self.candidate_id} lost the leader lease")
+            await self._demote()
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            await self._step()
+
+    async def start(self):
+        """Join the election; the first attempt is made before returning"""
+        if self._task is not None:
+            return
+        # Assigned per process: the app may be imported before gunicorn forks its workers
+        self.candidate_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        await self._step()
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        """Stop the components and hand the lease over right away"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self.is_leader:
+            await self._demote()
+            try:
+                await self.collection.update_one(
+                    {"_id": self.name, "holder": self.candidate_id},
+                    {"$set": {"expires_at": datetime.utcnow()}}
+                )
+            except Exception as e:
+                logger.error(f"Error releasing leader lease: {str(e)}")
+
+    async def stats(self) -> Dict[str, Any]:
+        lease = await self.collection.find_one({"_id": self.name})
+        return {
+            "candidate_id": self.candidate_id,
+            "is_leader": self.is_leader,
+            "holder": lease.get("holder") if lease else None,
+            "expires_at": lease.get("expires_at") if lease else None,
+            "lease_seconds": self.lease_seconds,
+            "components": [name for name, _, _ in self._components],
+            "starting": list(self._starting),
+            **self.counters
+        }
@@ -0,0 +1,416 @@
+"""Request and process metrics in the Prometheus text format.
+
+MetricsMiddleware times every HTTP request and labels it with the route
+template ("/api/listings/{listing_id}"), so the number of series stays
+bounded; requests that match no route share one label. MongoCommandMetrics
+is a pymongo command listener: it times every command and adds it to the
+request that issued it (Motor runs commands in threads with a copy of the
+request's context), giving per-route counts of MongoDB operations and the
+time spent in them. Cache and executor figures are read from the
+components when a scrape renders the registry.
+
+Recording is a few dictionary updates per request. With several gunicorn
+workers a scrape reaches only one of them, so when METRICS_DIR is set every
+worker writes its samples there every few seconds and the scraped worker
+merges all files: counters and histograms are summed (those of exited
+workers are kept, so totals never go back), gauges are summed over the
+live workers.
+"""
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MONGO_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+MONGO_OPERATION_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+UNMATCHED_ROUTE = "unmatched"
+
+Labels = Tuple[str, ...]
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Labels = (), amount: float = 1.0):
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self) -> List[List[Any]]:
+        with self._lock:
+            return [[list(labels), value] for labels, value in self.values.items()]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, labels: Labels = (), amount: float = 1.0):
+        self.inc(labels, -amount)
+
+    def set(self, labels: Labels, value: float):
+        with self._lock:
+            self.values[labels] = value
+
+
+class Histogram:
+    """Fixed buckets; per label set: one count per bucket (plus +Inf) and the sum"""
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.values: Dict[Labels, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Labels, value: float):
+        with self._lock:
+            entry = self.values.get(labels)
+            if entry is None:
+                entry = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            # Upper bounds are inclusive ("le")
+            entry[bisect_left(self.buckets, value)] += 1
+            entry[-1] += value
+
+    def samples(self) -> List[List[Any]]:
+        with self._lock:
+            return [[list(labels), list(entry)] for labels, entry in self.values.items()]
+
+
+class CallbackMetric:
+    """Counter or gauge whose values are read from a component when the registry is rendered"""
+
+    def __init__(self, name: str, kind: str, help: str, labelnames: Sequence[str],
+                 read: Callable[[], Dict[Labels, float]]):
+        self.name = name
+        self.kind = kind
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.read = read
+
+    def samples(self) -> List[List[Any]]:
+        try:
+            return [[list(labels), value] for labels, value in self.read().items()]
+        except Exception as e:
+            logger.error(f"Error reading metric {self.name}: {str(e)}")
+            return []
+
+
+class MetricsRegistry:
+    """Metric families of this process, optionally merged with the other workers' through `directory`"""
+
+    def __init__(self, directory: Optional[str] = None, flush_interval: float = 5.0):
+        self.directory = Path(directory) if directory else None
+        self.flush_interval = flush_interval
+        self._families: Dict[str, Any] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def _add(self, family):
+        if family.name in self._families:
+            raise ValueError(f"Metric {family.name} is already registered")
+        self._families[family.name] = family
+        return family
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._add(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str], buckets: Sequence[float]) -> Histogram:
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def callback(self, name: str, kind: str, help: str, labelnames: Sequence[str],
+                 read: Callable[[], Dict[Labels, float]]) -> CallbackMetric:
+        """Counter or gauge read from `read()` ({label values: value}) at every scrape"""
+        return self._add(CallbackMetric(name, kind, help, labelnames, read))
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """JSON-serializable samples of every family"""
+        return {
+            name: {
+                "kind": family.kind,
+                "help": family.help,
+                "labelnames": list(family.labelnames),
+                "buckets": list(family.buckets) if family.kind == "histogram" else None,
+                "samples": family.samples()
+            }
+            for name, family in self._families.items()
+        }
+
+    async def exposition(self) -> str:
+        """Prometheus text exposition of this process, or of all workers when a directory is set"""
+        snapshot = self.snapshot()
+        if self.directory is None:
+            return render([snapshot])
+        others = await asyncio.to_thread(self._collect_workers)
+        return render([snapshot, *others])
+
+    # Sharing between worker processes
+
+    def _worker_path(self) -> Path:
+        return self.directory / f"worker-{os.getpid()}.json"
+
+    def _write(self, snapshot: Dict[str, Dict[str, Any]]):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._worker_path()
+        temporary = path.with_suffix(".tmp")
+        temporary.write_text(json.dumps({"pid": os.getpid(), "families": snapshot}))
+        os.replace(temporary, path)
+
+    async def write_snapshot(self):
+        """Publish this worker's samples for the others to merge"""
+        # Sampled on the event loop: the callbacks read component state
+        snapshot = self.snapshot()
+        try:
+            await asyncio.to_thread(self._write, snapshot)
+        except Exception as e:
+            logger.error(f"Error writing metrics snapshot: {str(e)}")
+
+    def _collect_workers(self) -> List[Dict[str, Dict[str, Any]]]:
+        """Snapshots of the other live workers plus the folded totals of exited ones"""
+        if not self.directory.exists():
+            return []
+        with open(self.directory / ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            exited_path = self.directory / "exited.json"
+            exited = _read_json(exited_path) or {}
+            live = []
+            folded = False
+            for path in self.directory.glob("worker-*.json"):
+                data = _read_json(path)
+                if data is None or data["pid"] == os.getpid():
+                    continue
+                if _process_alive(data["pid"]):
+                    live.append(data["families"])
+                    continue
+                # Keep what an exited worker counted so totals stay monotonic
+                exited = merge([exited, data["families"]], include_gauges=False)
+                path.unlink(missing_ok=True)
+                folded = True
+            if folded:
+                exited_path.write_text(json.dumps(exited))
+        return [*live, exited]
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.write_snapshot()
+
+    async def start(self):
+        if self.directory is None or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        """Write the final samples so they are folded into the totals"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        await self.write_snapshot()
+
+
+def _read_json(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def merge(snapshots: Iterable[Dict[str, Dict[str, Any]]], include_gauges: bool = True) -> Dict[str, Dict[str, Any]]:
+    """Sum snapshots family by family and label set by label set"""
+    merged: Dict[str, Dict[str, Any]] = {}
+    for snapshot in snapshots:
+        for name, family in snapshot.items():
+            if family["kind"] == "gauge" and not include_gauges:
+                continue
+            target = merged.get(name)
+            if target is None:
+                target = merged[name] = {**family, "samples": []}
+                target["_index"] = {}
+            elif target["buckets"] != family["buckets"]:
+                continue
+            index = target["_index"]
+            for labels, value in family["samples"]:
+                key = tuple(labels)
+                if key not in index:
+                    index[key] = [labels, list(value) if isinstance(value, list) else value]
+                    target["samples"].append(index[key])
+                elif isinstance(value, list):
+                    index[key][1] = [a + b for a, b in zip(index[key][1], value)]
+                else:
+                    index[key][1] += value
+    for family in merged.values():
+        family.pop("_index")
+    return merged
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def render(snapshots: Iterable[Dict[str, Dict[str, Any]]]) -> str:
+    """Prometheus text format (version 0.0.4) of the summed snapshots"""
+    lines = []
+    for name, family in sorted(merge(snapshots).items()):
+        lines.append(f"# HELP {name} {family['help']}")
+        lines.append(f"# TYPE {name} {family['kind']}")
+        names = family["labelnames"]
+        for labels, value in family["samples"]:
+            if family["kind"] != "histogram":
+                lines.append(f"{name}{_format_labels(names, labels)} {_format_value(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip([*family["buckets"], "+Inf"], value[:-1]):
+                cumulative += count
+                le = bound if bound == "+Inf" else _format_value(float(bound))
+                bucket_labels = _format_labels(names, labels, f'le="{le}"')
+                lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(names, labels)} {_format_value(value[-1])}")
+            lines.append(f"{name}_count{_format_labels(names, labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+# MongoDB operations of the current request: [count, seconds]
+_request_mongo: ContextVar[Optional[List[float]]] = ContextVar("request_mongo", default=None)
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Times every MongoDB command, overall and for the request that issued it"""
+
+    def __init__(self, registry: MetricsRegistry):
+        self.duration = registry.histogram(
+            "mongodb_command_duration_seconds", "MongoDB command round trips by command",
+            ("command",), MONGO_LATENCY_BUCKETS
+        )
+        self.failures = registry.counter("mongodb_command_failures_total", "MongoDB commands that failed", ("command",))
+        self._lock = threading.Lock()
+
+    def _record(self, event, failed: bool):
+        seconds = event.duration_micros / 1_000_000
+        self.duration.observe((event.command_name,), seconds)
+        if failed:
+            self.failures.inc((event.command_name,))
+        current = _request_mongo.get()
+        if current is not None:
+            # Commands of one request may run on several executor threads
+            with self._lock:
+                current[0] += 1
+                current[1] += seconds
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._record(event, failed=False)
+
+    def failed(self, event):
+        self._record(event, failed=True)
+
+
+class HTTPMetrics:
+    """Families recorded by MetricsMiddleware"""
+
+    def __init__(self, registry: MetricsRegistry):
+        self.requests = registry.counter(
+            "http_requests_total", "HTTP requests by route and status", ("method", "route", "status")
+        )
+        self.duration = registry.histogram(
+            "http_request_duration_seconds", "Time to the end of the response body",
+            ("method", "route"), LATENCY_BUCKETS
+        )
+        self.in_flight = registry.gauge("http_requests_in_flight", "HTTP requests being served", ("method",))
+        self.mongo_operations = registry.histogram(
+            "http_request_mongodb_operations", "MongoDB commands issued per request",
+            ("route",), MONGO_OPERATION_BUCKETS
+        )
+        self.mongo_duration = registry.histogram(
+            "http_request_mongodb_seconds", "Time a request spent in MongoDB commands",
+            ("route",), LATENCY_BUCKETS
+        )
+
+    def observe(self, method: str, route: str, status: int, seconds: float, mongo: List[float]):
+        self.requests.inc((method, route, str(status)))
+        self.duration.observe((method, route), seconds)
+        self.mongo_operations.observe((route,), mongo[0])
+        self.mongo_duration.observe((route,), mongo[1])
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware, so streamed responses are timed to their last chunk without buffering"""
+
+    def __init__(self, app, metrics: HTTPMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        mongo = [0, 0.0]
+        token = _request_mongo.set(mongo)
+        self.metrics.in_flight.inc((method,))
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.metrics.in_flight.dec((method,))
+            _request_mongo.reset(token)
+            # The router stores the matched route in the scope
+            route = getattr(scope.get("route"), "path", None) or UNMATCHED_ROUTE
+            self.metrics.observe(method, route, status, elapsed, mongo)
@@ -0,0 +1,260 @@
+"""Transform phone details from the specifications API into phone_specs documents.
+
+The API only returns names, so realistic specs are picked by classifying
+the model name. The classification is data: ordered rule tables per phone
+family, where each rule lists groups of name fragments ("15", "pro max",
+...) and the first rule whose every group has a fragment in the name wins.
+Fragments are looked up through a first-character index built once at
+import (NameMatcher), rule conditions are frozensets, the numeric values of
+every spec profile are precomputed, and classification is memoized per
+(name, brand).
+"""
+import logging
+import uuid
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from spec_numbers import build_spec_numbers
+
+logger = logging.getLogger(__name__)
+
+# Pseudo-fragments for the price tier of a name, added by classify_name
+FLAGSHIP = "@flagship"
+BUDGET = "@budget"
+MIDRANGE = "@midrange"
+
+FLAGSHIP_FRAGMENTS = ("pro", "ultra", "max", "plus", "fold", "flip")
+# Single letters make nearly every name "budget"; kept as-is to preserve the catalog's specs
+BUDGET_FRAGMENTS = ("a", "lite", "mini", "se", "y", "c", "m")
+
+SAMSUNG_A_SERIES = ("a54", "a34", "a24", "a14", "a04")
+
+# Fragments the document builder looks at
+PRO_FRAGMENT = "pro"
+OLED_FRAGMENTS = ("pro", "ultra")
+RECENT_RELEASE_FRAGMENTS = ("15", "8", "s24")
+
+# Rules per family, first match wins. A rule is (conditions, specs) and matches
+# when each condition group shares at least one fragment with the name.
+APPLE_RULES = [
+    ((("15",), ("pro max",)), {"display_size": "6.7 inches", "camera_mp": "48 MP", "battery_mah": "4441 mAh", "storage_gb": "256", "ram_gb": "8", "processor": "Apple A17 Pro", "os": "iOS 17", "price_min": 180000, "price_max": 300000}),
+    ((("15",), ("pro",)), {"display_size": "6.1 inches", "camera_mp": "48 MP", "battery_mah": "3274 mAh", "storage_gb": "128", "ram_gb": "8", "processor": "Apple A17 Pro", "os": "iOS 17", "price_min": 150000, "price_max": 250000}),
+    ((("15",), ("plus",)), {"display_size": "6.7 inches", "camera_mp": "48 MP", "battery_mah": "4383 mAh", "storage_gb": "128", "ram_gb": "6", "processor": "Apple A16 Bionic", "os": "iOS 17", "price_min": 130000, "price_max": 190000}),
+    ((("15",),), {"display_size": "6.1 inches", "camera_mp": "48 MP", "battery_mah": "3349 mAh", "storage_gb": "128", "ram_gb": "6", "processor": "Apple A16 Bionic", "os": "iOS 17", "price_min": 120000, "price_max": 180000}),
+    ((("14",), ("pro max",)), {"display_size": "6.7 inches", "camera_mp": "48 MP", "battery_mah": "4323 mAh", "storage_gb": "128", "ram_gb": "6", "processor": "Apple A16 Bionic", "os": "iOS 16", "price_min": 140000, "price_max": 210000}),
+    ((("14",), ("pro",)), {"display_size": "6.1 inches", "camera_mp": "48 MP", "battery_mah": "3200 mAh", "storage_gb": "128", "ram_gb": "6", "processor": "Apple A16 Bionic", "os": "iOS 16", "price_min": 110000, "price_max": 170000}),
+    ((("14",), ("plus",)), {"display_size": "6.7 inches", "camera_mp": "12 MP", "battery_mah": "4325 mAh", "storage_gb": "128", "ram_gb": "6", "processor": "Apple A15 Bionic", "os": "iOS 16", "price_min": 100000, "price_max": 150000}),
+    ((("14",),), {"display_size": "6.1 inches", "camera_mp": "12 MP", "battery_mah": "3279 mAh", "storage_gb": "128", "ram_gb": "6", "processor": "Apple A15 Bionic", "os": "iOS 16", "price_min": 90000, "price_max": 140000}),
+    ((("se",),), {"display_size": "4.7 inches", "camera_mp": "12 MP", "battery_mah": "1821 mAh", "storage_gb": "64", "ram_gb": "3", "processor": "Apple A15 Bionic", "os": "iOS 15", "price_min": 60000, "price_max": 90000}),
+    ((("pro max",),), {"display_size": "6.7 inches", "camera_mp": "12 MP", "battery_mah": "4352 mAh", "storage_gb": "128", "ram_gb": "6", "processor": "Apple A15 Bionic", "os": "iOS 15", "price_min": 120000, "price_max": 180000}),
+    ((("pro",),), {"display_size": "6.1 inches", "camera_mp": "12 MP", "battery_mah": "3095 mAh", "storage_gb": "128", "ram_gb": "6", "processor": "Apple A15 Bionic", "os": "iOS 15", "price_min": 100000, "price_max": 150000}),
+    ((("mini",),), {"display_size": "5.4 inches", "camera_mp": "12 MP", "battery_mah": "2438 mAh", "storage_gb": "128", "ram_gb": "4", "processor": "Apple A15 Bionic", "os": "iOS 15", "price_min": 80000, "price_max": 120000}),
+    ((), {"display_size": "6.1 inches", "camera_mp": "12 MP", "battery_mah": "3240 mAh", "storage_gb": "128", "ram_gb": "4", "processor": "Apple A15 Bionic", "os": "iOS 15", "price_min": 85000, "price_max": 130000})
+]
+
+SAMSUNG_RULES = [
+    ((("s24",), ("ultra",)), {"display_size": "6.8 inches", "camera_mp": "200 MP", "battery_mah": "5000 mAh", "storage_gb": "256", "ram_gb": "12", "processor": "Snapdragon 8 Gen 3", "os": "Android 14", "price_min": 140000, "price_max": 220000}),
+    ((("s24",), ("plus",)), {"display_size": "6.7 inches", "camera_mp": "50 MP", "battery_mah": "4900 mAh", "storage_gb": "256", "ram_gb": "12", "processor": "Snapdragon 8 Gen 3", "os": "Android 14", "price_min": 110000, "price_max": 160000}),
+    ((("s24",),), {"display_size": "6.2 inches", "camera_mp": "50 MP", "battery_mah": "4000 mAh", "storage_gb": "128", "ram_gb": "8", "processor": "Snapdragon 8 Gen 3", "os": "Android 14", "price_min": 90000, "price_max": 140000}),
+    ((("s23",), ("ultra",)), {"display_size": "6.8 inches", "camera_mp": "200 MP", "battery_mah": "5000 mAh", "storage_gb": "256", "ram_gb": "12", "processor": "Snapdragon 8 Gen 2", "os": "Android 13", "price_min": 120000, "price_max": 180000}),
+    ((("s23",), ("plus",)), {"display_size": "6.6 inches", "camera_mp": "50 MP", "battery_mah": "4700 mAh", "storage_gb": "256", "ram_gb": "8", "processor": "Snapdragon 8 Gen 2", "os": "Android 13", "price_min": 95000, "price_max": 140000}),
+    ((("s23",),), {"display_size": "6.1 inches", "camera_mp": "50 MP", "battery_mah": "3900 mAh", "storage_gb": "128", "ram_gb": "8", "processor": "Snapdragon 8 Gen 2", "os": "Android 13", "price_min": 80000, "price_max": 120000}),
+    ((("fold",),), {"display_size": "7.6 inches", "camera_mp": "50 MP", "battery_mah": "4400 mAh", "storage_gb": "256", "ram_gb": "12", "processor": "Snapdragon 8 Gen 2", "os": "Android 13", "price_min": 200000, "price_max": 350000}),
+    ((("flip",),), {"display_size": "6.7 inches", "camera_mp": "12 MP", "battery_mah": "3700 mAh", "storage_gb": "256", "ram_gb": "8", "processor": "Snapdragon 8 Gen 2", "os": "Android 13", "price_min": 120000, "price_max": 180000}),
+    ((("note 20",), ("ultra",)), {"display_size": "6.9 inches", "camera_mp": "108 MP", "battery_mah": "4500 mAh", "storage_gb": "256", "ram_gb": "12", "processor": "Snapdragon 865+", "os": "Android 11", "price_min": 80000, "price_max": 120000}),
+    ((("note 20",),), {"display_size": "6.7 inches", "camera_mp": "64 MP", "battery_mah": "4300 mAh", "storage_gb": "128", "ram_gb": "8", "processor": "Snapdragon 865+", "os": "Android 11", "price_min": 70000, "price_max": 100000}),
+    ((SAMSUNG_A_SERIES, ("54",)), {"display_size": "6.4 inches", "camera_mp": "50 MP", "battery_mah": "5000 mAh", "storage_gb": "128", "ram_gb": "6", "processor": "Exynos 1380", "os": "Android 13", "price_min": 45000, "price_max": 65000}),
+    ((SAMSUNG_A_SERIES,), {"display_size": "6.5 inches", "camera_mp": "48 MP", "battery_mah": "5000 mAh", "storage_gb": "128", "ram_gb": "4", "processor": "Exynos 1280", "os": "Android 12", "price_min": 25000, "price_max": 45000}),
+    ((("m",),), {"display_size": "6.7 inches", "camera_mp": "108 MP", "battery_mah": "6000 mAh", "storage_gb": "128", "ram_gb": "8", "processor": "Exynos 1380", "os": "Android 13", "price_min": 35000, "price_max": 55000}),
+    ((), {"display_size": "6.4 inches", "camera_mp": "50 MP", "battery_mah": "4500 mAh", "storage_gb": "128", "ram_gb": "6", "processor": "Exynos 2200", "os": "Android 12", "price_min": 40000, "price_max": 70000})
+]
+
+GOOGLE_RULES = [
+    ((("8",), ("pro",)), {"display_size": "6.7 inches", "camera_mp": "50 MP", "battery_mah": "5050 mAh", "storage_gb": "128", "ram_gb": "12", "processor": "Google Tensor G3", "os": "Android 14", "price_min": 85000, "price_max": 130000}),
+    ((("8",),), {"display_size": "6.2 inches", "camera_mp": "50 MP", "battery_mah": "4575 mAh", "storage_gb": "128", "ram_gb": "8", "processor": "Google Tensor G3", "os": "Android 14", "price_min": 65000, "price_max": 95000}),
+    ((("7",), ("pro",)), {"display_size": "6.7 inches", "camera_mp": "50 MP", "battery_mah": "5003 mAh", "storage_gb": "128", "ram_gb": "12", "processor": "Google Tensor G2", "os": "Android 13", "price_min": 75000, "price_max": "115000"}),
+    ((("7",),), {"display_size": "6.3 inches", "camera_mp": "50 MP", "battery_mah": "4614 mAh", "storage_gb": "128", "ram_gb": "8", "processor": "Google Tensor G2", "os": "Android 13", "price_min": 55000, "price_max": 85000}),
+    ((("6a", "a"),), {"display_size": "6.1 inches", "camera_mp": "12.2 MP", "battery_mah": "4410 mAh", "storage_gb": "128", "ram_gb": "6", "processor": "Google Tensor", "os": "Android 12", "price_min": 35000, "price_max": 50000}),
+    ((), {"display_size": "6.0 inches", "camera_mp": "12.2 MP", "battery_mah": "4080 mAh", "storage_gb": "128", "ram_gb": "8", "processor": "Google Tensor G2", "os": "Android 13", "price_min": 60000, "price_max": 90000})
+]
+
+ONEPLUS_RULES = [
+    (((FLAGSHIP,),), {"display_size": "6.7 inches", "camera_mp": "50 MP", "battery_mah": "5400 mAh", "storage_gb": "256", "ram_gb": "12", "processor": "Snapdragon 8 Gen 3", "os": "Android 14", "price_min": 70000, "price_max": 120000}),
+    ((("nord", MIDRANGE),), {"display_size": "6.4 inches", "camera_mp": "50 MP", "battery_mah": "4500 mAh", "storage_gb": "128", "ram_gb": "8", "processor": "Snapdragon 7 Gen 3", "os": "Android 13", "price_min": 35000, "price_max": 55000}),
+    ((), {"display_size": "6.7 inches", "camera_mp": "48 MP", "battery_mah": "5000 mAh", "storage_gb": "128", "ram_gb": "8", "processor": "Snapdragon 8 Gen 2", "os": "Android 13", "price_min": 60000, "price_max": 90000})
+]
+
+XIAOMI_RULES = [
+    ((("14",), ("ultra",)), {"display_size": "6.73 inches", "camera_mp": "50 MP", "battery_mah": "4860 mAh", "storage_gb": "256", "ram_gb": "12", "processor": "Snapdragon 8 Gen 3", "os": "Android 14", "price_min": 80000, "price_max": 130000}),
+    ((("poco",), ("f",)), {"display_size": "6.67 inches", "camera_mp": "64 MP", "battery_mah": "5160 mAh", "storage_gb": "256", "ram_gb": "12", "processor": "Snapdragon 8 Gen 2", "os": "Android 13", "price_min": 50000, "price_max": 80000}),
+    ((("poco",),), {"display_size": "6.67 inches", "camera_mp": "48 MP", "battery_mah": "5100 mAh", "storage_gb": "128", "ram_gb": "8", "processor": "Snapdragon 7s Gen 2", "os": "Android 13", "price_min": 30000, "price_max": 50000}),
+    ((("redmi note",),), {"display_size": "6.67 inches", "camera_mp": "108 MP", "battery_mAh": "5000 mAh", "storage_gb": "128", "ram_gb": "6", "processor": "Snapdragon 685", "os": "Android 13", "price_min": 25000, "price_max": 40000}),
+    (((FLAGSHIP,),), {"display_size": "6.73 inches", "camera_mp": "50 MP", "battery_mah": "4600 mAh", "storage_gb": "256", "ram_gb": "12", "processor": "Snapdragon 8 Gen 2", "os": "Android 13", "price_min": 60000, "price_max": 100000}),
+    ((), {"display_size": "6.43 inches", "camera_mp": "48 MP", "battery_mah": "4500 mAh", "storage_gb": "128", "ram_gb": "6", "processor": "Snapdragon 695", "os": "Android 12", "price_min": 20000, "price_max": 35000})
+]
+
+DEFAULT_RULES = [
+    (((FLAGSHIP,),), {"display_size": "6.7 inches", "camera_mp": "50 MP", "battery_mah": "4500 mAh", "storage_gb": "256", "ram_gb": "8", "processor": "Snapdragon 8 Gen 2", "os": "Android 13", "price_min": 60000, "price_max": 120000}),
+    (((BUDGET,),), {"display_size": "6.5 inches", "camera_mp": "13 MP", "battery_mah": "4000 mAh", "storage_gb": "64", "ram_gb": "4", "processor": "Snapdragon 460", "os": "Android 11", "price_min": 15000, "price_max": 30000}),
+    ((), {"display_size": "6.4 inches", "camera_mp": "48 MP", "battery_mah": "4500 mAh", "storage_gb": "128", "ram_gb": "6", "processor": "Snapdragon 7 Gen 1", "os": "Android 12", "price_min": 30000, "price_max": 60000})
+]
+
+# Phone families in match order: (name fragments, brand name, rules); a family
+# applies when one of its fragments is in the name or the brand matches
+FAMILIES = [
+    (("iphone",), "apple", APPLE_RULES),
+    (("galaxy",), "samsung", SAMSUNG_RULES),
+    (("pixel",), "google", GOOGLE_RULES),
+    (("oneplus",), "oneplus", ONEPLUS_RULES),
+    (("xiaomi", "redmi", "poco"), "xiaomi", XIAOMI_RULES)
+]
+
+
+class NameMatcher:
+    """Finds which of a fixed set of fragments occur in a string
+
+    Fragments are indexed by their first character, so only those starting
+    with a character present in the string are checked.
+    """
+
+    def __init__(self, fragments: Iterable[str]):
+        by_first_char: Dict[str, List[str]] = {}
+        for fragment in sorted(set(fragments)):
+            by_first_char.setdefault(fragment[0], []).append(fragment)
+        self._by_first_char = {char: tuple(group) for char, group in by_first_char.items()}
+        self._first_chars = frozenset(self._by_first_char)
+
+    def find(self, text: str) -> FrozenSet[str]:
+        return frozenset([
+            fragment
+            for char in self._first_chars.intersection(text)
+            for fragment in self._by_first_char[char]
+            if fragment in text
+        ])
+
+
+# Document fields derived from the picked specs, used to precompute their numeric values
+SPEC_NUMBER_FIELDS = {
+    "display_size": "display_size", "camera_mp": "camera_mp", "battery_mah": "battery_mah",
+    "storage_gb": "storage_gb", "ram_gb": "ram_gb"
+}
+
+
+def _compile_rules(rules):
+    """(condition groups as frozensets, specs, numeric values of the specs) per rule"""
+    compiled = []
+    for conditions, specs in rules:
+        numbers = build_spec_numbers({field: specs.get(key) for field, key in SPEC_NUMBER_FIELDS.items()})
+        compiled.append((tuple(frozenset(group) for group in conditions), specs, numbers))
+    return compiled
+
+
+COMPILED_FAMILIES = [
+    (frozenset(fragments), family_brand, _compile_rules(rules)) for fragments, family_brand, rules in FAMILIES
+]
+COMPILED_DEFAULT_RULES = _compile_rules(DEFAULT_RULES)
+
+
+def _rule_fragments():
+    yield from FLAGSHIP_FRAGMENTS
+    yield from BUDGET_FRAGMENTS
+    yield PRO_FRAGMENT
+    yield from OLED_FRAGMENTS
+    yield from RECENT_RELEASE_FRAGMENTS
+    for family_fragments, _, _ in FAMILIES:
+        yield from family_fragments
+    for rules in [rules for _, _, rules in FAMILIES] + [DEFAULT_RULES]:
+        for conditions, _ in rules:
+            for group in conditions:
+                yield from (fragment for fragment in group if not fragment.startswith("@"))
+
+
+NAME_MATCHER = NameMatcher(_rule_fragments())
+
+
+def _first_match(rules, fragments: FrozenSet[str]) -> Tuple[Dict, Dict]:
+    for conditions, specs, numbers in rules:
+        if all(not fragments.isdisjoint(group) for group in conditions):
+            return specs, numbers
+    raise LookupError("Rule table has no fallback rule")
+
+
+@lru_cache(maxsize=8192)
+def classify_name(phone_lower: str, brand_lower: str) -> Tuple[Dict, Dict, FrozenSet[str]]:
+    """Specs and their numeric values for a lowercased model name and brand, plus the fragments in the name"""
+    found = NAME_MATCHER.find(phone_lower)
+    is_flagship = not found.isdisjoint(FLAGSHIP_FRAGMENTS)
+    is_budget = not found.isdisjoint(BUDGET_FRAGMENTS)
+    tiers = {FLAGSHIP} if is_flagship else set()
+    if is_budget:
+        tiers.add(BUDGET)
+    if not is_flagship and not is_budget:
+        tiers.add(MIDRANGE)
+    fragments = found | tiers
+
+    for family_fragments, family_brand, rules in COMPILED_FAMILIES:
+        if brand_lower == family_brand or not fragments.isdisjoint(family_fragments):
+            return (*_first_match(rules, fragments), found)
+    return (*_first_match(COMPILED_DEFAULT_RULES, fragments), found)
+
+
+def transform_api_phone_to_db_format(api_phone_data: Dict) -> Optional[Dict]:
+    """Transform phone data from API format to our database format with realistic specs"""
+    try:
+        # Extract basic information
+        phone_name = api_phone_data.get("DeviceName", "")
+        brand = api_phone_data.get("Brand", "")
+        
+        # Get realistic specs for this phone
+        specs, numbers, found = classify_name(phone_name.lower(), brand.lower())
+        is_pro = PRO_FRAGMENT in found
+        
+        # Create the database document with realistic specifications
+        db_document = {
+            "_id": str(uuid.uuid4()),
+            "brand": brand,
+            "model": phone_name,
+            
+            # Display specs with realistic values
+            "display_size": specs["display_size"],
+            "display_technology": "OLED" if not found.isdisjoint(OLED_FRAGMENTS) else "AMOLED",
+            
+            # Camera specs
+            "camera_mp": specs["camera_mp"],
+            "front_camera": "12 MP" if is_pro else "8 MP",
+            
+            # Battery and performance
+            "battery_mah": specs["battery_mah"],
+            "storage_gb": specs["storage_gb"],
+            "ram_gb": specs["ram_gb"],
+            "processor": specs["processor"],
+            "operating_system": specs["os"],
+            
+            # Pricing
+            "price_range_min": specs["price_min"],
+            "price_range_max": specs["price_max"],
+            
+            # Release info
+            "release_year": 2024 if not found.isdisjoint(RECENT_RELEASE_FRAGMENTS) else 2023,
+            
+            # Additional realistic specs
+            "dimensions": "159.9 x 76.7 x 8.25 mm",
+            "weight": "221 g" if is_pro else "194 g",
+            "sim": "Nano-SIM and eSIM",
+            "network_5g": "Yes" if specs["price_min"] > 40000 else "No",
+            "charging": "Fast charging" if specs["price_min"] > 30000 else "Standard charging",
+            
+            # Metadata
+            "created_at": datetime.utcnow(),
+            "updated_at": datetime.utcnow(),
+            "source": "phone_specs_api",
+            "api_device_name": api_phone_data.get("DeviceName", "")
+        }
+        db_document["numeric"] = dict(numbers)
+        
+        return db_document
+        
+    except Exception as e:
+        logger.error(f"Error transforming API phone data: {str(e)}")
+        return None
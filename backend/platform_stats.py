@@ -0,0 +1,229 @@
+"""Materialized platform statistics.
+
+The homepage, admin dashboard and sync status screens read one document in
+the `platform_stats` collection instead of counting and grouping the
+listings, users and phone_specs collections on every load. Write paths
+apply $inc deltas to that document as they change data, and a periodic
+reconciliation recomputes everything from scratch to correct any drift
+(writes that bypass the deltas, crashes between a write and its delta).
+Reconciliation corrects the counters with $inc too, measured against the
+document right after each count, so deltas applied while it runs are kept.
+"""
+import asyncio
+import logging
+import re
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+STATS_DOCUMENT_ID = "platform"
+API_SOURCE = "phone_specs_api"
+
+# Counter fields kept on the stats document
+COUNTER_FIELDS = (
+    "total_listings", "active_listings", "active_accessories",
+    "total_users", "active_users", "pending_approvals",
+    "phone_models", "api_phones", "manual_phones"
+)
+
+
+def count_key(value: Any) -> str:
+    """Map a brand or city to a field name usable in the brands/cities maps"""
+    return re.sub(r"[.$]", "_", str(value or "Unknown"))
+
+
+def listing_counters(listing: Optional[Dict[str, Any]], accessory: bool = False) -> Dict[str, int]:
+    """Counter contributions of one listing (or accessory) document"""
+    if not listing:
+        return {}
+    active = 1 if listing.get("is_active", True) else 0
+    if accessory:
+        return {"active_accessories": active}
+    return {
+        "total_listings": 1,
+        "active_listings": active,
+        f"brands.{count_key(listing.get('brand'))}": active,
+        f"cities.{count_key(listing.get('city'))}": active
+    }
+
+
+def user_counters(user: Optional[Dict[str, Any]]) -> Dict[str, int]:
+    """Counter contributions of one user document"""
+    if not user:
+        return {}
+    return {
+        "total_users": 1,
+        "active_users": 1 if user.get("is_active", True) else 0,
+        "pending_approvals": 1 if (user.get("role") == "shop_owner"
+                                   and user.get("verification_status", "pending") == "pending") else 0
+    }
+
+
+def spec_counters(spec: Optional[Dict[str, Any]]) -> Dict[str, int]:
+    """Counter contributions of one phone_specs document"""
+    if not spec:
+        return {}
+    from_api = spec.get("source") == API_SOURCE
+    return {
+        "phone_models": 1,
+        "api_phones": 1 if from_api else 0,
+        "manual_phones": 0 if from_api else 1
+    }
+
+
+def counter_delta(before: Dict[str, int], after: Dict[str, int]) -> Dict[str, int]:
+    """Difference between two counter contributions, without zero entries"""
+    delta = {}
+    for key in set(before) | set(after):
+        change = after.get(key, 0) - before.get(key, 0)
+        if change:
+            delta[key] = change
+    return delta
+
+
+def stored_count(stats: Dict[str, Any], field: str) -> int:
+    """Value of a counter field (dotted for the brands/cities maps) on the stats document"""
+    value: Any = stats
+    for part in field.split("."):
+        value = value.get(part) if isinstance(value, dict) else None
+    return value or 0
+
+
+def top_counts(counts: Optional[Dict[str, int]], limit: int) -> List[Dict[str, Any]]:
+    ranked = sorted(((name, count) for name, count in (counts or {}).items() if count > 0),
+                    key=lambda item: item[1], reverse=True)
+    return [{"name": name, "count": count} for name, count in ranked[:limit]]
+
+
+class PlatformStats:
+    """Incrementally maintained stats document with periodic reconciliation"""
+
+    def __init__(self, db, reconcile_interval: float = 600.0):
+        self.db = db
+        self.reconcile_interval = reconcile_interval
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def collection(self):
+        return self.db.platform_stats
+
+    async def apply(self, delta: Dict[str, int], **fields):
+        """Add counter deltas (and set any extra fields) on the stats document"""
+        if not delta and not fields:
+            return
+        update: Dict[str, Any] = {"$set": {**fields, "updated_at": datetime.utcnow()}}
+        if delta:
+            update["$inc"] = delta
+        try:
+            await self.collection.update_one({"_id": STATS_DOCUMENT_ID}, update, upsert=True)
+        except Exception as e:
+            # Reconciliation will correct the counters
+            logger.error(f"Error updating platform stats: {str(e)}")
+
+    async def read(self) -> Dict[str, Any]:
+        stats = await self.collection.find_one({"_id": STATS_DOCUMENT_ID})
+        if stats is None or "reconciled_at" not in stats:
+            stats = await self.reconcile()
+        return stats
+
+    async def _measure(self, corrections: Dict[str, int], counts: Dict[str, int], maps: Iterable[str] = ()):
+        """Add the $inc corrections that bring the stored counters to freshly counted values
+
+        Read right after counting: deltas applied from here on are already in
+        the stored value and survive the correction.
+        """
+        stored = await self.collection.find_one({"_id": STATS_DOCUMENT_ID}) or {}
+        # Map entries that no longer have active listings go back to zero
+        for name in maps:
+            for key in stored.get(name) or {}:
+                counts.setdefault(f"{name}.{key}", 0)
+        for field, count in counts.items():
+            change = count - stored_count(stored, field)
+            # Counters are always written, so they exist even on a fresh document
+            if change or field in COUNTER_FIELDS:
+                corrections[field] = change
+
+    async def reconcile(self) -> Dict[str, Any]:
+        """Recompute every statistic from the source collections"""
+        db = self.db
+        started = await self.collection.find_one({"_id": STATS_DOCUMENT_ID}, {"reconciled_at": 1}) or {}
+        corrections: Dict[str, int] = {}
+        brands = await db.phone_listings.aggregate([
+            {"$match": {"is_active": True}},
+            {"$group": {"_id": "$brand", "count": {"$sum": 1}}}
+        ]).to_list(length=None)
+        await self._measure(corrections, {f"brands.{count_key(item['_id'])}": item["count"] for item in brands},
+                            maps=["brands"])
+        cities = await db.phone_listings.aggregate([
+            {"$match": {"is_active": True}},
+            {"$group": {"_id": "$city", "count": {"$sum": 1}}}
+        ]).to_list(length=None)
+        await self._measure(corrections, {f"cities.{count_key(item['_id'])}": item["count"] for item in cities},
+                            maps=["cities"])
+        api_phones = await db.phone_specs.count_documents({"source": API_SOURCE})
+        phone_models = await db.phone_specs.count_documents({})
+        await self._measure(corrections, {
+            "phone_models": phone_models,
+            "api_phones": api_phones,
+            "manual_phones": phone_models - api_phones
+        })
+        await self._measure(corrections, {
+            "total_listings": await db.phone_listings.count_documents({}),
+            "active_listings": await db.phone_listings.count_documents({"is_active": True})
+        })
+        await self._measure(corrections, {
+            "active_accessories": await db.accessories.count_documents({"is_active": True})
+        })
+        await self._measure(corrections, {
+            "total_users": await db.users.count_documents({}),
+            "active_users": await db.users.count_documents({"is_active": True}),
+            "pending_approvals": await db.users.count_documents({
+                "role": "shop_owner",
+                "verification_status": "pending"
+            })
+        })
+        latest_sync = await db.phone_specs.find_one(
+            {"source": API_SOURCE}, {"updated_at": 1, "created_at": 1}, sort=[("updated_at", -1)]
+        )
+        # Delta syncs leave unchanged phones untouched, so the watermarks know the latest run
+        latest_watermark = await db.sync_watermarks.find_one({}, {"synced_at": 1}, sort=[("synced_at", -1)])
+        last_sync = (latest_sync.get("updated_at") or latest_sync.get("created_at")) if latest_sync else None
+        if latest_watermark and latest_watermark.get("synced_at"):
+            last_sync = max(filter(None, [last_sync, latest_watermark["synced_at"]]))
+        now = datetime.utcnow()
+        update: Dict[str, Any] = {"$set": {"last_sync": last_sync, "reconciled_at": now, "updated_at": now}}
+        if corrections:
+            update["$inc"] = corrections
+        try:
+            # Only if no other process reconciled meanwhile: its corrections already cover the same drift
+            stats = await self.collection.find_one_and_update(
+                {"_id": STATS_DOCUMENT_ID, "reconciled_at": started.get("reconciled_at")},
+                update,
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            stats = None
+        return stats or await self.collection.find_one({"_id": STATS_DOCUMENT_ID})
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._reconcile_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _reconcile_loop(self):
+        while True:
+            try:
+                await self.reconcile()
+            except Exception as e:
+                logger.error(f"Error reconciling platform stats: {str(e)}")
+            await asyncio.sleep(self.reconcile_interval)
@@ -0,0 +1,248 @@
+"""In-process full-text search index over phone listings.
+
+Listings are tokenized over brand, model, description, features, processor
+and operating_system into an inverted index that is scored with BM25 and
+per-field weights. Query terms that are not in the vocabulary are expanded
+to close spellings through a symmetric-delete table, so typos such as
+"iphne" or "samung" still find their listings without a scan.
+"""
+import bisect
+import math
+import re
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# Relative weight of a token depending on the field it was found in
+SEARCH_FIELD_WEIGHTS = {
+    "brand": 3.0,
+    "model": 3.0,
+    "features": 1.5,
+    "processor": 1.5,
+    "operating_system": 1.0,
+    "description": 1.0
+}
+
+# Score multipliers for query terms that were matched loosely
+PREFIX_MATCH_WEIGHT = 0.7
+FUZZY_MATCH_WEIGHTS = {1: 0.6, 2: 0.35}
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: Any) -> List[str]:
+    """Split text into lowercase alphanumeric tokens"""
+    if not text:
+        return []
+    if isinstance(text, (list, tuple)):
+        tokens = []
+        for item in text:
+            tokens.extend(tokenize(item))
+        return tokens
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+
+def max_edit_distance(term: str) -> int:
+    """Typo budget for a term; model numbers and short words must match exactly"""
+    if any(char.isdigit() for char in term) or len(term) < 4:
+        return 0
+    if len(term) == 4:
+        return 1
+    return 2
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Damerau-Levenshtein (optimal string alignment) distance, capped at limit + 1"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous_previous = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = current[0]
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (previous_previous is not None and i > 1 and j > 1
+                    and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+            row_min = min(row_min, current[j])
+        if row_min > limit:
+            return limit + 1
+        previous_previous, previous = previous, current
+    return previous[len(b)]
+
+
+def deletion_variants(term: str, distance: int) -> Set[str]:
+    """All strings reachable from term by deleting up to `distance` characters"""
+    variants = {term}
+    frontier = {term}
+    for _ in range(distance):
+        next_frontier = set()
+        for word in frontier:
+            for i in range(len(word)):
+                next_frontier.add(word[:i] + word[i + 1:])
+        variants |= next_frontier
+        frontier = next_frontier
+    return variants
+
+
+class ListingSearchIndex:
+    """Inverted index with BM25 ranking and typo-tolerant term expansion"""
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[str, float]] = defaultdict(dict)
+        self._doc_terms: Dict[str, Dict[str, float]] = {}
+        self._doc_lengths: Dict[str, float] = {}
+        self._doc_ids: Dict[str, Any] = {}
+        self._deletes: Dict[str, Set[str]] = defaultdict(set)
+        self._vocabulary: List[str] = []
+        self._vocabulary_dirty = False
+        self._total_length = 0.0
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def clear(self):
+        self.__init__()
+
+    def add(self, listing: Dict[str, Any]):
+        """Index (or re-index) a listing document"""
+        key = str(listing["_id"])
+        if key in self._doc_terms:
+            self.remove(key)
+
+        term_weights: Dict[str, float] = defaultdict(float)
+        for field, weight in SEARCH_FIELD_WEIGHTS.items():
+            for token in tokenize(listing.get(field)):
+                term_weights[token] += weight
+        if not term_weights:
+            return
+
+        length = sum(term_weights.values())
+        self._doc_terms[key] = dict(term_weights)
+        self._doc_lengths[key] = length
+        self._doc_ids[key] = listing["_id"]
+        self._total_length += length
+        for term, weight in term_weights.items():
+            if term not in self._postings:
+                self._add_to_vocabulary(term)
+            self._postings[term][key] = weight
+
+    def add_many(self, listings: Iterable[Dict[str, Any]]):
+        for listing in listings:
+            self.add(listing)
+
+    def remove(self, listing_id: Any):
+        """Drop a listing from the index"""
+        key = str(listing_id)
+        term_weights = self._doc_terms.pop(key, None)
+        if term_weights is None:
+            return
+        self._total_length -= self._doc_lengths.pop(key, 0.0)
+        self._doc_ids.pop(key, None)
+        for term in term_weights:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(key, None)
+            if not postings:
+                del self._postings[term]
+                self._remove_from_vocabulary(term)
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[Tuple[Any, float]]:
+        """Return (listing _id, score) pairs for listings matching every query term, best first"""
+        terms = tokenize(query)
+        if not terms or not self._doc_terms:
+            return []
+
+        scores: Optional[Dict[str, float]] = None
+        for position, term in enumerate(terms):
+            allow_prefix = position == len(terms) - 1
+            term_scores = self._score_term(term, allow_prefix)
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {key: score + term_scores[key] for key, score in scores.items() if key in term_scores}
+            if not scores:
+                return []
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [(self._doc_ids[key], score) for key, score in ranked]
+
+    def _score_term(self, term: str, allow_prefix: bool) -> Dict[str, float]:
+        scores: Dict[str, float] = defaultdict(float)
+        for candidate, weight in self._expand(term, allow_prefix).items():
+            postings = self._postings[candidate]
+            idf = self._idf(len(postings))
+            for key, tf in postings.items():
+                score = weight * idf * self._bm25_tf(tf, self._doc_lengths[key])
+                if score > scores[key]:
+                    scores[key] = score
+        return scores
+
+    def _expand(self, term: str, allow_prefix: bool) -> Dict[str, float]:
+        """Map a query term to vocabulary terms with a match-quality weight"""
+        candidates: Dict[str, float] = {}
+        if term in self._postings:
+            candidates[term] = 1.0
+
+        if allow_prefix and len(term) >= 2:
+            vocabulary = self._sorted_vocabulary()
+            start = bisect.bisect_left(vocabulary, term)
+            for candidate in vocabulary[start:]:
+                if not candidate.startswith(term):
+                    break
+                candidates.setdefault(candidate, PREFIX_MATCH_WEIGHT)
+
+        distance_limit = max_edit_distance(term)
+        if distance_limit and not candidates:
+            # Only the closest spellings are kept so a near miss is not drowned out by looser ones
+            fuzzy: Dict[int, List[str]] = defaultdict(list)
+            seen: Set[str] = set()
+            for variant in deletion_variants(term, distance_limit):
+                for candidate in self._deletes.get(variant, ()):
+                    if candidate in seen:
+                        continue
+                    seen.add(candidate)
+                    distance = edit_distance(term, candidate, distance_limit)
+                    if 0 < distance <= min(distance_limit, max_edit_distance(candidate)):
+                        fuzzy[distance].append(candidate)
+            if fuzzy:
+                closest = min(fuzzy)
+                for candidate in fuzzy[closest]:
+                    candidates[candidate] = FUZZY_MATCH_WEIGHTS[closest]
+        return candidates
+
+    def _idf(self, document_frequency: int) -> float:
+        total = len(self._doc_terms)
+        return math.log(1 + (total - document_frequency + 0.5) / (document_frequency + 0.5))
+
+    def _bm25_tf(self, tf: float, length: float) -> float:
+        average_length = self._total_length / len(self._doc_terms) if self._doc_terms else 1.0
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * length / (average_length or 1.0))
+        return tf * (BM25_K1 + 1) / (tf + norm)
+
+    def _add_to_vocabulary(self, term: str):
+        self._vocabulary_dirty = True
+        for variant in deletion_variants(term, max_edit_distance(term)):
+            self._deletes[variant].add(term)
+
+    def _remove_from_vocabulary(self, term: str):
+        self._vocabulary_dirty = True
+        for variant in deletion_variants(term, max_edit_distance(term)):
+            bucket = self._deletes.get(variant)
+            if bucket is not None:
+                bucket.discard(term)
+                if not bucket:
+                    del self._deletes[variant]
+
+    def _sorted_vocabulary(self) -> List[str]:
+        if self._vocabulary_dirty:
+            self._vocabulary = sorted(self._postings)
+            self._vocabulary_dirty = False
+        return self._vocabulary
@@ -1,5 +1,6 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, UploadFile, File, Form
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Query, status, UploadFile, File, Form, Request, Response, BackgroundTasks
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.responses import JSONResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
@@ -7,20 +8,44 @@ import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, EmailStr
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Union
 import uuid
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-from bson import ObjectId
+from bson import ObjectId, json_util
 import jwt
-import bcrypt
 from enum import Enum
 import base64
 import csv
 import io
 import requests
 import asyncio
-import aiohttp
-from concurrent.futures import ThreadPoolExecutor
+import re
+from urllib.parse import quote
+from pymongo import UpdateOne, ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from search_index import ListingSearchIndex, SEARCH_FIELD_WEIGHTS
+from blob_store import BlobRef, LocalBlobStore, CHUNK_SIZE
+from catalog_sync import FINGERPRINT_FIELD, CatalogSyncPipeline
+from phone_transform import transform_api_phone_to_db_format
+from jobs import ACTIVE_STATUSES, JobRunner, JobContext
+from spec_import import excel_supported, import_format, iter_row_chunks
+from password_hasher import PasswordHasher, PasswordHasherBusy
+from cache import TTLCache
+from view_counter import ViewCounter
+from compare_catalog import CompareCatalog
+from spec_catalog import SpecCatalog
+from spec_numbers import NUMERIC_FIELDS, build_listing_numbers, build_numeric_range_filter, build_spec_numbers
+from platform_stats import PlatformStats, counter_delta, listing_counters, spec_counters, top_counts, user_counters
+from fast_json import FastJSONResponse, model_list_response
+from api_cache import ResponseCache
+from upstream_client import CircuitBreaker, CircuitOpenError, UpstreamClient, UpstreamError
+from invalidation import ChangeOperation, InvalidationBus, InvalidationEvent
+from leader import LeaderElection
+from health import Readiness
+from indexes import index_report, reconcile_indexes
+from metrics import CONTENT_TYPE, HTTPMetrics, MetricsMiddleware, MetricsRegistry, MongoCommandMetrics
+from slow_commands import SlowCommandLog
 
 # Configure logging first
 logging.basicConfig(
@@ -37,16 +62,67 @@ JWT_SECRET = os.environ.get('JWT_SECRET', 'your-secret-key-change-in-production'
 JWT_ALGORITHM = "HS256"
 JWT_EXPIRATION_HOURS = 24
 
+# Authenticated principals are cached briefly so authenticated requests (and /auth/me) skip the users lookup
+USER_PRINCIPAL_FIELDS = {
+    "name": 1, "email": 1, "phone": 1, "role": 1, "is_active": 1, "verification_status": 1,
+    "business_details": 1, "created_at": 1
+}
+user_principal_cache = TTLCache(
+    max_size=int(os.environ.get('USER_CACHE_SIZE', '10000')),
+    ttl=float(os.environ.get('USER_CACHE_TTL_SECONDS', '60'))
+)
+
+# Password hashing runs on a bounded executor; changing BCRYPT_ROUNDS rehashes passwords at login
+password_hasher = PasswordHasher(
+    rounds=int(os.environ.get('BCRYPT_ROUNDS', '12')),
+    workers=int(os.environ.get('PASSWORD_HASH_WORKERS', '0')) or None,
+    max_pending=int(os.environ.get('PASSWORD_HASH_MAX_PENDING', '0')) or None
+)
+
+# Prometheus metrics served at /api/metrics; with METRICS_DIR set the gunicorn workers' samples are merged
+metrics_registry = MetricsRegistry(
+    directory=os.environ.get('METRICS_DIR') or None,
+    flush_interval=float(os.environ.get('METRICS_FLUSH_SECONDS', '5'))
+)
+http_metrics = HTTPMetrics(metrics_registry)
+mongo_metrics = MongoCommandMetrics(metrics_registry)
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Commands slower than SLOW_COMMAND_MS are kept with their query shape and plan (/api/admin/slow-commands)
+slow_command_log = SlowCommandLog(
+    threshold_ms=float(os.environ.get('SLOW_COMMAND_MS', '100')),
+    buffer_size=int(os.environ.get('SLOW_COMMAND_BUFFER_SIZE', '200')),
+    explain=os.environ.get('SLOW_COMMAND_EXPLAIN', 'true').lower() == 'true'
+)
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+# connect=False: no monitor threads until first use, so the app can be imported before workers fork
+client = AsyncIOMotorClient(mongo_url, connect=False, event_listeners=[mongo_metrics, slow_command_log])
 db = client[os.environ['DB_NAME']]
 
+# Blob storage for listing photos and KYC documents
+blob_store = LocalBlobStore(os.environ.get('BLOB_STORAGE_DIR', str(ROOT_DIR / 'blob_storage')))
+BLOB_URL_PREFIX = "/api/blobs/"
+PRIVATE_BLOB_URL_PREFIX = "/api/admin/blobs/"
+# Client uploads: size cap and accepted types; only images are shown inline, anything else downloads
+MAX_UPLOAD_BYTES = int(os.environ.get('MAX_UPLOAD_BYTES', str(10 * 1024 * 1024)))
+# Phone spec spreadsheets for bulk import are kept only until their import job finishes
+MAX_IMPORT_BYTES = int(os.environ.get('MAX_IMPORT_BYTES', str(50 * 1024 * 1024)))
+UPLOAD_CONTENT_TYPES = {"image/jpeg", "image/png", "image/webp", "image/gif", "application/pdf"}
+INLINE_CONTENT_TYPES = {"image/jpeg", "image/png", "image/webp", "image/gif"}
+
 # Security
 security = HTTPBearer()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await start_services()
+    yield
+    await stop_services()
+
 # Create the main app without a prefix
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -57,6 +133,62 @@ def serialize_doc(doc):
         doc["_id"] = str(doc["_id"])
     return doc
 
+# Blob helpers
+def blob_url(ref: BlobRef) -> str:
+    """URL a document stores in place of the blob's content"""
+    return f"{PRIVATE_BLOB_URL_PREFIX if ref.private else BLOB_URL_PREFIX}{ref.sha256}"
+
+def blob_id(url: str) -> Optional[str]:
+    """sha256 of a blob URL (public or private), or None for other values"""
+    for prefix in (BLOB_URL_PREFIX, PRIVATE_BLOB_URL_PREFIX):
+        if isinstance(url, str) and url.startswith(prefix):
+            return url[len(prefix):]
+    return None
+
+def check_upload_type(content_type: Optional[str]) -> str:
+    """Normalized content type of a client upload; 400 unless it is an accepted image or PDF"""
+    normalized = (content_type or "").split(";", 1)[0].strip().lower()
+    if normalized not in UPLOAD_CONTENT_TYPES:
+        raise HTTPException(status_code=400, detail="Only JPEG, PNG, WebP, GIF images and PDF files are accepted")
+    return normalized
+
+async def store_upload(upload: UploadFile, private: bool = False, check_type: bool = True,
+                       max_bytes: Optional[int] = None) -> str:
+    """Stream an uploaded file into the blob store and return its URL
+
+    Uploads must be at most `max_bytes` (MAX_UPLOAD_BYTES by default; 413 past that) and,
+    when `check_type`, an accepted type.
+    """
+    if max_bytes is None:
+        max_bytes = MAX_UPLOAD_BYTES
+    content_type = check_upload_type(upload.content_type) if check_type else upload.content_type
+    async def chunks():
+        size = 0
+        while True:
+            chunk = await upload.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise HTTPException(status_code=413, detail="File is too large")
+            yield chunk
+    ref = await blob_store.put_stream(chunks(), content_type, private=private)
+    return blob_url(ref)
+
+async def store_data_uri(value: str, private: bool = False, checked: bool = True) -> str:
+    """Move an inline base64 data URI into the blob store; other values pass through"""
+    if not isinstance(value, str) or not value.startswith("data:") or ";base64," not in value:
+        return value
+    header, encoded = value.split(",", 1)
+    content_type = header[len("data:"):].split(";", 1)[0] or None
+    if checked:
+        content_type = check_upload_type(content_type)
+        # base64 carries 3 bytes per 4 characters
+        if len(encoded) * 3 // 4 > MAX_UPLOAD_BYTES:
+            raise HTTPException(status_code=413, detail="File is too large")
+    ref = await blob_store.put_bytes(base64.b64decode(encoded), content_type, private=private)
+    return blob_url(ref)
+
 # Enums
 class UserRole(str, Enum):
     NORMAL_USER = "normal_user"
@@ -77,14 +209,24 @@ class BusinessType(str, Enum):
     ONLINE_RETAILER = "online_retailer"
 
 # Auth Helper Functions
-def hash_password(password: str) -> str:
-    """Hash password using bcrypt"""
-    salt = bcrypt.gensalt()
-    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+async def hash_password(password: str) -> str:
+    """Hash password using bcrypt on the password executor"""
+    return await password_hasher.hash(password)
 
-def verify_password(password: str, hashed: str) -> bool:
-    """Verify password against hash"""
-    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+async def verify_password(password: str, hashed: str) -> bool:
+    """Verify password against hash on the password executor"""
+    return await password_hasher.verify(password, hashed)
+
+async def rehash_password(user_id: ObjectId, password: str, old_hash: str):
+    """Re-hash a password after login when BCRYPT_ROUNDS has changed"""
+    try:
+        new_hash = await password_hasher.hash(password)
+        # Only replace the hash that was verified, in case the password changed meanwhile
+        await db.users.update_one({"_id": user_id, "password": old_hash}, {"$set": {"password": new_hash}})
+    except PasswordHasherBusy:
+        pass  # Try again on a later login
+    except Exception as e:
+        logger.error(f"Error rehashing password: {str(e)}")
 
 def create_access_token(data: dict):
     """Create JWT access token"""
@@ -95,18 +237,25 @@ def create_access_token(data: dict):
     return encoded_jwt
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    """Get current user from JWT token"""
+    """Get the current user's principal (profile, role and status; no KYC documents) from the JWT token"""
     try:
         payload = jwt.decode(credentials.credentials, JWT_SECRET, algorithms=[JWT_ALGORITHM])
         user_id: str = payload.get("sub")
         if user_id is None:
             raise HTTPException(status_code=401, detail="Invalid authentication credentials")
         
-        user = await db.users.find_one({"_id": ObjectId(user_id)})
-        if user is None:
-            raise HTTPException(status_code=401, detail="User not found")
+        principal = user_principal_cache.get(user_id)
+        if principal is None:
+            # Only the fields authorization needs; never the password hash or KYC documents
+            principal = await db.users.find_one({"_id": ObjectId(user_id)}, USER_PRINCIPAL_FIELDS)
+            if principal is None:
+                raise HTTPException(status_code=401, detail="User not found")
+            principal = serialize_doc(principal)
+            user_principal_cache.set(user_id, principal)
         
-        return serialize_doc(user)
+        return dict(principal)
+    except HTTPException:
+        raise
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token has expired")
     except jwt.InvalidTokenError:
@@ -342,6 +491,9 @@ class PhoneSpec(BaseModel):
     price_range_max: Optional[int] = None
     release_year: Optional[int] = None
     
+    # Parsed numeric values (ram_gb, storage_gb, battery_mah, display_inches, camera_mp)
+    numeric: Dict[str, Union[int, float]] = {}
+    
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     
@@ -356,6 +508,8 @@ class CSVUploadResponse(BaseModel):
     failed_imports: int
     errors: List[str] = []
     imported_specs: List[str] = []  # List of "Brand Model" names that were imported
+    status: str = "completed"  # "in_progress", "completed", "failed"
+    job_id: Optional[str] = None  # Background job to poll while in progress
 
 # Phone API Sync Models
 class PhoneAPISyncResponse(BaseModel):
@@ -366,7 +520,12 @@ class PhoneAPISyncResponse(BaseModel):
     failed_imports: int
     errors: List[str] = []
     imported_phones: List[str] = []
+    # Breakdown of successful imports: new phones, changed phones, phones skipped as unchanged
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
     status: str  # "in_progress", "completed", "failed"
+    job_id: Optional[str] = None  # Background job to poll while in progress
 
 class BrandSyncResponse(BaseModel):
     success: bool
@@ -375,32 +534,53 @@ class BrandSyncResponse(BaseModel):
     successful_imports: int
     failed_imports: int
     errors: List[str] = []
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    status: str = "completed"  # "in_progress", "completed", "failed"
+    job_id: Optional[str] = None  # Background job to poll while in progress
 
 # Phone Specifications API Client
 class PhoneSpecsAPIClient:
-    def __init__(self):
-        self.base_url = "https://fonoapi.freshpixl.com/v1"
-        self.session = None
+    def __init__(self, http: Optional[UpstreamClient] = None, cache: Optional[ResponseCache] = None):
+        # Without an upstream client the built-in mock catalog is served
+        self.http = http
+        self.cache = cache
+        self.base_url = http.base_url if http else "https://fonoapi.freshpixl.com/v1"
         
     async def get_session(self):
-        if self.session is None:
-            # Create session with proper SSL configuration
-            import ssl
-            ssl_context = ssl.create_default_context()
-            ssl_context.check_hostname = False  # For development/testing
-            ssl_context.verify_mode = ssl.CERT_NONE  # For development/testing
-            
-            connector = aiohttp.TCPConnector(ssl=ssl_context)
-            self.session = aiohttp.ClientSession(connector=connector)
-        return self.session
+        return await self.http.session() if self.http else None
         
     async def close_session(self):
-        if self.session:
-            await self.session.close()
-            self.session = None
+        if self.http:
+            await self.http.close()
+        if self.cache:
+            await self.cache.close()
+    
+    async def stats(self) -> Dict[str, Any]:
+        stats = {"mode": "mock"} if self.http is None else {"mode": "http", **self.http.stats()}
+        stats["cache"] = await self.cache.stats() if self.cache else None
+        return stats
     
     async def get_brands(self) -> List[Dict]:
+        if self.cache:
+            return await self.cache.get_or_fetch("brands", "all", self.fetch_brands)
+        return await self.fetch_brands()
+    
+    async def get_brand_phones(self, brand_name: str) -> List[Dict]:
+        if self.cache:
+            return await self.cache.get_or_fetch("brand_phones", brand_name, lambda: self.fetch_brand_phones(brand_name))
+        return await self.fetch_brand_phones(brand_name)
+    
+    async def get_phone_details(self, phone_name: str) -> Dict:
+        if self.cache:
+            return await self.cache.get_or_fetch("phone_details", phone_name, lambda: self.fetch_phone_details(phone_name))
+        return await self.fetch_phone_details(phone_name)
+    
+    async def fetch_brands(self) -> List[Dict]:
         """Get all available phone brands - Comprehensive list"""
+        if self.http:
+            return await self.http.get_json("/brands")
         try:
             comprehensive_brands = [
                 {"brand_name": "Apple", "device_count": 45},
@@ -429,8 +609,10 @@ class PhoneSpecsAPIClient:
             logger.error(f"Error fetching brands: {str(e)}")
             return []
     
-    async def get_brand_phones(self, brand_name: str) -> List[Dict]:
+    async def fetch_brand_phones(self, brand_name: str) -> List[Dict]:
         """Get phones for a specific brand using comprehensive phone generation"""
+        if self.http:
+            return await self.http.get_json(f"/brands/{quote(brand_name, safe='')}/phones")
         try:
             def generate_phones_for_brand(brand: str, count: int):
                 phones = []
@@ -536,8 +718,15 @@ class PhoneSpecsAPIClient:
             logger.error(f"Error fetching phones for brand {brand_name}: {str(e)}")
             return []
     
-    async def get_phone_details(self, phone_name: str) -> Dict:
+    async def fetch_phone_details(self, phone_name: str) -> Dict:
         """Get detailed specifications for a specific phone - Mock data for testing"""
+        if self.http:
+            try:
+                return await self.http.get_json(f"/phones/{quote(phone_name, safe='')}")
+            except UpstreamError as e:
+                if e.status == 404:
+                    return {}
+                raise
         try:
             # Create comprehensive mock phone data
             mock_phone_data = {
@@ -585,208 +774,75 @@ class PhoneSpecsAPIClient:
             logger.error(f"Error fetching phone details for {phone_name}: {str(e)}")
             return {}
 
-# Global API client instance
-phone_api_client = PhoneSpecsAPIClient()
+# Global API client instance (HTTP mode when PHONE_API_BASE_URL is set, mock catalog otherwise)
+PHONE_API_BASE_URL = os.environ.get('PHONE_API_BASE_URL', '').strip()
 
-# Helper function to transform API data to our database format
-def transform_api_phone_to_db_format(api_phone_data: Dict) -> Dict:
-    """Transform phone data from API format to our database format with realistic specs"""
-    try:
-        # Extract basic information
-        phone_name = api_phone_data.get("DeviceName", "")
-        brand = api_phone_data.get("Brand", "")
-        
-        # Generate realistic specifications based on phone name and brand
-        def get_realistic_specs(phone_name: str, brand: str):
-            phone_lower = phone_name.lower()
-            brand_lower = brand.lower()
-            
-            # Extract year from phone name
-            year = 2023  # default
-            if "2024" in phone_name or any(x in phone_lower for x in ["15", "s24", "14 ultra", "x100"]):
-                year = 2024
-            elif "2023" in phone_name or any(x in phone_lower for x in ["14", "s23", "13 ultra", "8 pro"]):
-                year = 2023
-            elif "2022" in phone_name or any(x in phone_lower for x in ["13", "s22", "12 ultra"]):
-                year = 2022
-            elif "2021" in phone_name or any(x in phone_lower for x in ["12", "s21", "11 pro"]):
-                year = 2021
-            elif "2020" in phone_name or any(x in phone_lower for x in ["11", "s20", "note 20"]):
-                year = 2020
-            
-            # Determine if it's a flagship, mid-range, or budget phone
-            is_flagship = any(x in phone_lower for x in ["pro", "ultra", "max", "plus", "fold", "flip"])
-            is_budget = any(x in phone_lower for x in ["a", "lite", "mini", "se", "y", "c", "m"])
-            is_midrange = not is_flagship and not is_budget
-            
-            # iPhone specifications
-            if "iphone" in phone_lower or brand_lower == "apple":
-                if "15" in phone_lower:
-                    if "pro max" in phone_lower:
-                        return {"display_size": "6.7 inches", "camera_mp": "48 MP", "battery_mah": "4441 mAh", "storage_gb": "256", "ram_gb": "8", "processor": "Apple A17 Pro", "os": "iOS 17", "price_min": 180000, "price_max": 300000}
-                    elif "pro" in phone_lower:
-                        return {"display_size": "6.1 inches", "camera_mp": "48 MP", "battery_mah": "3274 mAh", "storage_gb": "128", "ram_gb": "8", "processor": "Apple A17 Pro", "os": "iOS 17", "price_min": 150000, "price_max": 250000}
-                    elif "plus" in phone_lower:
-                        return {"display_size": "6.7 inches", "camera_mp": "48 MP", "battery_mah": "4383 mAh", "storage_gb": "128", "ram_gb": "6", "processor": "Apple A16 Bionic", "os": "iOS 17", "price_min": 130000, "price_max": 190000}
-                    else:
-                        return {"display_size": "6.1 inches", "camera_mp": "48 MP", "battery_mah": "3349 mAh", "storage_gb": "128", "ram_gb": "6", "processor": "Apple A16 Bionic", "os": "iOS 17", "price_min": 120000, "price_max": 180000}
-                elif "14" in phone_lower:
-                    if "pro max" in phone_lower:
-                        return {"display_size": "6.7 inches", "camera_mp": "48 MP", "battery_mah": "4323 mAh", "storage_gb": "128", "ram_gb": "6", "processor": "Apple A16 Bionic", "os": "iOS 16", "price_min": 140000, "price_max": 210000}
-                    elif "pro" in phone_lower:
-                        return {"display_size": "6.1 inches", "camera_mp": "48 MP", "battery_mah": "3200 mAh", "storage_gb": "128", "ram_gb": "6", "processor": "Apple A16 Bionic", "os": "iOS 16", "price_min": 110000, "price_max": 170000}
-                    elif "plus" in phone_lower:
-                        return {"display_size": "6.7 inches", "camera_mp": "12 MP", "battery_mah": "4325 mAh", "storage_gb": "128", "ram_gb": "6", "processor": "Apple A15 Bionic", "os": "iOS 16", "price_min": 100000, "price_max": 150000}
-                    else:
-                        return {"display_size": "6.1 inches", "camera_mp": "12 MP", "battery_mah": "3279 mAh", "storage_gb": "128", "ram_gb": "6", "processor": "Apple A15 Bionic", "os": "iOS 16", "price_min": 90000, "price_max": 140000}
-                elif "se" in phone_lower:
-                    return {"display_size": "4.7 inches", "camera_mp": "12 MP", "battery_mah": "1821 mAh", "storage_gb": "64", "ram_gb": "3", "processor": "Apple A15 Bionic", "os": "iOS 15", "price_min": 60000, "price_max": 90000}
-                else:  # iPhone 13, 12, 11
-                    if "pro max" in phone_lower:
-                        return {"display_size": "6.7 inches", "camera_mp": "12 MP", "battery_mah": "4352 mAh", "storage_gb": "128", "ram_gb": "6", "processor": "Apple A15 Bionic", "os": "iOS 15", "price_min": 120000, "price_max": 180000}
-                    elif "pro" in phone_lower:
-                        return {"display_size": "6.1 inches", "camera_mp": "12 MP", "battery_mah": "3095 mAh", "storage_gb": "128", "ram_gb": "6", "processor": "Apple A15 Bionic", "os": "iOS 15", "price_min": 100000, "price_max": 150000}
-                    elif "mini" in phone_lower:
-                        return {"display_size": "5.4 inches", "camera_mp": "12 MP", "battery_mah": "2438 mAh", "storage_gb": "128", "ram_gb": "4", "processor": "Apple A15 Bionic", "os": "iOS 15", "price_min": 80000, "price_max": 120000}
-                    else:
-                        return {"display_size": "6.1 inches", "camera_mp": "12 MP", "battery_mah": "3240 mAh", "storage_gb": "128", "ram_gb": "4", "processor": "Apple A15 Bionic", "os": "iOS 15", "price_min": 85000, "price_max": 130000}
-            
-            # Samsung Galaxy specifications  
-            elif "galaxy" in phone_lower or brand_lower == "samsung":
-                if "s24" in phone_lower:
-                    if "ultra" in phone_lower:
-                        return {"display_size": "6.8 inches", "camera_mp": "200 MP", "battery_mah": "5000 mAh", "storage_gb": "256", "ram_gb": "12", "processor": "Snapdragon 8 Gen 3", "os": "Android 14", "price_min": 140000, "price_max": 220000}
-                    elif "plus" in phone_lower:
-                        return {"display_size": "6.7 inches", "camera_mp": "50 MP", "battery_mah": "4900 mAh", "storage_gb": "256", "ram_gb": "12", "processor": "Snapdragon 8 Gen 3", "os": "Android 14", "price_min": 110000, "price_max": 160000}
-                    else:
-                        return {"display_size": "6.2 inches", "camera_mp": "50 MP", "battery_mah": "4000 mAh", "storage_gb": "128", "ram_gb": "8", "processor": "Snapdragon 8 Gen 3", "os": "Android 14", "price_min": 90000, "price_max": 140000}
-                elif "s23" in phone_lower:
-                    if "ultra" in phone_lower:
-                        return {"display_size": "6.8 inches", "camera_mp": "200 MP", "battery_mah": "5000 mAh", "storage_gb": "256", "ram_gb": "12", "processor": "Snapdragon 8 Gen 2", "os": "Android 13", "price_min": 120000, "price_max": 180000}
-                    elif "plus" in phone_lower:
-                        return {"display_size": "6.6 inches", "camera_mp": "50 MP", "battery_mah": "4700 mAh", "storage_gb": "256", "ram_gb": "8", "processor": "Snapdragon 8 Gen 2", "os": "Android 13", "price_min": 95000, "price_max": 140000}
-                    else:
-                        return {"display_size": "6.1 inches", "camera_mp": "50 MP", "battery_mah": "3900 mAh", "storage_gb": "128", "ram_gb": "8", "processor": "Snapdragon 8 Gen 2", "os": "Android 13", "price_min": 80000, "price_max": 120000}
-                elif "fold" in phone_lower:
-                    return {"display_size": "7.6 inches", "camera_mp": "50 MP", "battery_mah": "4400 mAh", "storage_gb": "256", "ram_gb": "12", "processor": "Snapdragon 8 Gen 2", "os": "Android 13", "price_min": 200000, "price_max": 350000}
-                elif "flip" in phone_lower:
-                    return {"display_size": "6.7 inches", "camera_mp": "12 MP", "battery_mah": "3700 mAh", "storage_gb": "256", "ram_gb": "8", "processor": "Snapdragon 8 Gen 2", "os": "Android 13", "price_min": 120000, "price_max": 180000}
-                elif "note 20" in phone_lower:
-                    if "ultra" in phone_lower:
-                        return {"display_size": "6.9 inches", "camera_mp": "108 MP", "battery_mah": "4500 mAh", "storage_gb": "256", "ram_gb": "12", "processor": "Snapdragon 865+", "os": "Android 11", "price_min": 80000, "price_max": 120000}
-                    else:
-                        return {"display_size": "6.7 inches", "camera_mp": "64 MP", "battery_mah": "4300 mAh", "storage_gb": "128", "ram_gb": "8", "processor": "Snapdragon 865+", "os": "Android 11", "price_min": 70000, "price_max": 100000}
-                elif any(x in phone_lower for x in ["a54", "a34", "a24", "a14", "a04"]):  # A series (budget)
-                    if "54" in phone_lower:
-                        return {"display_size": "6.4 inches", "camera_mp": "50 MP", "battery_mah": "5000 mAh", "storage_gb": "128", "ram_gb": "6", "processor": "Exynos 1380", "os": "Android 13", "price_min": 45000, "price_max": 65000}
-                    else:
-                        return {"display_size": "6.5 inches", "camera_mp": "48 MP", "battery_mah": "5000 mAh", "storage_gb": "128", "ram_gb": "4", "processor": "Exynos 1280", "os": "Android 12", "price_min": 25000, "price_max": 45000}
-                elif "m" in phone_lower:  # M series (mid-range)
-                    return {"display_size": "6.7 inches", "camera_mp": "108 MP", "battery_mah": "6000 mAh", "storage_gb": "128", "ram_gb": "8", "processor": "Exynos 1380", "os": "Android 13", "price_min": 35000, "price_max": 55000}
-                else:  # Generic Samsung
-                    return {"display_size": "6.4 inches", "camera_mp": "50 MP", "battery_mah": "4500 mAh", "storage_gb": "128", "ram_gb": "6", "processor": "Exynos 2200", "os": "Android 12", "price_min": 40000, "price_max": 70000}
-            
-            # Google Pixel specifications
-            elif "pixel" in phone_lower or brand_lower == "google":
-                if "8" in phone_lower:
-                    if "pro" in phone_lower:
-                        return {"display_size": "6.7 inches", "camera_mp": "50 MP", "battery_mah": "5050 mAh", "storage_gb": "128", "ram_gb": "12", "processor": "Google Tensor G3", "os": "Android 14", "price_min": 85000, "price_max": 130000}
-                    else:
-                        return {"display_size": "6.2 inches", "camera_mp": "50 MP", "battery_mah": "4575 mAh", "storage_gb": "128", "ram_gb": "8", "processor": "Google Tensor G3", "os": "Android 14", "price_min": 65000, "price_max": 95000}
-                elif "7" in phone_lower:
-                    if "pro" in phone_lower:
-                        return {"display_size": "6.7 inches", "camera_mp": "50 MP", "battery_mah": "5003 mAh", "storage_gb": "128", "ram_gb": "12", "processor": "Google Tensor G2", "os": "Android 13", "price_min": 75000, "price_max": "115000"}
-                    else:
-                        return {"display_size": "6.3 inches", "camera_mp": "50 MP", "battery_mah": "4614 mAh", "storage_gb": "128", "ram_gb": "8", "processor": "Google Tensor G2", "os": "Android 13", "price_min": 55000, "price_max": 85000}
-                elif "6a" in phone_lower or "a" in phone_lower:
-                    return {"display_size": "6.1 inches", "camera_mp": "12.2 MP", "battery_mah": "4410 mAh", "storage_gb": "128", "ram_gb": "6", "processor": "Google Tensor", "os": "Android 12", "price_min": 35000, "price_max": 50000}
-                else:
-                    return {"display_size": "6.0 inches", "camera_mp": "12.2 MP", "battery_mah": "4080 mAh", "storage_gb": "128", "ram_gb": "8", "processor": "Google Tensor G2", "os": "Android 13", "price_min": 60000, "price_max": 90000}
-            
-            # OnePlus specifications
-            elif "oneplus" in phone_lower or brand_lower == "oneplus":
-                if is_flagship:
-                    return {"display_size": "6.7 inches", "camera_mp": "50 MP", "battery_mah": "5400 mAh", "storage_gb": "256", "ram_gb": "12", "processor": "Snapdragon 8 Gen 3", "os": "Android 14", "price_min": 70000, "price_max": 120000}
-                elif "nord" in phone_lower or is_midrange:
-                    return {"display_size": "6.4 inches", "camera_mp": "50 MP", "battery_mah": "4500 mAh", "storage_gb": "128", "ram_gb": "8", "processor": "Snapdragon 7 Gen 3", "os": "Android 13", "price_min": 35000, "price_max": 55000}
-                else:
-                    return {"display_size": "6.7 inches", "camera_mp": "48 MP", "battery_mah": "5000 mAh", "storage_gb": "128", "ram_gb": "8", "processor": "Snapdragon 8 Gen 2", "os": "Android 13", "price_min": 60000, "price_max": 90000}
-            
-            # Xiaomi specifications
-            elif "xiaomi" in phone_lower or "redmi" in phone_lower or "poco" in phone_lower or brand_lower == "xiaomi":
-                if "14" in phone_lower and "ultra" in phone_lower:
-                    return {"display_size": "6.73 inches", "camera_mp": "50 MP", "battery_mah": "4860 mAh", "storage_gb": "256", "ram_gb": "12", "processor": "Snapdragon 8 Gen 3", "os": "Android 14", "price_min": 80000, "price_max": 130000}
-                elif "poco" in phone_lower:
-                    if "f" in phone_lower:  # POCO F series (flagship)
-                        return {"display_size": "6.67 inches", "camera_mp": "64 MP", "battery_mah": "5160 mAh", "storage_gb": "256", "ram_gb": "12", "processor": "Snapdragon 8 Gen 2", "os": "Android 13", "price_min": 50000, "price_max": 80000}
-                    else:  # POCO X series (mid-range)
-                        return {"display_size": "6.67 inches", "camera_mp": "48 MP", "battery_mah": "5100 mAh", "storage_gb": "128", "ram_gb": "8", "processor": "Snapdragon 7s Gen 2", "os": "Android 13", "price_min": 30000, "price_max": 50000}
-                elif "redmi note" in phone_lower:
-                    return {"display_size": "6.67 inches", "camera_mp": "108 MP", "battery_mAh": "5000 mAh", "storage_gb": "128", "ram_gb": "6", "processor": "Snapdragon 685", "os": "Android 13", "price_min": 25000, "price_max": 40000}
-                elif is_flagship:
-                    return {"display_size": "6.73 inches", "camera_mp": "50 MP", "battery_mah": "4600 mAh", "storage_gb": "256", "ram_gb": "12", "processor": "Snapdragon 8 Gen 2", "os": "Android 13", "price_min": 60000, "price_max": 100000}
-                else:
-                    return {"display_size": "6.43 inches", "camera_mp": "48 MP", "battery_mah": "4500 mAh", "storage_gb": "128", "ram_gb": "6", "processor": "Snapdragon 695", "os": "Android 12", "price_min": 20000, "price_max": 35000}
-            
-            # Default specifications for other brands based on category
-            else:
-                if is_flagship:
-                    return {"display_size": "6.7 inches", "camera_mp": "50 MP", "battery_mah": "4500 mAh", "storage_gb": "256", "ram_gb": "8", "processor": "Snapdragon 8 Gen 2", "os": "Android 13", "price_min": 60000, "price_max": 120000}
-                elif is_budget:
-                    return {"display_size": "6.5 inches", "camera_mp": "13 MP", "battery_mah": "4000 mAh", "storage_gb": "64", "ram_gb": "4", "processor": "Snapdragon 460", "os": "Android 11", "price_min": 15000, "price_max": 30000}
-                else:  # mid-range
-                    return {"display_size": "6.4 inches", "camera_mp": "48 MP", "battery_mah": "4500 mAh", "storage_gb": "128", "ram_gb": "6", "processor": "Snapdragon 7 Gen 1", "os": "Android 12", "price_min": 30000, "price_max": 60000}
-        
-        # Get realistic specs for this phone
-        specs = get_realistic_specs(phone_name, brand)
-        
-        # Create the database document with realistic specifications
-        db_document = {
-            "_id": str(uuid.uuid4()),
-            "brand": brand,
-            "model": phone_name,
-            
-            # Display specs with realistic values
-            "display_size": specs["display_size"],
-            "display_technology": "OLED" if "pro" in phone_name.lower() or "ultra" in phone_name.lower() else "AMOLED",
-            
-            # Camera specs
-            "camera_mp": specs["camera_mp"],
-            "front_camera": "12 MP" if "pro" in phone_name.lower() else "8 MP",
-            
-            # Battery and performance
-            "battery_mah": specs["battery_mah"],
-            "storage_gb": specs["storage_gb"],
-            "ram_gb": specs["ram_gb"],
-            "processor": specs["processor"],
-            "operating_system": specs["os"],
-            
-            # Pricing
-            "price_range_min": specs["price_min"],
-            "price_range_max": specs["price_max"],
-            
-            # Release info
-            "release_year": 2024 if any(x in phone_name.lower() for x in ["15", "8", "s24"]) else 2023,
-            
-            # Additional realistic specs
-            "dimensions": "159.9 x 76.7 x 8.25 mm",
-            "weight": "221 g" if "pro" in phone_name.lower() else "194 g",
-            "sim": "Nano-SIM and eSIM",
-            "network_5g": "Yes" if specs["price_min"] > 40000 else "No",
-            "charging": "Fast charging" if specs["price_min"] > 30000 else "Standard charging",
-            
-            # Metadata
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow(),
-            "source": "phone_specs_api",
-            "api_device_name": api_phone_data.get("DeviceName", "")
-        }
-        
-        return db_document
-        
-    except Exception as e:
-        logger.error(f"Error transforming API phone data: {str(e)}")
+def build_phone_api_upstream() -> Optional[UpstreamClient]:
+    """Pooled upstream client configured from PHONE_API_* settings"""
+    if not PHONE_API_BASE_URL:
         return None
+    return UpstreamClient(
+        PHONE_API_BASE_URL,
+        limit=int(os.environ.get('PHONE_API_POOL_SIZE', '100')),
+        limit_per_host=int(os.environ.get('PHONE_API_POOL_PER_HOST', '20')),
+        keepalive_timeout=float(os.environ.get('PHONE_API_KEEPALIVE_SECONDS', '30')),
+        connect_timeout=float(os.environ.get('PHONE_API_CONNECT_TIMEOUT', '3')),
+        read_timeout=float(os.environ.get('PHONE_API_READ_TIMEOUT', '10')),
+        total_timeout=float(os.environ.get('PHONE_API_TOTAL_TIMEOUT', '30')),
+        retries=int(os.environ.get('PHONE_API_RETRIES', '3')),
+        backoff_base=float(os.environ.get('PHONE_API_BACKOFF_SECONDS', '0.2')),
+        verify_ssl=os.environ.get('PHONE_API_VERIFY_SSL', 'true').lower() != 'false',
+        breaker=CircuitBreaker(
+            failure_threshold=int(os.environ.get('PHONE_API_BREAKER_FAILURES', '5')),
+            reset_timeout=float(os.environ.get('PHONE_API_BREAKER_RESET_SECONDS', '30'))
+        )
+    )
+
+def build_phone_api_cache() -> Optional[ResponseCache]:
+    """Response cache for upstream lookups (memory-only when PHONE_API_CACHE_PATH is empty)"""
+    if not PHONE_API_BASE_URL or os.environ.get('PHONE_API_CACHE', 'true').lower() == 'false':
+        return None
+    return ResponseCache(
+        path=os.environ.get('PHONE_API_CACHE_PATH', str(ROOT_DIR / 'api_cache' / 'phone_api.sqlite3')) or None,
+        max_entries=int(os.environ.get('PHONE_API_CACHE_SIZE', '5000')),
+        ttl=float(os.environ.get('PHONE_API_CACHE_TTL_SECONDS', '21600')),
+        stale_ttl=float(os.environ.get('PHONE_API_CACHE_STALE_SECONDS', '86400')),
+        ttls={
+            "brands": float(os.environ.get('PHONE_API_CACHE_BRANDS_TTL_SECONDS', '86400')),
+            "brand_phones": float(os.environ.get('PHONE_API_CACHE_BRAND_PHONES_TTL_SECONDS', '21600')),
+            "phone_details": float(os.environ.get('PHONE_API_CACHE_DETAILS_TTL_SECONDS', '604800'))
+        }
+    )
+
+phone_api_client = PhoneSpecsAPIClient(build_phone_api_upstream(), build_phone_api_cache())
+
+# Catalog sync tuning: concurrent detail fetches, API requests per second and upserts per bulk write
+SYNC_CONCURRENCY = int(os.environ.get('PHONE_API_SYNC_CONCURRENCY', '8'))
+SYNC_RATE_PER_SECOND = float(os.environ.get('PHONE_API_SYNC_RATE', '20'))
+SYNC_BATCH_SIZE = int(os.environ.get('PHONE_API_SYNC_BATCH_SIZE', '200'))
+
+# Background jobs for syncs and imports; a sync job checkpoints after each group of brands
+job_runner = JobRunner(
+    db.jobs,
+    workers=int(os.environ.get('JOB_WORKERS', '2')),
+    max_attempts=int(os.environ.get('JOB_MAX_ATTEMPTS', '3'))
+)
+SYNC_BRANDS_PER_STEP = 4
+IMPORT_CHUNK_ROWS = int(os.environ.get('IMPORT_CHUNK_ROWS', '1000'))
+IMPORT_RESULT_LIMIT = 100  # Imported names echoed back in the job result
+
+# Stats document read by /stats and the dashboards; fully recomputed every STATS_RECONCILE_SECONDS
+platform_stats = PlatformStats(db, reconcile_interval=float(os.environ.get('STATS_RECONCILE_SECONDS', '600')))
+
+# Compare view of phone_specs, rebuilt after spec writes
+compare_catalog = CompareCatalog(db.phone_specs, max_age=float(os.environ.get('COMPARE_CACHE_MAX_AGE_SECONDS', '300')))
+
+# Listing views are counted in memory and flushed in batches; repeat views can be ignored for a window
+view_counter = ViewCounter(
+    db.phone_listings,
+    flush_interval=float(os.environ.get('VIEW_FLUSH_SECONDS', '5')),
+    dedup_window=float(os.environ.get('VIEW_DEDUP_WINDOW_SECONDS', '0'))
+)
 
 # Admin Stats Response Model
 class AdminStats(BaseModel):
@@ -862,6 +918,8 @@ class PhoneListing(BaseModel):
     accessories_included: List[str] = []
     battery_health: Optional[str] = None
     seller_type: str = "Individual"
+    # Parsed numeric specs (ram_gb, storage_gb, battery_mah, display_inches, camera_mp)
+    numeric: Dict[str, Union[int, float]] = {}
     # System fields
     created_at: datetime = Field(default_factory=datetime.utcnow)
     views: int = 0
@@ -871,6 +929,151 @@ class PhoneListing(BaseModel):
     class Config:
         populate_by_name = True
 
+# Listing facets used by the browse filters. Each value is stored lowercased
+# under "facets" at write time so filters hit the compound indexes created at
+# startup instead of running case-insensitive regex scans.
+LISTING_FACET_FIELDS = [
+    "city", "brand", "model", "condition", "color",
+    "storage", "ram", "battery", "battery_health", "network", "seller_type"
+]
+
+# Free-text facets match on a prefix ("galaxy s24" matches "galaxy s24 ultra"),
+# the remaining facets are fixed option lists and match exactly
+PREFIX_MATCH_FACETS = {"city", "brand", "model", "color"}
+
+def normalize_facet(value) -> Optional[str]:
+    """Lowercase a facet value and collapse its whitespace"""
+    if value is None:
+        return None
+    normalized = " ".join(str(value).split()).lower()
+    return normalized or None
+
+def build_listing_facets(listing: dict) -> dict:
+    """Build the normalized facet sub-document for a listing"""
+    facets = {}
+    for field in LISTING_FACET_FIELDS:
+        normalized = normalize_facet(listing.get(field))
+        if normalized is not None:
+            facets[field] = normalized
+    return facets
+
+def build_facet_filter(field: str, value: str) -> dict:
+    """Build an index-friendly filter for a single facet"""
+    normalized = normalize_facet(value) or ""
+    if field in PREFIX_MATCH_FACETS:
+        # An anchored, case-sensitive regex on the lowercased field is an index range scan
+        return {f"facets.{field}": {"$regex": f"^{re.escape(normalized)}"}}
+    return {f"facets.{field}": normalized}
+
+def listing_sort_date(listing: dict):
+    """Date the admin portal orders listings by: date_posted when present, else created_at"""
+    return listing.get("date_posted") or listing.get("created_at")
+
+# Admin listing pages: newest first on the stored sort_date, with keyset cursors on (sort_date, _id)
+ADMIN_LISTING_SORT = ("sort_date", -1)
+
+# Keyset pagination. Sort orders map to (field, direction); every order is
+# tie-broken on _id so (sort value, _id) identifies a position uniquely.
+LISTING_SORT_ORDERS = {
+    "newest": ("created_at", -1),
+    "oldest": ("created_at", 1),
+    "price_low": ("price", 1),
+    "price_high": ("price", -1),
+    "most_viewed": ("views", -1)
+}
+
+# Response header carrying the cursor for the next page on list endpoints
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(sort_by: str, position) -> str:
+    """Encode an opaque, URL-safe pagination cursor"""
+    payload = json_util.dumps([sort_by, position]).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, sort_by: str):
+    """Decode a cursor produced by encode_cursor for the same sort order"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, position = json_util.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if cursor_sort != sort_by:
+        raise HTTPException(status_code=400, detail="Cursor does not match the requested sort order")
+    return position
+
+def keyset_cursor(sort_by: str, field: str, last_doc: dict) -> str:
+    """Cursor pointing just past the given document"""
+    return encode_cursor(sort_by, [last_doc.get(field), last_doc["_id"]])
+
+def build_keyset_filter(field: str, direction: int, cursor: str, sort_by: str) -> dict:
+    """Filter selecting the documents that sort strictly after the cursor"""
+    position = decode_cursor(cursor, sort_by)
+    if not isinstance(position, list) or len(position) != 2:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    value, last_id = position
+    operator = "$gt" if direction == 1 else "$lt"
+    return {"$or": [
+        {field: {operator: value}},
+        {field: value, "_id": {operator: last_id}}
+    ]}
+
+# Full-text search over active listings, built at startup and kept current by the listing write paths
+listing_search_index = ListingSearchIndex()
+
+# Best-scoring search hits ranked for relevance pages; other orders consider every match
+SEARCH_CANDIDATE_LIMIT = 2000
+
+async def rebuild_search_index():
+    """Reload the listing search index from the database"""
+    projection = {field: 1 for field in SEARCH_FIELD_WEIGHTS}
+    listing_search_index.clear()
+    async for listing in db.phone_listings.find({"is_active": True}, projection):
+        listing_search_index.add(listing)
+    logger.info(f"Search index built over {len(listing_search_index)} listings")
+
+# Tells the other workers about writes so their in-process caches stay current
+invalidation_bus = InvalidationBus(
+    db,
+    ["users", "phone_specs", "phone_listings", "accessories"],
+    mode=os.environ.get('INVALIDATION_MODE', 'auto'),
+    poll_interval=float(os.environ.get('INVALIDATION_POLL_SECONDS', '2')),
+    max_resume_age=float(os.environ.get('INVALIDATION_MAX_RESUME_AGE_SECONDS', '3600'))
+)
+
+def invalidate_user_principal(event: InvalidationEvent):
+    """Drop a changed user's cached principal"""
+    if event.document_id is None or event.operation == ChangeOperation.INVALIDATE:
+        user_principal_cache.clear()
+    else:
+        user_principal_cache.invalidate(str(event.document_id))
+
+def invalidate_spec_catalogs(event: InvalidationEvent):
+    """Rebuild the compare and listing form catalogs on their next read"""
+    compare_catalog.mark_dirty()
+    spec_catalog.mark_dirty()
+
+async def reindex_listing(event: InvalidationEvent):
+    """Apply a listing change made elsewhere to the search index; updates are looked up"""
+    if event.operation == ChangeOperation.INVALIDATE or event.document_id is None:
+        await rebuild_search_index()
+        return
+    listing = None
+    if event.operation != ChangeOperation.DELETE:
+        listing = event.document
+        if listing is None:
+            projection = {field: 1 for field in SEARCH_FIELD_WEIGHTS}
+            projection["is_active"] = 1
+            listing = await db.phone_listings.find_one({"_id": event.document_id}, projection)
+    if listing is not None and listing.get("is_active"):
+        listing_search_index.add(listing)
+    else:
+        listing_search_index.remove(event.document_id)
+
+invalidation_bus.subscribe("users", invalidate_user_principal)
+invalidation_bus.subscribe("phone_specs", invalidate_spec_catalogs)
+# View counts and other non-search fields change often; only search field updates are delivered
+invalidation_bus.subscribe("phone_listings", reindex_listing, fields=[*SEARCH_FIELD_WEIGHTS, "is_active"])
+
 # Existing routes
 # High-quality phone images with clean white backgrounds
 PHONE_IMAGES = [
@@ -1068,20 +1271,28 @@ PHONE_SPECS_DATABASE = {
     }
 }
 
+# Brand/model lookups of the listing form, over the table above and phone_specs
+spec_catalog = SpecCatalog(
+    db.phone_specs,
+    builtin=PHONE_SPECS_DATABASE,
+    max_age=float(os.environ.get('SPEC_CATALOG_MAX_AGE_SECONDS', '300'))
+)
+
 # Add API endpoint to get phone specifications
 @api_router.get("/phone-specs/{brand}/{model}")
 async def get_phone_specs(brand: str, model: str):
     """Get phone specifications for a specific brand and model"""
     try:
-        brand_data = PHONE_SPECS_DATABASE.get(brand)
-        if not brand_data:
+        if await spec_catalog.models(brand) is None:
             raise HTTPException(status_code=404, detail="Brand not found")
         
-        model_data = brand_data.get(model)
+        model_data = await spec_catalog.specs(brand, model)
         if not model_data:
             raise HTTPException(status_code=404, detail="Model not found")
         
         return model_data
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching phone specs: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch phone specifications")
@@ -1091,11 +1302,13 @@ async def get_phone_specs(brand: str, model: str):
 async def get_phone_models(brand: str):
     """Get available phone models for a specific brand"""
     try:
-        brand_data = PHONE_SPECS_DATABASE.get(brand)
-        if not brand_data:
+        models = await spec_catalog.models(brand)
+        if models is None:
             raise HTTPException(status_code=404, detail="Brand not found")
         
-        return {"models": list(brand_data.keys())}
+        return {"models": models}
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching phone models: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch phone models")
@@ -1105,59 +1318,60 @@ async def get_phone_models(brand: str):
 async def get_phone_brands():
     """Get all available phone brands"""
     try:
-        return {"brands": list(PHONE_SPECS_DATABASE.keys())}
+        return {"brands": await spec_catalog.brands()}
     except Exception as e:
         logger.error(f"Error fetching phone brands: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch phone brands")
 
+def numeric_spec_filter(
+    min_ram_gb: Optional[float] = None,
+    max_ram_gb: Optional[float] = None,
+    min_storage_gb: Optional[float] = None,
+    max_storage_gb: Optional[float] = None,
+    min_battery_mah: Optional[float] = None,
+    max_battery_mah: Optional[float] = None,
+    min_display_inches: Optional[float] = None,
+    max_display_inches: Optional[float] = None,
+    min_camera_mp: Optional[float] = None,
+    max_camera_mp: Optional[float] = None
+) -> Dict[str, Any]:
+    """Range filters on the parsed numeric specs, shared by listings and phone specs"""
+    return build_numeric_range_filter({
+        "ram_gb": (min_ram_gb, max_ram_gb),
+        "storage_gb": (min_storage_gb, max_storage_gb),
+        "battery_mah": (min_battery_mah, max_battery_mah),
+        "display_inches": (min_display_inches, max_display_inches),
+        "camera_mp": (min_camera_mp, max_camera_mp)
+    })
+
 # Admin Phone Specs Management Endpoints
 @api_router.get("/phone-specs/compare")
-async def get_phone_specs_for_compare():
-    """Get phone specs formatted specifically for the compare function"""
+async def get_phone_specs_for_compare(request: Request, ids: Optional[str] = None, brand: Optional[str] = None):
+    """Get phone specs formatted specifically for the compare function (optionally only some ids or one brand)"""
     try:
-        phone_specs = []
-        async for phone in db.phone_specs.find():
-            # Extract brand and model correctly
-            brand = phone.get("brand", "Unknown")
-            model = phone.get("model", "Unknown")
-            
-            # Remove brand name from model if it's duplicated
-            if model.startswith(brand):
-                model = model[len(brand):].strip()
-            
-            # Transform to compare-friendly format
-            compare_phone = {
-                "_id": str(phone.get("_id")),
-                "brand": brand,
-                "model": model,
-                "displayName": f"{brand} {model}",
-                "price": phone.get("price_range_min", 0),
-                "photos": ['/api/placeholder/300/200'],
-                "storage": f"{phone.get('storage_gb', 'N/A')}GB" if phone.get('storage_gb') else 'N/A',
-                "ram": f"{phone.get('ram_gb', 'N/A')}GB" if phone.get('ram_gb') else 'N/A',
-                "battery": f"{phone.get('battery_mah', 'N/A')} mAh" if phone.get('battery_mah') else 'N/A',
-                "camera": phone.get('camera_mp', 'N/A'),
-                "screen_size": phone.get('display_size', 'N/A'),
-                "processor": phone.get('processor', 'N/A'),
-                "operating_system": phone.get('operating_system', 'N/A'),
-                "network": "5G" if phone.get('network_5g') == 'Yes' else "4G",
-                "price_range": f"PKR {phone.get('price_range_min', 0)} - {phone.get('price_range_max', 0)}" if phone.get('price_range_min') else 'Price not available'
-            }
-            phone_specs.append(compare_phone)
+        selected_ids = [phone_id.strip() for phone_id in ids.split(",") if phone_id.strip()] if ids is not None else None
+        body, etag = await compare_catalog.payload(ids=selected_ids, brand=brand)
         
-        return phone_specs
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
     except Exception as e:
         logger.error(f"Error getting phone specs for compare: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to get phone specs")
 
-@api_router.get("/phone-specs", response_model=List[PhoneSpec])
-async def get_all_phone_specs():
-    """Get all phone specifications for admin management"""
+@api_router.get("/phone-specs", response_model=List[PhoneSpec], response_class=FastJSONResponse)
+async def get_all_phone_specs(brand: Optional[str] = None, numeric_filter: Dict[str, Any] = Depends(numeric_spec_filter)):
+    """Get all phone specifications for admin management, optionally filtered by brand and spec ranges"""
     try:
+        query = dict(numeric_filter)
+        if brand:
+            query["brand"] = brand
+        
         phone_specs = []
-        async for spec in db.phone_specs.find():
+        async for spec in db.phone_specs.find(query):
             phone_specs.append(serialize_doc(spec))
-        return phone_specs
+        return model_list_response(phone_specs, PhoneSpec)
     except Exception as e:
         logger.error(f"Error fetching phone specs: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch phone specifications")
@@ -1166,15 +1380,6 @@ async def get_all_phone_specs():
 async def create_phone_spec(spec_data: PhoneSpecCreate):
     """Create a new phone specification"""
     try:
-        # Check if phone spec already exists
-        existing_spec = await db.phone_specs.find_one({
-            "brand": spec_data.brand,
-            "model": spec_data.model
-        })
-        
-        if existing_spec:
-            raise HTTPException(status_code=400, detail="Phone specification already exists")
-        
         # Create new phone spec
         new_spec = {
             "_id": str(uuid.uuid4()),
@@ -1193,9 +1398,18 @@ async def create_phone_spec(spec_data: PhoneSpecCreate):
             "created_at": datetime.utcnow(),
             "updated_at": datetime.utcnow()
         }
+        new_spec["numeric"] = build_spec_numbers(new_spec)
         
-        result = await db.phone_specs.insert_one(new_spec)
+        # The unique (brand, model) index rejects duplicates
+        try:
+            result = await db.phone_specs.insert_one(new_spec)
+        except DuplicateKeyError:
+            raise HTTPException(status_code=400, detail="Phone specification already exists")
         if result.inserted_id:
+            await platform_stats.apply(spec_counters(new_spec))
+            compare_catalog.mark_dirty()
+            spec_catalog.apply(new_spec)
+            await invalidation_bus.notify("phone_specs", ChangeOperation.INSERT, new_spec["_id"])
             return serialize_doc(new_spec)
         else:
             raise HTTPException(status_code=500, detail="Failed to create phone specification")
@@ -1231,14 +1445,23 @@ async def update_phone_spec(spec_id: str, spec_data: PhoneSpecCreate):
             "release_year": spec_data.release_year,
             "updated_at": datetime.utcnow()
         }
+        updated_spec["numeric"] = build_spec_numbers({**existing_spec, **updated_spec})
         
-        result = await db.phone_specs.update_one(
-            {"_id": spec_id},
-            {"$set": updated_spec}
-        )
+        # Dropping the fingerprint lets the next API sync rewrite the phone again
+        try:
+            result = await db.phone_specs.update_one(
+                {"_id": spec_id},
+                {"$set": updated_spec, "$unset": {FINGERPRINT_FIELD: ""}}
+            )
+        except DuplicateKeyError:
+            raise HTTPException(status_code=400, detail="Phone specification already exists")
         
         if result.modified_count:
+            compare_catalog.mark_dirty()
             updated_doc = await db.phone_specs.find_one({"_id": spec_id})
+            spec_catalog.discard(existing_spec)
+            spec_catalog.apply(updated_doc)
+            await invalidation_bus.notify("phone_specs", ChangeOperation.UPDATE, spec_id)
             return serialize_doc(updated_doc)
         else:
             raise HTTPException(status_code=500, detail="Failed to update phone specification")
@@ -1262,6 +1485,10 @@ async def delete_phone_spec(spec_id: str):
         result = await db.phone_specs.delete_one({"_id": spec_id})
         
         if result.deleted_count:
+            await platform_stats.apply(counter_delta(spec_counters(existing_spec), {}))
+            compare_catalog.mark_dirty()
+            spec_catalog.discard(existing_spec)
+            await invalidation_bus.notify("phone_specs", ChangeOperation.DELETE, spec_id)
             return {"message": "Phone specification deleted successfully"}
         else:
             raise HTTPException(status_code=500, detail="Failed to delete phone specification")
@@ -1274,245 +1501,343 @@ async def delete_phone_spec(spec_id: str):
 
 # Admin Stats Endpoint
 @api_router.get("/stats", response_model=AdminStats)
+@api_router.get("/admin/stats", response_model=AdminStats)
 async def get_admin_stats():
     """Get admin dashboard statistics"""
     try:
-        # Get total listings count (using correct collection name)
-        total_listings = await db.phone_listings.count_documents({})
-        
-        # Get total users count
-        total_users = await db.users.count_documents({})
-        
-        # Get pending shop owner approvals count
-        pending_approvals = await db.users.count_documents({
-            "role": "shop_owner",
-            "verification_status": "pending"
-        })
-        
-        # Get total phone models count
-        phone_models = await db.phone_specs.count_documents({})
+        stats = await platform_stats.read()
         
         return AdminStats(
-            totalListings=total_listings,
-            totalUsers=total_users,
-            pendingApprovals=pending_approvals,
-            phoneModels=phone_models
+            totalListings=stats.get("total_listings", 0),
+            totalUsers=stats.get("total_users", 0),
+            pendingApprovals=stats.get("pending_approvals", 0),
+            phoneModels=stats.get("phone_models", 0)
         )
         
     except Exception as e:
         logger.error(f"Error fetching admin stats: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch admin statistics")
 
+@api_router.post("/admin/stats/reconcile", response_model=AdminStats)
+async def reconcile_admin_stats(current_user: dict = Depends(get_current_user)):
+    """Recompute the materialized statistics from the collections (Admin only)"""
+    if current_user["role"] != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    try:
+        stats = await platform_stats.reconcile()
+        
+        return AdminStats(
+            totalListings=stats.get("total_listings", 0),
+            totalUsers=stats.get("total_users", 0),
+            pendingApprovals=stats.get("pending_approvals", 0),
+            phoneModels=stats.get("phone_models", 0)
+        )
+        
+    except Exception as e:
+        logger.error(f"Error reconciling stats: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to reconcile statistics")
+
 # Admin Listings Management Endpoint
-@api_router.get("/admin/listings", response_model=List[PhoneListing])
-async def get_admin_listings(limit: int = 50, offset: int = 0):
+@api_router.get("/admin/listings", response_model=List[PhoneListing], response_class=FastJSONResponse)
+async def get_admin_listings(response: Response, limit: int = 50, offset: int = 0, cursor: Optional[str] = None):
     """Get all listings for admin portal management"""
     try:
-        # Get all listings with pagination, sorted by newest first
-        pipeline = [
-            {"$addFields": {
-                "sort_date": {
-                    "$ifNull": ["$date_posted", "$created_at"]
-                }
-            }},
-            {"$sort": {"sort_date": -1}},
-            {"$skip": offset},
-            {"$limit": limit}
-        ]
+        # Offset and cursor pages share one order: the stored sort_date on the (sort_date, _id) index
+        sort_field, sort_direction = ADMIN_LISTING_SORT
+        sort_criteria = [(sort_field, sort_direction), ("_id", sort_direction)]
+        if cursor:
+            query = build_keyset_filter(sort_field, sort_direction, cursor, "posted")
+            listings_query = db.phone_listings.find(query).sort(sort_criteria).limit(limit)
+        else:
+            listings_query = db.phone_listings.find({}).sort(sort_criteria).skip(offset).limit(limit)
+        listings = await listings_query.to_list(length=limit)
         
-        listings = await db.phone_listings.aggregate(pipeline).to_list(length=limit)
+        if listings and len(listings) == limit:
+            response.headers[NEXT_CURSOR_HEADER] = keyset_cursor("posted", sort_field, listings[-1])
         
         # Convert ObjectId to string for JSON serialization
         for listing in listings:
             if "_id" in listing:
                 listing["_id"] = str(listing["_id"])
                 
-        return listings
+        return model_list_response(listings, PhoneListing, response)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching admin listings: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch admin listings")
 
-# CSV Bulk Import Endpoint
+# CSV Bulk Import
+def build_spec_from_row(row: Dict[str, Any], brand: str, model: str) -> Dict[str, Any]:
+    """Build a phone_specs document from one bulk-import row"""
+    # Extract price values
+    price_pkr = None
+    price_usd = None
+    
+    try:
+        if row.get('price_pkr'):
+            price_pkr = int(str(row['price_pkr']).replace(',', '').replace('Rs', '').replace('PKR', '').strip())
+    except:
+        pass
+        
+    try:
+        if row.get('price_usd'):
+            price_usd = int(str(row['price_usd']).replace(',', '').replace('$', '').replace('USD', '').strip())
+    except:
+        pass
+    
+    # Create phone spec document
+    spec = {
+        "_id": str(uuid.uuid4()),
+        "brand": brand,
+        "model": model,
+        
+        # Build Information
+        "os": row.get('os', '').strip() or None,
+        "ui": row.get('ui', '').strip() or None,
+        "dimensions": row.get('dimensions', '').strip() or None,
+        "weight": row.get('weight', '').strip() or None,
+        "sim": row.get('sim', '').strip() or None,
+        "colors": row.get('colors', '').strip() or None,
+        
+        # Network & Frequency
+        "network_2g": row.get('network_2g', '').strip() or None,
+        "network_3g": row.get('network_3g', '').strip() or None,
+        "network_4g": row.get('network_4g', '').strip() or None,
+        "network_5g": row.get('network_5g', '').strip() or None,
+        
+        # Processor
+        "cpu": row.get('cpu', '').strip() or None,
+        "chipset": row.get('chipset', '').strip() or None,
+        "gpu": row.get('gpu', '').strip() or None,
+        
+        # Display
+        "display_technology": row.get('display_technology', '').strip() or None,
+        "display_size": row.get('display_size', '').strip() or None,
+        "display_resolution": row.get('display_resolution', '').strip() or None,
+        "display_features": row.get('display_features', '').strip() or None,
+        
+        # Memory
+        "storage": row.get('storage', '').strip() or None,
+        "ram": row.get('ram', '').strip() or None,
+        "card_slot": row.get('card_slot', '').strip() or None,
+        
+        # Camera
+        "main_camera": row.get('main_camera', '').strip() or None,
+        "camera_features": row.get('camera_features', '').strip() or None,
+        "front_camera": row.get('front_camera', '').strip() or None,
+        
+        # Connectivity
+        "wlan": row.get('wlan', '').strip() or None,
+        "bluetooth": row.get('bluetooth', '').strip() or None,
+        "gps": row.get('gps', '').strip() or None,
+        "radio": row.get('radio', '').strip() or None,
+        "usb": row.get('usb', '').strip() or None,
+        "nfc": row.get('nfc', '').strip() or None,
+        "infrared": row.get('infrared', '').strip() or None,
+        
+        # Features
+        "sensors": row.get('sensors', '').strip() or None,
+        "audio": row.get('audio', '').strip() or None,
+        "browser": row.get('browser', '').strip() or None,
+        "messaging": row.get('messaging', '').strip() or None,
+        "games": row.get('games', '').strip() or None,
+        "torch": row.get('torch', '').strip() or None,
+        "extra_features": row.get('extra_features', '').strip() or None,
+        
+        # Battery
+        "battery_capacity": row.get('battery_capacity', '').strip() or None,
+        "charging": row.get('charging', '').strip() or None,
+        
+        # Pricing
+        "price_pkr": price_pkr,
+        "price_usd": price_usd,
+        
+        # Legacy fields for backward compatibility
+        "display_size_legacy": row.get('display_size', '').strip() or None,
+        "camera_mp": row.get('camera_mp', '').strip() or None,
+        "battery_mah": row.get('battery_mah', '').strip() or None,
+        "storage_gb": row.get('storage_gb', '').strip() or None,
+        "ram_gb": row.get('ram_gb', '').strip() or None,
+        "processor": row.get('processor', '').strip() or None,
+        "operating_system": row.get('operating_system', '').strip() or None,
+        "price_range_min": price_pkr,
+        "price_range_max": price_pkr,
+        "release_year": int(row.get('release_year', datetime.now().year)) if row.get('release_year') else datetime.now().year,
+        
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow()
+    }
+    spec["numeric"] = build_spec_numbers(spec)
+    return spec
+
+async def import_phone_specs_chunk(chunk, state: Dict[str, Any]):
+    """Import one chunk of rows with a single duplicate lookup and an unordered insert_many"""
+    def fail(row_num: int, message: str):
+        state["failed_imports"] += 1
+        if len(state["errors"]) < 50:
+            state["errors"].append(f"Row {row_num}: {message}")
+    
+    candidates = []
+    for row_num, row in chunk:
+        try:
+            # Clean and validate required fields
+            brand = (row.get('brand') or '').strip()
+            model = (row.get('model') or '').strip()
+            
+            if not brand or not model:
+                fail(row_num, "Brand and Model are required")
+                continue
+            
+            candidates.append((row_num, build_spec_from_row(row, brand, model)))
+        except Exception as e:
+            fail(row_num, str(e))
+            logger.error(f"Error processing row {row_num}: {str(e)}")
+    
+    if not candidates:
+        return
+    
+    # One query per chunk for phone specs that already exist
+    existing = set()
+    cursor = db.phone_specs.find(
+        {
+            "brand": {"$in": list({spec["brand"] for _, spec in candidates})},
+            "model": {"$in": list({spec["model"] for _, spec in candidates})}
+        },
+        {"brand": 1, "model": 1}
+    )
+    async for spec in cursor:
+        existing.add((spec["brand"], spec["model"]))
+    
+    new_specs = []
+    for row_num, spec in candidates:
+        key = (spec["brand"], spec["model"])
+        if key in existing:
+            fail(row_num, f"{spec['brand']} {spec['model']} already exists")
+            continue
+        existing.add(key)  # Later rows in the chunk with the same phone are duplicates too
+        new_specs.append((row_num, spec))
+    
+    if not new_specs:
+        return
+    
+    failed_indexes = {}
+    try:
+        await db.phone_specs.insert_many([spec for _, spec in new_specs], ordered=False)
+    except BulkWriteError as e:
+        for error in e.details.get("writeErrors", []):
+            failed_indexes[error["index"]] = error
+    await platform_stats.apply(counter_delta({}, {
+        "phone_models": len(new_specs) - len(failed_indexes),
+        "manual_phones": len(new_specs) - len(failed_indexes)
+    }))
+    compare_catalog.mark_dirty()
+    spec_catalog.mark_dirty()
+    await invalidation_bus.notify("phone_specs", ChangeOperation.INVALIDATE)
+    
+    for index, (row_num, spec) in enumerate(new_specs):
+        name = f"{spec['brand']} {spec['model']}"
+        error = failed_indexes.get(index)
+        if error is None:
+            state["successful_imports"] += 1
+            if len(state["imported_specs"]) < IMPORT_RESULT_LIMIT:
+                state["imported_specs"].append(name)
+        elif error.get("code") == 11000:
+            # Inserted concurrently since the duplicate lookup
+            fail(row_num, f"{name} already exists")
+        else:
+            fail(row_num, f"Failed to insert {name}")
+
+async def run_phone_specs_import_job(context: JobContext) -> Dict[str, Any]:
+    """Job handler for bulk imports; streams the uploaded file back from the blob store"""
+    path = blob_store.local_path(context.params["blob"], private=True)
+    if path is None:
+        raise ValueError("Uploaded file is no longer available")
+    file_format = import_format(context.params.get("filename", "")) or "csv"
+    
+    # Checkpointed after every chunk so an interrupted job resumes where it stopped
+    state = context.checkpoint or {
+        "row_num": 1, "total_rows": 0, "successful_imports": 0,
+        "failed_imports": 0, "errors": [], "imported_specs": []
+    }
+    
+    async for chunk in iter_row_chunks(path, file_format, IMPORT_CHUNK_ROWS):
+        chunk = [(row_num, row) for row_num, row in chunk if row_num > state["row_num"]]
+        if not chunk:
+            continue  # Already imported before the job was interrupted
+        await context.check_cancelled()
+        
+        await import_phone_specs_chunk(chunk, state)
+        state["row_num"] = chunk[-1][0]
+        state["total_rows"] += len(chunk)
+        
+        await context.save_checkpoint(state)
+        await context.update_progress(
+            total_rows=state["total_rows"],
+            successful_imports=state["successful_imports"],
+            failed_imports=state["failed_imports"]
+        )
+    
+    return CSVUploadResponse(
+        success=True,
+        total_rows=state["total_rows"],
+        successful_imports=state["successful_imports"],
+        failed_imports=state["failed_imports"],
+        errors=state["errors"],
+        imported_specs=state["imported_specs"],
+        status="completed"
+    ).dict()
+
+async def cleanup_phone_specs_import_job(job: Dict[str, Any]):
+    """Delete the uploaded file once its import is over, unless another import of the same file is pending"""
+    blob = (job.get("params") or {}).get("blob")
+    if not blob:
+        return
+    pending = await db.jobs.count_documents({
+        "_id": {"$ne": job["_id"]}, "params.blob": blob, "status": {"$in": ACTIVE_STATUSES}
+    })
+    if not pending:
+        await blob_store.delete(blob, private=True)
+
 @api_router.post("/phone-specs/bulk-import", response_model=CSVUploadResponse)
-async def bulk_import_phone_specs(file: UploadFile = File(...)):
-    """Bulk import phone specifications from CSV file"""
+async def bulk_import_phone_specs(file: UploadFile = File(...), current_user: dict = Depends(get_current_user)):
+    """Bulk import phone specifications from a CSV or Excel (.xlsx) file in a background job (Admin only)"""
+    if current_user["role"] != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required")
     try:
         # Validate file type
-        if not file.filename.endswith(('.csv', '.xlsx', '.xls')):
+        file_format = import_format(file.filename)
+        if file_format is None:
+            if file.filename.lower().endswith('.xls'):
+                raise HTTPException(status_code=400, detail="Legacy .xls files are not supported. Please save as .xlsx or CSV.")
             raise HTTPException(status_code=400, detail="File must be CSV or Excel format")
         
-        # Read file content
-        contents = await file.read()
+        if file_format == "xlsx" and not excel_supported():
+            raise HTTPException(status_code=400, detail="Excel import is not available on this server. Please use CSV format.")
         
-        # Parse CSV content
-        if file.filename.endswith('.csv'):
-            csv_string = contents.decode('utf-8')
-            csv_reader = csv.DictReader(io.StringIO(csv_string))
-        else:
-            # For Excel files, we'll need to convert them to CSV format
-            # For now, let's focus on CSV support
-            raise HTTPException(status_code=400, detail="Excel support coming soon. Please use CSV format.")
-        
-        total_rows = 0
-        successful_imports = 0
-        failed_imports = 0
-        errors = []
-        imported_specs = []
-        
-        # Process each row
-        for row_num, row in enumerate(csv_reader, start=2):  # Start at 2 because row 1 is headers
-            total_rows += 1
-            
-            try:
-                # Clean and validate required fields
-                brand = row.get('brand', '').strip()
-                model = row.get('model', '').strip()
-                
-                if not brand or not model:
-                    errors.append(f"Row {row_num}: Brand and Model are required")
-                    failed_imports += 1
-                    continue
-                
-                # Check if phone spec already exists
-                existing_spec = await db.phone_specs.find_one({
-                    "brand": brand,
-                    "model": model
-                })
-                
-                if existing_spec:
-                    errors.append(f"Row {row_num}: {brand} {model} already exists")
-                    failed_imports += 1
-                    continue
-                
-                # Extract price values
-                price_pkr = None
-                price_usd = None
-                
-                try:
-                    if row.get('price_pkr'):
-                        price_pkr = int(str(row['price_pkr']).replace(',', '').replace('Rs', '').replace('PKR', '').strip())
-                except:
-                    pass
-                    
-                try:
-                    if row.get('price_usd'):
-                        price_usd = int(str(row['price_usd']).replace(',', '').replace('$', '').replace('USD', '').strip())
-                except:
-                    pass
-                
-                # Create phone spec document
-                new_spec = {
-                    "_id": str(uuid.uuid4()),
-                    "brand": brand,
-                    "model": model,
-                    
-                    # Build Information
-                    "os": row.get('os', '').strip() or None,
-                    "ui": row.get('ui', '').strip() or None,
-                    "dimensions": row.get('dimensions', '').strip() or None,
-                    "weight": row.get('weight', '').strip() or None,
-                    "sim": row.get('sim', '').strip() or None,
-                    "colors": row.get('colors', '').strip() or None,
-                    
-                    # Network & Frequency
-                    "network_2g": row.get('network_2g', '').strip() or None,
-                    "network_3g": row.get('network_3g', '').strip() or None,
-                    "network_4g": row.get('network_4g', '').strip() or None,
-                    "network_5g": row.get('network_5g', '').strip() or None,
-                    
-                    # Processor
-                    "cpu": row.get('cpu', '').strip() or None,
-                    "chipset": row.get('chipset', '').strip() or None,
-                    "gpu": row.get('gpu', '').strip() or None,
-                    
-                    # Display
-                    "display_technology": row.get('display_technology', '').strip() or None,
-                    "display_size": row.get('display_size', '').strip() or None,
-                    "display_resolution": row.get('display_resolution', '').strip() or None,
-                    "display_features": row.get('display_features', '').strip() or None,
-                    
-                    # Memory
-                    "storage": row.get('storage', '').strip() or None,
-                    "ram": row.get('ram', '').strip() or None,
-                    "card_slot": row.get('card_slot', '').strip() or None,
-                    
-                    # Camera
-                    "main_camera": row.get('main_camera', '').strip() or None,
-                    "camera_features": row.get('camera_features', '').strip() or None,
-                    "front_camera": row.get('front_camera', '').strip() or None,
-                    
-                    # Connectivity
-                    "wlan": row.get('wlan', '').strip() or None,
-                    "bluetooth": row.get('bluetooth', '').strip() or None,
-                    "gps": row.get('gps', '').strip() or None,
-                    "radio": row.get('radio', '').strip() or None,
-                    "usb": row.get('usb', '').strip() or None,
-                    "nfc": row.get('nfc', '').strip() or None,
-                    "infrared": row.get('infrared', '').strip() or None,
-                    
-                    # Features
-                    "sensors": row.get('sensors', '').strip() or None,
-                    "audio": row.get('audio', '').strip() or None,
-                    "browser": row.get('browser', '').strip() or None,
-                    "messaging": row.get('messaging', '').strip() or None,
-                    "games": row.get('games', '').strip() or None,
-                    "torch": row.get('torch', '').strip() or None,
-                    "extra_features": row.get('extra_features', '').strip() or None,
-                    
-                    # Battery
-                    "battery_capacity": row.get('battery_capacity', '').strip() or None,
-                    "charging": row.get('charging', '').strip() or None,
-                    
-                    # Pricing
-                    "price_pkr": price_pkr,
-                    "price_usd": price_usd,
-                    
-                    # Legacy fields for backward compatibility
-                    "display_size_legacy": row.get('display_size', '').strip() or None,
-                    "camera_mp": row.get('camera_mp', '').strip() or None,
-                    "battery_mah": row.get('battery_mah', '').strip() or None,
-                    "storage_gb": row.get('storage_gb', '').strip() or None,
-                    "ram_gb": row.get('ram_gb', '').strip() or None,
-                    "processor": row.get('processor', '').strip() or None,
-                    "operating_system": row.get('operating_system', '').strip() or None,
-                    "price_range_min": price_pkr,
-                    "price_range_max": price_pkr,
-                    "release_year": int(row.get('release_year', datetime.now().year)) if row.get('release_year') else datetime.now().year,
-                    
-                    "created_at": datetime.utcnow(),
-                    "updated_at": datetime.utcnow()
-                }
-                
-                # Insert into database
-                result = await db.phone_specs.insert_one(new_spec)
-                
-                if result.inserted_id:
-                    successful_imports += 1
-                    imported_specs.append(f"{brand} {model}")
-                else:
-                    errors.append(f"Row {row_num}: Failed to insert {brand} {model}")
-                    failed_imports += 1
-                    
-            except Exception as e:
-                errors.append(f"Row {row_num}: {str(e)}")
-                failed_imports += 1
-                logger.error(f"Error processing row {row_num}: {str(e)}")
+        # Persist the upload so the job can read it (and resume after a restart)
+        # Spreadsheets are not served back, so only the size is limited, not the type
+        url = await store_upload(file, private=True, check_type=False, max_bytes=MAX_IMPORT_BYTES)
+        job = await job_runner.submit("phone_specs_import", {
+            "blob": blob_id(url),
+            "filename": file.filename
+        })
         
         return CSVUploadResponse(
             success=True,
-            total_rows=total_rows,
-            successful_imports=successful_imports,
-            failed_imports=failed_imports,
-            errors=errors[:50],  # Limit errors to first 50 to avoid huge responses
-            imported_specs=imported_specs
+            total_rows=0,
+            successful_imports=0,
+            failed_imports=0,
+            status="in_progress",
+            job_id=job["_id"]
         )
         
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error in bulk import: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to process CSV file: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to process import file: {str(e)}")
 
 # Download CSV Template Endpoint
 @api_router.get("/phone-specs/csv-template")
@@ -1627,6 +1952,8 @@ async def get_external_brands():
     try:
         brands = await phone_api_client.get_brands()
         return {"success": True, "brands": brands, "count": len(brands)}
+    except CircuitOpenError:
+        raise HTTPException(status_code=503, detail="Phone specifications API is temporarily unavailable")
     except Exception as e:
         logger.error(f"Error fetching external brands: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch brands from external API")
@@ -1637,6 +1964,8 @@ async def get_external_brand_phones(brand_name: str):
     try:
         phones = await phone_api_client.get_brand_phones(brand_name)
         return {"success": True, "brand": brand_name, "phones": phones, "count": len(phones)}
+    except CircuitOpenError:
+        raise HTTPException(status_code=503, detail="Phone specifications API is temporarily unavailable")
     except Exception as e:
         logger.error(f"Error fetching phones for brand {brand_name}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch phones for brand {brand_name}")
@@ -1647,91 +1976,106 @@ async def get_external_phone_details(phone_name: str):
     try:
         phone_details = await phone_api_client.get_phone_details(phone_name)
         return {"success": True, "phone": phone_details}
+    except CircuitOpenError:
+        raise HTTPException(status_code=503, detail="Phone specifications API is temporarily unavailable")
     except Exception as e:
         logger.error(f"Error fetching phone details for {phone_name}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch phone details for {phone_name}")
 
+def build_sync_pipeline() -> CatalogSyncPipeline:
+    """Sync pipeline shared by all /phone-api/sync endpoints"""
+    return CatalogSyncPipeline(
+        db.phone_specs,
+        phone_api_client,
+        transform_api_phone_to_db_format,
+        concurrency=SYNC_CONCURRENCY,
+        rate_per_second=SYNC_RATE_PER_SECOND,
+        batch_size=SYNC_BATCH_SIZE,
+        watermarks=db.sync_watermarks
+    )
+
+async def run_catalog_sync_job(context: JobContext) -> Dict[str, Any]:
+    """Job handler syncing the requested brands (all API brands when none are given)"""
+    brand_names = context.params.get("brands")
+    if brand_names is None:
+        brands = await phone_api_client.get_brands()
+        brand_names = [brand_info.get("brand_name", "") for brand_info in brands if brand_info.get("brand_name")]
+    
+    state = context.checkpoint or {
+        "completed_brands": [], "total_phones": 0, "successful_imports": 0,
+        "failed_imports": 0, "errors": [], "imported_phones": []
+    }
+    for counter in ("inserted", "updated", "unchanged"):
+        state.setdefault(counter, 0)
+    remaining = [brand for brand in brand_names if brand not in state["completed_brands"]]
+    pipeline = build_sync_pipeline()
+    
+    for i in range(0, len(remaining), SYNC_BRANDS_PER_STEP):
+        await context.check_cancelled()
+        group = remaining[i:i + SYNC_BRANDS_PER_STEP]
+        result = await pipeline.sync_brands(group)
+        if result.successful_imports:
+            await platform_stats.apply(
+                counter_delta({}, {"phone_models": result.inserted, "api_phones": result.inserted}),
+                last_sync=datetime.utcnow()
+            )
+        if result.inserted or result.updated:
+            compare_catalog.mark_dirty()
+            spec_catalog.mark_dirty()
+            await invalidation_bus.notify("phone_specs", ChangeOperation.INVALIDATE)
+        
+        state["completed_brands"].extend(group)
+        state["total_phones"] += result.total_phones
+        state["successful_imports"] += result.successful_imports
+        state["failed_imports"] += result.failed_imports
+        state["inserted"] += result.inserted
+        state["updated"] += result.updated
+        state["unchanged"] += result.unchanged
+        state["errors"] = (state["errors"] + result.errors)[:50]
+        state["imported_phones"] = (state["imported_phones"] + result.imported_phones)[:50]
+        
+        await context.save_checkpoint(state)
+        await context.update_progress(
+            total_brands=len(brand_names),
+            completed_brands=len(state["completed_brands"]),
+            total_phones=state["total_phones"],
+            successful_imports=state["successful_imports"],
+            failed_imports=state["failed_imports"],
+            inserted=state["inserted"],
+            updated=state["updated"],
+            unchanged=state["unchanged"]
+        )
+    
+    return PhoneAPISyncResponse(
+        success=state["successful_imports"] > 0,
+        total_brands=len(brand_names),
+        total_phones=state["total_phones"],
+        successful_imports=state["successful_imports"],
+        failed_imports=state["failed_imports"],
+        errors=state["errors"][:20],
+        imported_phones=state["imported_phones"],
+        inserted=state["inserted"],
+        updated=state["updated"],
+        unchanged=state["unchanged"],
+        status="completed"
+    ).dict()
+
 @api_router.post("/phone-api/sync/brand/{brand_name}", response_model=BrandSyncResponse)
-async def sync_brand_from_api(brand_name: str):
-    """Sync all phones for a specific brand from Phone Specifications API"""
+async def sync_brand_from_api(brand_name: str, current_user: dict = Depends(get_current_user)):
+    """Start a background sync of all phones for a specific brand (Admin only)"""
+    if current_user["role"] != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required")
     try:
-        # Get all phones for the brand
-        phones = await phone_api_client.get_brand_phones(brand_name)
-        
-        if not phones:
-            return BrandSyncResponse(
-                success=False,
-                brand=brand_name,
-                total_phones=0,
-                successful_imports=0,
-                failed_imports=0,
-                errors=[f"No phones found for brand {brand_name}"]
-            )
-        
-        successful_imports = 0
-        failed_imports = 0
-        errors = []
-        
-        # Process each phone
-        for phone in phones:
-            try:
-                device_name = phone.get("DeviceName", "")
-                if not device_name:
-                    failed_imports += 1
-                    errors.append(f"Phone has no device name")
-                    continue
-                
-                # Get detailed specifications (for mock API, we already have the data)
-                phone_details = await phone_api_client.get_phone_details(device_name)
-                
-                if not phone_details:
-                    failed_imports += 1
-                    errors.append(f"Failed to fetch details for {device_name}")
-                    continue
-                
-                # Transform to our database format
-                db_document = transform_api_phone_to_db_format(phone_details)
-                
-                if not db_document:
-                    failed_imports += 1
-                    errors.append(f"Failed to transform {device_name}")
-                    continue
-                
-                # Check if phone already exists
-                existing_phone = await db.phone_specs.find_one({
-                    "brand": db_document["brand"],
-                    "model": db_document["model"]
-                })
-                
-                if existing_phone:
-                    # Update existing phone (exclude _id from the update)
-                    update_doc = {k: v for k, v in db_document.items() if k != '_id'}
-                    update_doc['updated_at'] = datetime.utcnow()
-                    await db.phone_specs.update_one(
-                        {"_id": existing_phone["_id"]},
-                        {"$set": update_doc}
-                    )
-                else:
-                    # Insert new phone
-                    await db.phone_specs.insert_one(db_document)
-                
-                successful_imports += 1
-                
-                # Add small delay to avoid overwhelming the API
-                await asyncio.sleep(0.1)
-                
-            except Exception as e:
-                failed_imports += 1
-                errors.append(f"Error processing {phone.get('DeviceName', 'Unknown')}: {str(e)}")
-                logger.error(f"Error processing phone {phone.get('DeviceName', 'Unknown')}: {str(e)}")
+        job = await job_runner.submit("catalog_sync", {"brands": [brand_name]})
         
         return BrandSyncResponse(
-            success=successful_imports > 0,
+            success=True,
             brand=brand_name,
-            total_phones=len(phones),
-            successful_imports=successful_imports,
-            failed_imports=failed_imports,
-            errors=errors[:10]  # Limit error messages
+            total_phones=0,
+            successful_imports=0,
+            failed_imports=0,
+            status="in_progress",
+            job_id=job["_id"]
         )
         
     except Exception as e:
@@ -1739,98 +2083,23 @@ async def sync_brand_from_api(brand_name: str):
         raise HTTPException(status_code=500, detail=f"Failed to sync brand {brand_name}")
 
 @api_router.post("/phone-api/sync/popular-brands", response_model=PhoneAPISyncResponse)
-async def sync_popular_brands():
-    """Sync phones from popular brands (Apple, Samsung, Google, OnePlus, Xiaomi)"""
+async def sync_popular_brands(current_user: dict = Depends(get_current_user)):
+    """Start a background sync of popular brands (Apple, Samsung, Google, OnePlus, Xiaomi) (Admin only)"""
+    if current_user["role"] != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required")
     try:
         popular_brands = ["Apple", "Samsung", "Google"]  # Start with fewer brands for testing
         
-        total_brands = len(popular_brands)
-        total_phones = 0
-        successful_imports = 0
-        failed_imports = 0
-        errors = []
-        imported_phones = []
-        
-        for brand_name in popular_brands:
-            try:
-                logger.info(f"Syncing brand: {brand_name}")
-                
-                # Get phones for this brand
-                phones = await phone_api_client.get_brand_phones(brand_name)
-                
-                if not phones:
-                    errors.append(f"No phones found for brand {brand_name}")
-                    continue
-                
-                # Process all phones for the brand
-                total_phones += len(phones)
-                
-                for phone in phones:
-                    try:
-                        device_name = phone.get("DeviceName", "Unknown")
-                        
-                        if not device_name or device_name == "Unknown":
-                            failed_imports += 1
-                            continue
-                        
-                        # Get detailed specifications
-                        phone_details = await phone_api_client.get_phone_details(device_name)
-                        
-                        if not phone_details:
-                            failed_imports += 1
-                            continue
-                        
-                        # Transform to our database format
-                        db_document = transform_api_phone_to_db_format(phone_details)
-                        
-                        if not db_document:
-                            failed_imports += 1
-                            continue
-                        
-                        # Check if phone already exists
-                        existing_phone = await db.phone_specs.find_one({
-                            "brand": db_document["brand"],
-                            "model": db_document["model"]
-                        })
-                        
-                        if existing_phone:
-                            # Update existing phone (exclude _id from the update)
-                            update_doc = {k: v for k, v in db_document.items() if k != '_id'}
-                            update_doc['updated_at'] = datetime.utcnow()
-                            await db.phone_specs.update_one(
-                                {"_id": existing_phone["_id"]},
-                                {"$set": update_doc}
-                            )
-                        else:
-                            # Insert new phone
-                            await db.phone_specs.insert_one(db_document)
-                        
-                        successful_imports += 1
-                        imported_phones.append(f"{db_document['brand']} {db_document['model']}")
-                        
-                        # Small delay between requests
-                        await asyncio.sleep(0.1)
-                        
-                    except Exception as e:
-                        failed_imports += 1
-                        logger.error(f"Error processing phone {device_name}: {str(e)}")
-                
-                # Delay between brands
-                await asyncio.sleep(0.5)
-                
-            except Exception as e:
-                errors.append(f"Error syncing brand {brand_name}: {str(e)}")
-                logger.error(f"Error syncing brand {brand_name}: {str(e)}")
+        job = await job_runner.submit("catalog_sync", {"brands": popular_brands})
         
         return PhoneAPISyncResponse(
-            success=successful_imports > 0,
-            total_brands=total_brands,
-            total_phones=total_phones,
-            successful_imports=successful_imports,
-            failed_imports=failed_imports,
-            errors=errors[:10],
-            imported_phones=imported_phones[:20],  # Limit response size
-            status="completed"
+            success=True,
+            total_brands=len(popular_brands),
+            total_phones=0,
+            successful_imports=0,
+            failed_imports=0,
+            status="in_progress",
+            job_id=job["_id"]
         )
         
     except Exception as e:
@@ -1838,8 +2107,10 @@ async def sync_popular_brands():
         raise HTTPException(status_code=500, detail="Failed to sync popular brands")
 
 @api_router.post("/phone-api/sync/all-brands", response_model=PhoneAPISyncResponse)
-async def sync_all_brands():
-    """Sync phones from ALL available brands (1000+ phones)"""
+async def sync_all_brands(current_user: dict = Depends(get_current_user)):
+    """Start a background sync of ALL available brands (1000+ phones) (Admin only)"""
+    if current_user["role"] != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required")
     try:
         # Get all available brands
         brands = await phone_api_client.get_brands()
@@ -1856,100 +2127,16 @@ async def sync_all_brands():
                 status="failed"
             )
         
-        total_brands = len(brands)
-        total_phones = 0
-        successful_imports = 0
-        failed_imports = 0
-        errors = []
-        imported_phones = []
-        
-        # Process all brands
-        for brand_info in brands:
-            try:
-                brand_name = brand_info.get("brand_name", "")
-                expected_count = brand_info.get("device_count", 0)
-                
-                logger.info(f"Syncing brand: {brand_name} (expected {expected_count} phones)")
-                
-                # Get phones for this brand
-                phones = await phone_api_client.get_brand_phones(brand_name)
-                
-                if not phones:
-                    errors.append(f"No phones found for brand {brand_name}")
-                    continue
-                
-                # Process all phones for this brand
-                total_phones += len(phones)
-                
-                for phone in phones:
-                    try:
-                        device_name = phone.get("DeviceName", "Unknown")
-                        
-                        if not device_name or device_name == "Unknown":
-                            failed_imports += 1
-                            continue
-                        
-                        # Get detailed specifications
-                        phone_details = await phone_api_client.get_phone_details(device_name)
-                        
-                        if not phone_details:
-                            failed_imports += 1
-                            continue
-                        
-                        # Transform to our database format
-                        db_document = transform_api_phone_to_db_format(phone_details)
-                        
-                        if not db_document:
-                            failed_imports += 1
-                            continue
-                        
-                        # Check if phone already exists
-                        existing_phone = await db.phone_specs.find_one({
-                            "brand": db_document["brand"],
-                            "model": db_document["model"]
-                        })
-                        
-                        if existing_phone:
-                            # Update existing phone (exclude _id from the update)
-                            update_doc = {k: v for k, v in db_document.items() if k != '_id'}
-                            update_doc['updated_at'] = datetime.utcnow()
-                            await db.phone_specs.update_one(
-                                {"_id": existing_phone["_id"]},
-                                {"$set": update_doc}
-                            )
-                        else:
-                            # Insert new phone
-                            await db.phone_specs.insert_one(db_document)
-                        
-                        successful_imports += 1
-                        imported_phones.append(f"{db_document['brand']} {db_document['model']}")
-                        
-                        # Small delay between requests to avoid overwhelming system
-                        await asyncio.sleep(0.05)
-                        
-                    except Exception as e:
-                        failed_imports += 1
-                        logger.error(f"Error processing phone {device_name}: {str(e)}")
-                
-                # Log progress
-                logger.info(f"Completed {brand_name}: {len(phones)} phones processed")
-                
-                # Small delay between brands
-                await asyncio.sleep(0.2)
-                
-            except Exception as e:
-                errors.append(f"Error syncing brand {brand_name}: {str(e)}")
-                logger.error(f"Error syncing brand {brand_name}: {str(e)}")
+        job = await job_runner.submit("catalog_sync", {"brands": None})
         
         return PhoneAPISyncResponse(
-            success=successful_imports > 0,
-            total_brands=total_brands,
-            total_phones=total_phones,
-            successful_imports=successful_imports,
-            failed_imports=failed_imports,
-            errors=errors[:20],  # Limit error messages
-            imported_phones=imported_phones[:50],  # Limit response size
-            status="completed"
+            success=True,
+            total_brands=len(brands),
+            total_phones=0,
+            successful_imports=0,
+            failed_imports=0,
+            status="in_progress",
+            job_id=job["_id"]
         )
         
     except Exception as e:
@@ -1960,24 +2147,15 @@ async def sync_all_brands():
 async def get_sync_status():
     """Get current sync status and statistics"""
     try:
-        # Count phones by source
-        api_phones_count = await db.phone_specs.count_documents({"source": "phone_specs_api"})
-        manual_phones_count = await db.phone_specs.count_documents({"source": {"$ne": "phone_specs_api"}})
-        total_phones_count = await db.phone_specs.count_documents({})
-        
-        # Get latest sync date
-        latest_sync = await db.phone_specs.find_one(
-            {"source": "phone_specs_api"},
-            sort=[("created_at", -1)]
-        )
+        stats = await platform_stats.read()
         
         return {
             "success": True,
             "stats": {
-                "total_phones": total_phones_count,
-                "api_phones": api_phones_count,
-                "manual_phones": manual_phones_count,
-                "last_sync": latest_sync.get("created_at") if latest_sync else None
+                "total_phones": stats.get("phone_models", 0),
+                "api_phones": stats.get("api_phones", 0),
+                "manual_phones": stats.get("manual_phones", 0),
+                "last_sync": stats.get("last_sync")
             }
         }
         
@@ -1985,13 +2163,158 @@ async def get_sync_status():
         logger.error(f"Error getting sync status: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to get sync status")
 
+@api_router.get("/phone-api/sync/watermarks")
+async def get_sync_watermarks():
+    """Per-brand sync watermarks: last sync, last change and the last run's counts"""
+    try:
+        watermarks = await db.sync_watermarks.find().sort("_id", 1).to_list(length=None)
+        return {"success": True, "brands": [{"brand": watermark.pop("_id"), **watermark} for watermark in watermarks]}
+    except Exception as e:
+        logger.error(f"Error getting sync watermarks: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to get sync watermarks")
+
+# Background Job Endpoints
+class JobSubmitRequest(BaseModel):
+    type: str
+    params: Dict[str, Any] = {}
+
+@api_router.post("/jobs")
+async def submit_job(request: JobSubmitRequest, current_user: dict = Depends(get_current_user)):
+    """Submit a background job (Admin only)"""
+    if current_user["role"] != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    try:
+        return await job_runner.submit(request.type, request.params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error submitting job: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to submit job")
+
+@api_router.get("/jobs")
+async def list_jobs(status: Optional[str] = None, limit: int = Query(50, ge=1, le=200),
+                    current_user: dict = Depends(get_current_user)):
+    """List background jobs, newest first (Admin only)"""
+    if current_user["role"] != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    try:
+        jobs = await job_runner.list(status=status, limit=limit)
+        return {"jobs": jobs, "count": len(jobs)}
+    except Exception as e:
+        logger.error(f"Error listing jobs: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to list jobs")
+
+@api_router.get("/jobs/{job_id}")
+async def get_job(job_id: str, current_user: dict = Depends(get_current_user)):
+    """Get a background job's status, progress and result (Admin only)"""
+    if current_user["role"] != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    job = await job_runner.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@api_router.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str, current_user: dict = Depends(get_current_user)):
+    """Cancel a queued job or stop a running one at its next checkpoint (Admin only)"""
+    if current_user["role"] != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    job = await job_runner.cancel(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+job_runner.register("catalog_sync", run_catalog_sync_job)
+job_runner.register("phone_specs_import", run_phone_specs_import_job, cleanup_phone_specs_import_job)
+
+@api_router.get("/admin/password-hasher/stats")
+async def get_password_hasher_stats(current_user: dict = Depends(get_current_user)):
+    """Password executor queue depth and timings (Admin only)"""
+    if current_user["role"] != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return password_hasher.stats()
+
+@api_router.get("/admin/indexes")
+async def get_index_report(current_user: dict = Depends(get_current_user)):
+    """Declared vs existing indexes with $indexStats usage; flags missing, unused and undeclared ones (Admin only)"""
+    if current_user["role"] != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    try:
+        return await index_report(db)
+    except Exception as e:
+        logger.error(f"Error building index report: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to build index report")
+
+@api_router.get("/admin/leader")
+async def get_leader_status(current_user: dict = Depends(get_current_user)):
+    """Which worker process holds the background lease and whether it is this one (Admin only)"""
+    if current_user["role"] != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    try:
+        return {"pid": os.getpid(), **await leader_election.stats()}
+    except Exception as e:
+        logger.error(f"Error reading leader lease: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to read leader status")
+
+@api_router.get("/admin/slow-commands")
+async def get_slow_commands(limit: int = 50, current_user: dict = Depends(get_current_user)):
+    """Latest MongoDB commands over SLOW_COMMAND_MS and their shapes with explain plans, for this worker (Admin only)"""
+    if current_user["role"] != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return {"pid": os.getpid(), **slow_command_log.report(limit=max(0, min(limit, 500)))}
+
+@api_router.delete("/admin/slow-commands")
+async def clear_slow_commands(current_user: dict = Depends(get_current_user)):
+    """Forget captured slow commands, e.g. after adding an index (Admin only)"""
+    if current_user["role"] != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    slow_command_log.clear()
+    return {"success": True}
+
+@api_router.get("/admin/invalidation/stats")
+async def get_invalidation_stats(current_user: dict = Depends(get_current_user)):
+    """Mode and event counters of the cross-worker cache invalidation bus (Admin only)"""
+    if current_user["role"] != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return invalidation_bus.stats()
+
+@api_router.get("/admin/spec-catalog/stats")
+async def get_spec_catalog_stats(current_user: dict = Depends(get_current_user)):
+    """Size and freshness of the listing form's brand/model index (Admin only)"""
+    if current_user["role"] != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return spec_catalog.stats()
+
+@api_router.get("/admin/phone-api/stats")
+async def get_phone_api_stats(current_user: dict = Depends(get_current_user)):
+    """External phone API connection pool, retry and circuit breaker counters (Admin only)"""
+    if current_user["role"] != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return await phone_api_client.stats()
+
+@api_router.post("/admin/phone-api/cache/clear")
+async def clear_phone_api_cache(namespace: Optional[str] = None, current_user: dict = Depends(get_current_user)):
+    """Drop cached phone API responses, optionally only one namespace (Admin only)"""
+    if current_user["role"] != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    if phone_api_client.cache is None:
+        return {"success": True, "cleared": 0}
+    try:
+        cleared = await phone_api_client.cache.invalidate(namespace)
+        return {"success": True, "cleared": cleared}
+    except Exception as e:
+        logger.error(f"Error clearing phone API cache: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to clear phone API cache")
+
 # Admin User Management Endpoints
 @api_router.get("/admin/users")
 async def get_admin_users(
+    response: Response,
     role: Optional[str] = None,
     verification_status: Optional[str] = None,
     limit: int = 50,
-    offset: int = 0
+    offset: int = 0,
+    cursor: Optional[str] = None
 ):
     """Get all users for admin management with optional filtering"""
     try:
@@ -2006,7 +2329,16 @@ async def get_admin_users(
         total_count = await db.users.count_documents(filter_query)
         
         # Get users with pagination, sorted by newest first
-        users = await db.users.find(filter_query).sort("created_at", -1).skip(offset).limit(limit).to_list(length=limit)
+        sort_field, sort_direction = LISTING_SORT_ORDERS["newest"]
+        sort_criteria = [(sort_field, sort_direction), ("_id", sort_direction)]
+        if cursor:
+            page_query = {**filter_query, **build_keyset_filter(sort_field, sort_direction, cursor, "newest")}
+            users = await db.users.find(page_query).sort(sort_criteria).limit(limit).to_list(length=limit)
+        else:
+            users = await db.users.find(filter_query).sort(sort_criteria).skip(offset).limit(limit).to_list(length=limit)
+        
+        if users and len(users) == limit:
+            response.headers[NEXT_CURSOR_HEADER] = keyset_cursor("newest", sort_field, users[-1])
         
         # Serialize ObjectIds and remove sensitive data
         for user in users:
@@ -2022,6 +2354,8 @@ async def get_admin_users(
             "limit": limit
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching admin users: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch users")
@@ -2056,16 +2390,24 @@ async def update_user(user_id: str, update_data: dict):
             raise HTTPException(status_code=400, detail="No valid data provided for update")
         
         # Update user
-        result = await db.users.update_one(
+        previous = await db.users.find_one_and_update(
             {"_id": ObjectId(user_id)},
-            {"$set": cleaned_data}
+            {"$set": cleaned_data},
+            return_document=ReturnDocument.BEFORE
         )
         
-        if result.matched_count == 0:
+        user_principal_cache.invalidate(user_id)
+        await invalidation_bus.notify("users", ChangeOperation.UPDATE, user_id)
+        if previous is None:
             raise HTTPException(status_code=404, detail="User not found")
+        await platform_stats.apply(counter_delta(user_counters(previous), user_counters({**previous, **cleaned_data})))
         
         return {"message": "User updated successfully", "user_id": user_id}
         
+    except HTTPException:
+        raise
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Email already registered")
     except Exception as e:
         logger.error(f"Error updating user: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to update user")
@@ -2075,7 +2417,7 @@ async def approve_shop_owner(user_id: str, approval_data: dict = None):
     """Approve a shop owner account"""
     try:
         # Update user verification status
-        result = await db.users.update_one(
+        previous = await db.users.find_one_and_update(
             {"_id": ObjectId(user_id), "role": "shop_owner"},
             {
                 "$set": {
@@ -2083,14 +2425,18 @@ async def approve_shop_owner(user_id: str, approval_data: dict = None):
                     "approved_at": datetime.utcnow(),
                     "approval_notes": approval_data.get("notes", "") if approval_data else ""
                 }
-            }
+            },
+            return_document=ReturnDocument.BEFORE
         )
         
-        if result.matched_count == 0:
+        user_principal_cache.invalidate(user_id)
+        await invalidation_bus.notify("users", ChangeOperation.UPDATE, user_id)
+        if previous is None:
             raise HTTPException(status_code=404, detail="Shop owner not found")
-        
-        # Get updated user data for notification
-        user = await db.users.find_one({"_id": ObjectId(user_id)})
+        await platform_stats.apply(counter_delta(
+            user_counters(previous),
+            user_counters({**previous, "verification_status": VerificationStatus.APPROVED})
+        ))
         
         return {"message": "Shop owner approved successfully", "user_id": user_id}
         
@@ -2103,7 +2449,7 @@ async def reject_shop_owner(user_id: str, rejection_data: dict):
     """Reject a shop owner account"""
     try:
         # Update user verification status
-        result = await db.users.update_one(
+        previous = await db.users.find_one_and_update(
             {"_id": ObjectId(user_id), "role": "shop_owner"},
             {
                 "$set": {
@@ -2112,11 +2458,18 @@ async def reject_shop_owner(user_id: str, rejection_data: dict):
                     "rejection_reason": rejection_data.get("reason", ""),
                     "rejection_notes": rejection_data.get("notes", "")
                 }
-            }
+            },
+            return_document=ReturnDocument.BEFORE
         )
         
-        if result.matched_count == 0:
+        user_principal_cache.invalidate(user_id)
+        await invalidation_bus.notify("users", ChangeOperation.UPDATE, user_id)
+        if previous is None:
             raise HTTPException(status_code=404, detail="Shop owner not found")
+        await platform_stats.apply(counter_delta(
+            user_counters(previous),
+            user_counters({**previous, "verification_status": VerificationStatus.REJECTED})
+        ))
         
         return {"message": "Shop owner rejected", "user_id": user_id}
         
@@ -2185,13 +2538,13 @@ async def get_featured_shops():
 async def register_normal_user(user_data: UserRegistration):
     """Register a normal user"""
     try:
-        # Check if user already exists
-        existing_user = await db.users.find_one({"email": user_data.email})
+        # Early exit before hashing; the unique email index is what guarantees one account per email
+        existing_user = await db.users.find_one({"email": user_data.email}, {"_id": 1})
         if existing_user:
             raise HTTPException(status_code=400, detail="Email already registered")
         
         # Hash password
-        hashed_password = hash_password(user_data.password)
+        hashed_password = await hash_password(user_data.password)
         
         # Create user document
         user_doc = {
@@ -2206,8 +2559,12 @@ async def register_normal_user(user_data: UserRegistration):
         }
         
         # Insert user
-        result = await db.users.insert_one(user_doc)
+        try:
+            result = await db.users.insert_one(user_doc)
+        except DuplicateKeyError:
+            raise HTTPException(status_code=400, detail="Email already registered")
         user_id = str(result.inserted_id)
+        await platform_stats.apply(user_counters(user_doc))
         
         # Create access token
         access_token = create_access_token(data={"sub": user_id})
@@ -2220,6 +2577,8 @@ async def register_normal_user(user_data: UserRegistration):
     except HTTPException:
         # Re-raise HTTP exceptions (like 400 for duplicate email)
         raise
+    except PasswordHasherBusy:
+        raise HTTPException(status_code=503, detail="Server is busy, please try again", headers={"Retry-After": "1"})
     except Exception as e:
         logger.error(f"Error registering user: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to register user")
@@ -2242,34 +2601,28 @@ async def register_shop_owner(
 ):
     """Register a shop owner with business details and KYC documents"""
     try:
-        # Check if user already exists
-        existing_user = await db.users.find_one({"email": email})
+        # Early exit before hashing and storing documents; the unique email index decides races
+        existing_user = await db.users.find_one({"email": email}, {"_id": 1})
         if existing_user:
             raise HTTPException(status_code=400, detail="Email already registered")
         
         # Hash password
-        hashed_password = hash_password(password)
+        hashed_password = await hash_password(password)
         
-        # Process uploaded files (convert to base64)
+        # Stream uploaded files into the blob store as private blobs; the user document keeps only their URLs
         kyc_documents = {}
         
         # Process business license (required)
         if businessLicense:
-            business_license_content = await businessLicense.read()
-            business_license_b64 = base64.b64encode(business_license_content).decode('utf-8')
-            kyc_documents["business_license"] = f"data:{businessLicense.content_type};base64,{business_license_b64}"
+            kyc_documents["business_license"] = await store_upload(businessLicense, private=True)
         
         # Process CNIC front (optional)
         if cnicFront:
-            cnic_front_content = await cnicFront.read()
-            cnic_front_b64 = base64.b64encode(cnic_front_content).decode('utf-8')
-            kyc_documents["cnic_front"] = f"data:{cnicFront.content_type};base64,{cnic_front_b64}"
+            kyc_documents["cnic_front"] = await store_upload(cnicFront, private=True)
         
         # Process CNIC back (optional)
         if cnicBack:
-            cnic_back_content = await cnicBack.read()
-            cnic_back_b64 = base64.b64encode(cnic_back_content).decode('utf-8')
-            kyc_documents["cnic_back"] = f"data:{cnicBack.content_type};base64,{cnic_back_b64}"
+            kyc_documents["cnic_back"] = await store_upload(cnicBack, private=True)
         
         # Create user document
         user_doc = {
@@ -2292,7 +2645,11 @@ async def register_shop_owner(
         }
         
         # Insert user
-        result = await db.users.insert_one(user_doc)
+        try:
+            result = await db.users.insert_one(user_doc)
+        except DuplicateKeyError:
+            raise HTTPException(status_code=400, detail="Email already registered")
+        await platform_stats.apply(user_counters(user_doc))
         
         return {
             "success": True,
@@ -2303,19 +2660,24 @@ async def register_shop_owner(
     except HTTPException:
         # Re-raise HTTP exceptions (like 400 for duplicate email)
         raise
+    except PasswordHasherBusy:
+        raise HTTPException(status_code=503, detail="Server is busy, please try again", headers={"Retry-After": "1"})
     except Exception as e:
         logger.error(f"Error registering shop owner: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to register shop owner")
 
 @api_router.post("/auth/login", response_model=LoginResponse)
-async def login(user_credentials: UserLogin):
+async def login(user_credentials: UserLogin, background_tasks: BackgroundTasks):
     """Login user"""
     try:
         # Find user by email
         user = await db.users.find_one({"email": user_credentials.email})
-        if not user or not verify_password(user_credentials.password, user["password"]):
+        if not user or not await verify_password(user_credentials.password, user["password"]):
             raise HTTPException(status_code=401, detail="Invalid email or password")
         
+        if password_hasher.needs_rehash(user["password"]):
+            background_tasks.add_task(rehash_password, user["_id"], user_credentials.password, user["password"])
+        
         if not user["is_active"]:
             raise HTTPException(status_code=401, detail="Account is disabled")
         
@@ -2330,13 +2692,15 @@ async def login(user_credentials: UserLogin):
         return LoginResponse(access_token=access_token, user=user_obj)
     except HTTPException:
         raise
+    except PasswordHasherBusy:
+        raise HTTPException(status_code=503, detail="Server is busy, please try again", headers={"Retry-After": "1"})
     except Exception as e:
         logger.error(f"Error during login: {str(e)}")
         raise HTTPException(status_code=500, detail="Login failed")
 
 @api_router.get("/auth/me", response_model=User)
 async def get_current_user_info(current_user: dict = Depends(get_current_user)):
-    """Get current user information"""
+    """Get current user information from the cached principal (KYC documents are only served to admins)"""
     return User(**current_user)
 
 @api_router.put("/auth/verify-shop-owner/{user_id}")
@@ -2352,13 +2716,18 @@ async def verify_shop_owner(user_id: str, status: VerificationStatus, current_us
             raise HTTPException(status_code=400, detail="Invalid user ID")
         
         # Update verification status
-        result = await db.users.update_one(
+        previous = await db.users.find_one_and_update(
             {"_id": ObjectId(user_id), "role": UserRole.SHOP_OWNER},
-            {"$set": {"verification_status": status, "updated_at": datetime.utcnow()}}
+            {"$set": {"verification_status": status, "updated_at": datetime.utcnow()}},
+            return_document=ReturnDocument.BEFORE
         )
         
-        if result.matched_count == 0:
+        user_principal_cache.invalidate(user_id)
+        await invalidation_bus.notify("users", ChangeOperation.UPDATE, user_id)
+        
+        if previous is None:
             raise HTTPException(status_code=404, detail="Shop owner not found")
+        await platform_stats.apply(counter_delta(user_counters(previous), user_counters({**previous, "verification_status": status})))
         
         return {"success": True, "message": f"Shop owner verification status updated to {status}"}
     except HTTPException:
@@ -2835,8 +3204,16 @@ async def populate_sample_data():
         await db.accessories.delete_many({})
         
         # Insert sample listings
+        for listing in sample_listings:
+            listing["facets"] = build_listing_facets(listing)
+            listing["numeric"] = build_listing_numbers(listing)
+            listing["sort_date"] = listing_sort_date(listing)
         await db.phone_listings.insert_many(sample_listings)
         await db.accessories.insert_many(sample_accessories)
+        await rebuild_search_index()
+        await invalidation_bus.notify("phone_listings", ChangeOperation.INVALIDATE)
+        await invalidation_bus.notify("accessories", ChangeOperation.INVALIDATE)
+        await platform_stats.reconcile()
         
         return {
             "success": True, 
@@ -2860,13 +3237,22 @@ async def create_listing(listing: PhoneListingCreate):
                 "data:image/jpeg;base64,/9j/4AAQSkZJRgABAQAAAQABAAD/2wBDAAYEBQYFBAYGBQYHBwYIChAKCgkJChQODwwQFxQYGBcUFhYaHSUfGhsjHBYWICwgIyYnKSopGR8tMC0oMCUoKSj/2wBDAQcHBwoIChMKChMoGhYaKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCj/wAARCAABAAEDASIAAhEBAxEB/8QAFQABAQAAAAAAAAAAAAAAAAAAAAv/xAAUEAEAAAAAAAAAAAAAAAAAAAAA/8QAFQEBAQAAAAAAAAAAAAAAAAAAAAX/xAAUEQEAAAAAAAAAAAAAAAAAAAAA/9oADAMBAAIRAxEAPwCdABmX/9k="
             ]
         
+        # Keep inline photos out of the listing document
+        listing_dict["photos"] = [await store_data_uri(photo) for photo in listing_dict["photos"]]
+        
         listing_dict["created_at"] = datetime.utcnow()
         listing_dict["views"] = 0
         listing_dict["is_featured"] = False
         listing_dict["is_active"] = True
+        listing_dict["facets"] = build_listing_facets(listing_dict)
+        listing_dict["numeric"] = build_listing_numbers(listing_dict)
+        listing_dict["sort_date"] = listing_sort_date(listing_dict)
         
         # Insert into database
         result = await db.phone_listings.insert_one(listing_dict)
+        listing_search_index.add(listing_dict)
+        await invalidation_bus.notify("phone_listings", ChangeOperation.INSERT, listing_dict["_id"])
+        await platform_stats.apply(listing_counters(listing_dict))
         
         # Return success response with the listing ID
         return {
@@ -2874,11 +3260,13 @@ async def create_listing(listing: PhoneListingCreate):
             "message": "Listing created successfully!",
             "id": str(result.inserted_id)  # Changed from listing_id to id for consistency
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error creating listing: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to create listing")
 
-@api_router.get("/listings/featured", response_model=List[PhoneListing])
+@api_router.get("/listings/featured", response_model=List[PhoneListing], response_class=FastJSONResponse)
 async def get_featured_listings(limit: int = 4):
     """Get featured phone listings"""
     try:
@@ -2903,12 +3291,12 @@ async def get_featured_listings(limit: int = 4):
         for listing in featured_listings:
             listing = serialize_doc(listing)
         
-        return [PhoneListing(**listing) for listing in featured_listings]
+        return model_list_response(featured_listings, PhoneListing)
     except Exception as e:
         logger.error(f"Error fetching featured listings: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch featured listings")
 
-@api_router.get("/listings/recent", response_model=List[PhoneListing])
+@api_router.get("/listings/recent", response_model=List[PhoneListing], response_class=FastJSONResponse)
 async def get_recent_listings(limit: int = 8):
     """Get recent phone listings"""
     try:
@@ -2931,15 +3319,18 @@ async def get_recent_listings(limit: int = 8):
         for listing in recent_listings:
             listing = serialize_doc(listing)
         
-        return [PhoneListing(**listing) for listing in recent_listings]
+        return model_list_response(recent_listings, PhoneListing)
     except Exception as e:
         logger.error(f"Error fetching recent listings: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch recent listings")
 
-@api_router.get("/listings", response_model=List[PhoneListing])
+@api_router.get("/listings", response_model=List[PhoneListing], response_class=FastJSONResponse)
 async def get_listings(
+    response: Response,
     skip: int = 0, 
     limit: int = 50, 
+    # Keyset pagination: pass the X-Next-Cursor header of the previous page instead of skip
+    cursor: Optional[str] = None,
     # Basic filters
     city: Optional[str] = None, 
     brand: Optional[str] = None, 
@@ -2959,38 +3350,32 @@ async def get_listings(
     # Search query
     search: Optional[str] = None,
     # Sorting
-    sort_by: Optional[str] = "newest"  # newest, oldest, price_low, price_high, most_viewed
+    sort_by: Optional[str] = None,  # relevance, newest, oldest, price_low, price_high, most_viewed
+    # Numeric spec ranges (min_ram_gb, max_storage_gb, min_battery_mah, ...)
+    numeric_filter: Dict[str, Any] = Depends(numeric_spec_filter)
 ):
     """Get phone listings with advanced filters and sorting"""
     try:
         # Build query filter
         query = {"is_active": True}
         
-        # Basic filters
-        if city:
-            query["city"] = {"$regex": city, "$options": "i"}
-        if brand:
-            query["brand"] = {"$regex": brand, "$options": "i"}
-        if model:
-            query["model"] = {"$regex": model, "$options": "i"}
-        if condition:
-            query["condition"] = {"$regex": condition, "$options": "i"}
-        if color:
-            query["color"] = {"$regex": color, "$options": "i"}
-            
-        # Specification filters
-        if storage:
-            query["storage"] = {"$regex": storage, "$options": "i"}
-        if ram:
-            query["ram"] = {"$regex": ram, "$options": "i"}
-        if battery:
-            query["battery"] = {"$regex": battery, "$options": "i"}
-        if battery_health:
-            query["battery_health"] = {"$regex": battery_health, "$options": "i"}
-        if network:
-            query["network"] = {"$regex": network, "$options": "i"}
-        if seller_type:
-            query["seller_type"] = {"$regex": seller_type, "$options": "i"}
+        # Facet filters (matched against the normalized, indexed facet fields)
+        facet_values = {
+            "city": city,
+            "brand": brand,
+            "model": model,
+            "condition": condition,
+            "color": color,
+            "storage": storage,
+            "ram": ram,
+            "battery": battery,
+            "battery_health": battery_health,
+            "network": network,
+            "seller_type": seller_type
+        }
+        for field, value in facet_values.items():
+            if value:
+                query.update(build_facet_filter(field, value))
             
         # Price range filter
         if min_price is not None or max_price is not None:
@@ -3000,67 +3385,88 @@ async def get_listings(
             if max_price is not None:
                 price_filter["$lte"] = max_price
             query["price"] = price_filter
+        
+        # Numeric spec ranges (indexed numeric.* fields)
+        query.update(numeric_filter)
             
-        # Search across multiple fields (with fuzzy matching)
+        # Searches rank by relevance unless another order was requested
+        if sort_by is None:
+            sort_by = "relevance" if search else "newest"
+        
+        # Full-text search narrows the candidates to indexed matches
+        search_scores = None
         if search:
-            search_terms = search.lower().split()
-            search_conditions = []
-            
-            for term in search_terms:
-                # Fuzzy matching for common misspellings
-                fuzzy_term = term
-                if "iphone" in term or "iphne" in term or "ifone" in term:
-                    fuzzy_term = "iphone"
-                elif "samsung" in term or "samung" in term:
-                    fuzzy_term = "samsung"
-                elif "xiaomi" in term or "xiomi" in term:
-                    fuzzy_term = "xiaomi"
-                
-                search_regex = {"$regex": fuzzy_term, "$options": "i"}
-                search_conditions.append({
-                    "$or": [
-                        {"brand": search_regex},
-                        {"model": search_regex},
-                        {"description": search_regex},
-                        {"features": {"$elemMatch": {"$regex": fuzzy_term, "$options": "i"}}},
-                        {"processor": search_regex},
-                        {"operating_system": search_regex}
-                    ]
-                })
+            # Only relevance pages can stop at the best hits; sorted and filtered pages need every match
+            candidate_limit = SEARCH_CANDIDATE_LIMIT if sort_by == "relevance" else None
+            matches = listing_search_index.search(search, limit=candidate_limit)
+            if not matches:
+                return []
+            search_scores = {listing_id: score for listing_id, score in matches}
+            query["_id"] = {"$in": list(search_scores)}
+        
+        if search_scores is not None and sort_by == "relevance":
+            # Relevance ranks live in memory, so a relevance cursor is simply the next offset
+            offset = decode_cursor(cursor, "relevance") if cursor else skip
+            if not isinstance(offset, int) or offset < 0:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            matched = await db.phone_listings.find(query, {"_id": 1}).to_list(length=None)
+            if len(search_scores) >= SEARCH_CANDIDATE_LIMIT and len(matched) <= offset + limit:
+                # The filters left too few of the best hits for this page: rank every match
+                search_scores = {listing_id: score for listing_id, score in listing_search_index.search(search)}
+                query["_id"] = {"$in": list(search_scores)}
+                matched = await db.phone_listings.find(query, {"_id": 1}).to_list(length=None)
+            ranked_ids = sorted(
+                (doc["_id"] for doc in matched),
+                key=lambda listing_id: search_scores[listing_id],
+                reverse=True
+            )
+            if offset + limit < len(ranked_ids):
+                response.headers[NEXT_CURSOR_HEADER] = encode_cursor("relevance", offset + limit)
+            ranked_ids = ranked_ids[offset:offset + limit]
+            listings = await db.phone_listings.find({"_id": {"$in": ranked_ids}}).to_list(length=limit)
+            positions = {listing_id: position for position, listing_id in enumerate(ranked_ids)}
+            listings.sort(key=lambda listing: positions[listing["_id"]])
             
-            if search_conditions:
-                query["$and"] = search_conditions
-        
+            for listing in listings:
+                listing = serialize_doc(listing)
+            return model_list_response(listings, PhoneListing, response)
+
         # Determine sorting
-        sort_criteria = []
-        if sort_by == "newest":
-            sort_criteria = [("created_at", -1)]
-        elif sort_by == "oldest":
-            sort_criteria = [("created_at", 1)]
-        elif sort_by == "price_low":
-            sort_criteria = [("price", 1)]
-        elif sort_by == "price_high":
-            sort_criteria = [("price", -1)]
-        elif sort_by == "most_viewed":
-            sort_criteria = [("views", -1)]
+        if sort_by not in LISTING_SORT_ORDERS:
+            sort_by = "newest"  # default to newest
+        sort_field, sort_direction = LISTING_SORT_ORDERS[sort_by]
+        sort_criteria = [(sort_field, sort_direction), ("_id", sort_direction)]
+        
+        # Get listings with sorting, seeking past the cursor when one is given
+        if cursor:
+            query.update(build_keyset_filter(sort_field, sort_direction, cursor, sort_by))
+            cursor_query = db.phone_listings.find(query).sort(sort_criteria).limit(limit)
         else:
-            sort_criteria = [("created_at", -1)]  # default to newest
+            cursor_query = db.phone_listings.find(query).sort(sort_criteria).skip(skip).limit(limit)
+        listings = await cursor_query.to_list(length=limit)
         
-        # Get listings with sorting
-        cursor = db.phone_listings.find(query).sort(sort_criteria).skip(skip).limit(limit)
-        listings = await cursor.to_list(length=limit)
+        if listings and len(listings) == limit:
+            response.headers[NEXT_CURSOR_HEADER] = keyset_cursor(sort_by, sort_field, listings[-1])
         
         # Serialize ObjectIds
         for listing in listings:
             listing = serialize_doc(listing)
         
-        return [PhoneListing(**listing) for listing in listings]
+        return model_list_response(listings, PhoneListing, response)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching listings: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch listings")
 
+def view_client_key(request: Request) -> str:
+    """Identify the viewer for view de-duplication (client address behind the proxy, plus user agent)"""
+    forwarded_for = request.headers.get("x-forwarded-for")
+    address = forwarded_for.split(",")[0].strip() if forwarded_for else (request.client.host if request.client else "")
+    return f"{address}|{request.headers.get('user-agent', '')}"
+
 @api_router.get("/listings/{listing_id}", response_model=PhoneListing)
-async def get_listing_details(listing_id: str):
+async def get_listing_details(listing_id: str, request: Request):
     """Get detailed information for a specific listing"""
     try:
         # Validate ObjectId format
@@ -3073,11 +3479,9 @@ async def get_listing_details(listing_id: str):
         if not listing:
             raise HTTPException(status_code=404, detail="Listing not found")
         
-        # Increment view count
-        await db.phone_listings.update_one(
-            {"_id": ObjectId(listing_id)},
-            {"$inc": {"views": 1}}
-        )
+        # Count the view; increments are written behind in batches
+        view_counter.record(listing["_id"], view_client_key(request))
+        listing["views"] = listing.get("views", 0) + view_counter.pending(listing["_id"])
         
         # Serialize and return
         listing = serialize_doc(listing)
@@ -3089,39 +3493,21 @@ async def get_listing_details(listing_id: str):
         logger.error(f"Error fetching listing details: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch listing details")
 
-@api_router.get("/stats")
+# Public platform statistics; /stats itself serves the admin dashboard payload
+@api_router.get("/stats/platform")
 async def get_stats():
     """Get platform statistics"""
     try:
-        total_listings = await db.phone_listings.count_documents({"is_active": True})
-        total_accessories = await db.accessories.count_documents({"is_active": True})
-        total_users = await db.users.count_documents({"is_active": True})
+        stats = await platform_stats.read()
         
-        # Get brand counts
-        pipeline = [
-            {"$match": {"is_active": True}},
-            {"$group": {"_id": "$brand", "count": {"$sum": 1}}},
-            {"$sort": {"count": -1}},
-            {"$limit": 6}
-        ]
-        brand_stats = await db.phone_listings.aggregate(pipeline).to_list(length=6)
-        brands = [{"name": stat["_id"], "count": stat["count"]} for stat in brand_stats]
-        
-        # Get city counts
-        city_pipeline = [
-            {"$match": {"is_active": True}},
-            {"$group": {"_id": "$city", "count": {"$sum": 1}}},
-            {"$sort": {"count": -1}},
-            {"$limit": 10}
-        ]
-        city_stats = await db.phone_listings.aggregate(city_pipeline).to_list(length=10)
-        cities = [{"name": stat["_id"], "count": stat["count"]} for stat in city_stats]
+        brands = top_counts(stats.get("brands"), 6)
+        cities = top_counts(stats.get("cities"), 10)
         
         return {
-            "total_listings": total_listings,
-            "total_accessories": total_accessories,
-            "accessories_count": total_accessories,  # Alias for compatibility
-            "total_users": total_users,
+            "total_listings": stats.get("active_listings", 0),
+            "total_accessories": stats.get("active_accessories", 0),
+            "accessories_count": stats.get("active_accessories", 0),  # Alias for compatibility
+            "total_users": stats.get("active_users", 0),
             "brands_count": len(brands),
             "cities_count": len(cities),
             "brands": brands,
@@ -3133,7 +3519,7 @@ async def get_stats():
 
 # Accessories Routes
 @api_router.get("/accessories")
-async def get_accessories(skip: int = 0, limit: int = 50, type: Optional[str] = None, brand: Optional[str] = None, city: Optional[str] = None, min_price: Optional[int] = None, max_price: Optional[int] = None):
+async def get_accessories(response: Response, skip: int = 0, limit: int = 50, cursor: Optional[str] = None, type: Optional[str] = None, brand: Optional[str] = None, city: Optional[str] = None, min_price: Optional[int] = None, max_price: Optional[int] = None):
     """Get accessories with optional filters"""
     try:
         # Build query filter
@@ -3154,14 +3540,25 @@ async def get_accessories(skip: int = 0, limit: int = 50, type: Optional[str] =
             query["price"] = price_filter
         
         # Get accessories sorted by creation date (newest first)
-        cursor = db.accessories.find(query).sort("created_at", -1).skip(skip).limit(limit)
-        accessories = await cursor.to_list(length=limit)
+        sort_field, sort_direction = LISTING_SORT_ORDERS["newest"]
+        sort_criteria = [(sort_field, sort_direction), ("_id", sort_direction)]
+        if cursor:
+            query.update(build_keyset_filter(sort_field, sort_direction, cursor, "newest"))
+            accessories_cursor = db.accessories.find(query).sort(sort_criteria).limit(limit)
+        else:
+            accessories_cursor = db.accessories.find(query).sort(sort_criteria).skip(skip).limit(limit)
+        accessories = await accessories_cursor.to_list(length=limit)
+        
+        if accessories and len(accessories) == limit:
+            response.headers[NEXT_CURSOR_HEADER] = keyset_cursor("newest", sort_field, accessories[-1])
         
         # Serialize ObjectIds
         for accessory in accessories:
             accessory = serialize_doc(accessory)
         
         return accessories
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching accessories: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch accessories")
@@ -3200,6 +3597,205 @@ async def get_featured_accessories(limit: int = 4):
         logger.error(f"Error fetching featured accessories: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch featured accessories")
 
+# Blob Storage Routes
+@api_router.post("/blobs")
+async def upload_blob(file: UploadFile = File(...), current_user: dict = Depends(get_current_user)):
+    """Upload an image or PDF (at most MAX_UPLOAD_BYTES) to the blob store and return its reference"""
+    try:
+        url = await store_upload(file)
+        ref = await blob_store.stat(blob_id(url))
+        return {"url": url, **ref.dict()}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error uploading blob: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to upload file")
+
+def parse_range_header(range_header: str, size: int):
+    """Parse a single-range "bytes=" header into inclusive (start, end), or None if unsatisfiable"""
+    units, _, spec = range_header.partition("=")
+    if units.strip() != "bytes" or "," in spec:
+        return None
+    start_text, _, end_text = spec.strip().partition("-")
+    try:
+        if start_text == "":
+            # Suffix range: the last N bytes
+            length = int(end_text)
+            if length <= 0:
+                return None
+            return max(size - length, 0), size - 1
+        start = int(start_text)
+        end = int(end_text) if end_text else size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        return None
+    return start, min(end, size - 1)
+
+def blob_response(ref: BlobRef, request: Request, cache_control: str):
+    """Stream a stored blob with ETag and Range support"""
+    etag = f'"{ref.sha256}"'
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": cache_control,
+        "X-Content-Type-Options": "nosniff"
+    }
+    # Only images render inline; anything else (PDFs, legacy uploads) is downloaded, never run as a page
+    if ref.content_type not in INLINE_CONTENT_TYPES:
+        headers["Content-Disposition"] = f'attachment; filename="{ref.sha256}"'
+    
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]):
+        return Response(status_code=304, headers=headers)
+    
+    start, end = 0, ref.size - 1
+    status_code = 200
+    range_header = request.headers.get("range")
+    if range_header and ref.size > 0:
+        byte_range = parse_range_header(range_header, ref.size)
+        if byte_range is None:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{ref.size}"})
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{ref.size}"
+    
+    headers["Content-Length"] = str(end - start + 1 if ref.size else 0)
+    body = blob_store.read_range(ref.sha256, start, end, private=ref.private) if ref.size else iter([b""])
+    return StreamingResponse(body, status_code=status_code, media_type=ref.content_type, headers=headers)
+
+@api_router.get("/blobs/{sha256}")
+async def download_blob(sha256: str, request: Request):
+    """Stream a public blob (listing photos); private blobs are only served by the admin route"""
+    ref = await blob_store.stat(sha256)
+    if not ref:
+        raise HTTPException(status_code=404, detail="File not found")
+    # Content-addressed, so the bytes behind a URL never change
+    return blob_response(ref, request, "public, max-age=31536000, immutable")
+
+@api_router.get("/admin/blobs/{sha256}")
+async def download_private_blob(sha256: str, request: Request, current_user: dict = Depends(get_current_user)):
+    """Stream a blob, including private KYC documents, without letting caches keep it (Admin only)"""
+    if current_user["role"] != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    ref = await blob_store.stat(sha256, private=True) or await blob_store.stat(sha256)
+    if not ref:
+        raise HTTPException(status_code=404, detail="File not found")
+    return blob_response(ref, request, "private, no-store")
+
+@api_router.post("/admin/blobs/migrate")
+async def migrate_inline_blobs(batch_size: int = 100, current_user: dict = Depends(get_current_user)):
+    """Move inline base64 photos and KYC documents already in the database into the blob store (Admin only)
+
+    KYC documents become private blobs, including ones already moved to public blob URLs; their
+    public copy is deleted unless a listing photo uses the same URL.
+    """
+    if current_user["role"] != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    try:
+        migrated_listings = 0
+        async for listing in db.phone_listings.find({"photos": {"$regex": "^data:"}}, {"photos": 1}).batch_size(batch_size):
+            # Legacy content is stored as is; downloads of non-images are served as attachments
+            photos = [await store_data_uri(photo, checked=False) for photo in listing.get("photos", [])]
+            await db.phone_listings.update_one({"_id": listing["_id"]}, {"$set": {"photos": photos}})
+            migrated_listings += 1
+        
+        migrated_users = 0
+        async for user in db.users.find({"kyc_documents": {"$exists": True}}, {"kyc_documents": 1}).batch_size(batch_size):
+            documents = user.get("kyc_documents") or {}
+            updates = {}
+            made_private = []
+            for name, value in documents.items():
+                if isinstance(value, str) and value.startswith("data:"):
+                    updates[f"kyc_documents.{name}"] = await store_data_uri(value, private=True, checked=False)
+                elif isinstance(value, str) and value.startswith(BLOB_URL_PREFIX):
+                    ref = await blob_store.copy_to_private(blob_id(value))
+                    if ref is not None:
+                        updates[f"kyc_documents.{name}"] = blob_url(ref)
+                        made_private.append(value)
+            if not updates:
+                continue
+            await db.users.update_one({"_id": user["_id"]}, {"$set": updates})
+            migrated_users += 1
+            for url in made_private:
+                if not await db.phone_listings.count_documents({"photos": url}, limit=1):
+                    await blob_store.delete(blob_id(url))
+        
+        return {"success": True, "migrated_listings": migrated_listings, "migrated_users": migrated_users}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error migrating inline blobs: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to migrate inline files")
+
+def cache_counts() -> Dict[str, Dict[str, int]]:
+    """Hits, misses and entries of the in-process caches"""
+    counts = {"users": {
+        "hits": user_principal_cache.hits,
+        "misses": user_principal_cache.misses,
+        "entries": len(user_principal_cache)
+    }}
+    cache = phone_api_client.cache
+    if cache:
+        counts["phone_api"] = {
+            "hits": cache.counters["memory_hits"] + cache.counters["disk_hits"] + cache.counters["stale_hits"],
+            "misses": cache.counters["misses"],
+            "entries": len(cache)
+        }
+    return counts
+
+metrics_registry.callback(
+    "cache_hits_total", "counter", "Cache lookups answered from the cache", ("cache",),
+    lambda: {(name,): counts["hits"] for name, counts in cache_counts().items()}
+)
+metrics_registry.callback(
+    "cache_misses_total", "counter", "Cache lookups that went to the source", ("cache",),
+    lambda: {(name,): counts["misses"] for name, counts in cache_counts().items()}
+)
+metrics_registry.callback(
+    "cache_entries", "gauge", "Entries held in memory", ("cache",),
+    lambda: {
+        **{(name,): counts["entries"] for name, counts in cache_counts().items()},
+        ("spec_catalog",): len(spec_catalog),
+        ("compare_catalog",): len(compare_catalog),
+        ("search_index",): len(listing_search_index)
+    }
+)
+metrics_registry.callback(
+    "executor_queue_depth", "gauge", "Tasks waiting for an executor slot", ("executor",),
+    lambda: {("password_hasher",): password_hasher.stats()["queue_depth"]}
+)
+metrics_registry.callback(
+    "executor_running", "gauge", "Tasks running on an executor", ("executor",),
+    lambda: {("password_hasher",): password_hasher.stats()["running"], ("job_runner",): job_runner.running_count}
+)
+metrics_registry.callback(
+    "mongodb_slow_commands_total", "counter", "MongoDB commands over SLOW_COMMAND_MS", (),
+    lambda: {(): slow_command_log.counters["slow"]}
+)
+metrics_registry.callback(
+    "view_counter_pending_views", "gauge", "Listing views buffered until the next flush", (),
+    lambda: {(): view_counter.stats()["pending_views"]}
+)
+
+@api_router.get("/metrics", include_in_schema=False)
+async def prometheus_metrics(request: Request):
+    """Prometheus scrape endpoint; requires `Bearer METRICS_TOKEN` when that is set"""
+    if METRICS_TOKEN and request.headers.get("authorization") != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return Response(content=await metrics_registry.exposition(), media_type=CONTENT_TYPE)
+
+@api_router.get("/healthz")
+async def healthz():
+    """Liveness: the process is up and its event loop answers"""
+    return {"status": "ok", "pid": os.getpid()}
+
+@api_router.get("/readyz")
+async def readyz():
+    """Readiness: startup steps completed and MongoDB answers a ping"""
+    report = await readiness.report()
+    return JSONResponse(status_code=200 if report["ready"] else 503, content=report)
+
 # Include the router in the main app
 app.include_router(api_router)
 
@@ -3209,8 +3805,123 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
+# Outermost, so the time includes the other middleware
+app.add_middleware(MetricsMiddleware, metrics=http_metrics)
+
+async def create_indexes():
+    """Build the declared indexes (indexes.INDEXES) that are missing"""
+    await reconcile_indexes(db)
+
+async def backfill_listing_facets(batch_size: int = 500):
+    """Write normalized facets onto listings created before facets existed"""
+    projection = {field: 1 for field in LISTING_FACET_FIELDS}
+    operations = []
+    updated = 0
+    async for listing in db.phone_listings.find({"facets": {"$exists": False}}, projection):
+        operations.append(UpdateOne(
+            {"_id": listing["_id"]},
+            {"$set": {"facets": build_listing_facets(listing)}}
+        ))
+        if len(operations) >= batch_size:
+            await db.phone_listings.bulk_write(operations, ordered=False)
+            updated += len(operations)
+            operations = []
+    if operations:
+        await db.phone_listings.bulk_write(operations, ordered=False)
+        updated += len(operations)
+    if updated:
+        logger.info(f"Backfilled facets on {updated} listings")
+
+async def backfill_listing_sort_dates():
+    """Store sort_date on listings created before it existed"""
+    result = await db.phone_listings.update_many(
+        {"sort_date": {"$exists": False}},
+        [{"$set": {"sort_date": {"$ifNull": ["$date_posted", "$created_at"]}}}]
+    )
+    if result.modified_count:
+        logger.info(f"Backfilled sort dates on {result.modified_count} listings")
+
+async def backfill_numeric_specs(batch_size: int = 500):
+    """Parse numeric spec values onto listings and phone specs written before they existed"""
+    targets = [
+        (db.phone_listings, build_listing_numbers, "listings"),
+        (db.phone_specs, build_spec_numbers, "phone specs")
+    ]
+    for collection, build_numbers, label in targets:
+        operations = []
+        updated = 0
+        async for document in collection.find({"numeric": {"$exists": False}}):
+            operations.append(UpdateOne(
+                {"_id": document["_id"]},
+                {"$set": {"numeric": build_numbers(document)}}
+            ))
+            if len(operations) >= batch_size:
+                await collection.bulk_write(operations, ordered=False)
+                updated += len(operations)
+                operations = []
+        if operations:
+            await collection.bulk_write(operations, ordered=False)
+            updated += len(operations)
+        if updated:
+            logger.info(f"Backfilled numeric specs on {updated} {label}")
+
+async def run_startup_backfills():
+    """One-off data migrations and cache upkeep, run by the elected process"""
+    try:
+        await backfill_listing_facets()
+        await backfill_listing_sort_dates()
+        await backfill_numeric_specs()
+    except Exception as e:
+        logger.error(f"Error backfilling listing fields: {str(e)}")
+    if phone_api_client.cache:
+        try:
+            await phone_api_client.cache.purge_expired()
+        except Exception as e:
+            logger.error(f"Error purging phone API cache: {str(e)}")
+
+# With several worker processes only the lease holder runs jobs, stats reconciliation and backfills
+leader_election = LeaderElection(db.leader_leases, lease_seconds=float(os.environ.get('LEADER_LEASE_SECONDS', '15')))
+leader_election.register("backfills", run_startup_backfills)
+leader_election.register("job_runner", job_runner.start, job_runner.stop)
+leader_election.register("platform_stats", platform_stats.start, platform_stats.stop)
+
+async def open_phone_api_client():
+    """Create the upstream connection pool and open the response cache"""
+    await phone_api_client.get_session()
+    if phone_api_client.cache:
+        await phone_api_client.cache.open()
+
+async def ping_mongo():
+    await client.admin.command("ping")
+
+# Startup steps run concurrently; the process reports ready once all have succeeded
+readiness = Readiness(retry_interval=float(os.environ.get('STARTUP_RETRY_SECONDS', '5')))
+readiness.add_step("mongo", ping_mongo)
+readiness.add_step("indexes", create_indexes)
+readiness.add_step("search_index", rebuild_search_index)
+readiness.add_step("spec_catalog", spec_catalog.refresh)
+readiness.add_step("compare_catalog", compare_catalog.refresh)
+readiness.add_step("phone_api_client", open_phone_api_client)
+readiness.add_step("invalidation_bus", invalidation_bus.start)
+readiness.add_step("leader_election", leader_election.start)
+readiness.add_check("mongo", ping_mongo)
+
+async def start_services():
+    await view_counter.start()
+    await metrics_registry.start()
+    await slow_command_log.start(client)
+    # Waits briefly so a healthy start is ready immediately; slower steps finish in the background
+    await readiness.start(wait=float(os.environ.get('STARTUP_WAIT_SECONDS', '5')))
+
+async def stop_services():
+    await readiness.stop()
+    await metrics_registry.stop()
+    await slow_command_log.stop()
+    await leader_election.stop()
+    await invalidation_bus.stop()
+    await view_counter.stop()
+    password_hasher.shutdown()
+    await phone_api_client.close_session()
     client.close()
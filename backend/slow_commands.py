@@ -0,0 +1,407 @@
+"""Capture of slow MongoDB commands with their query plans.
+
+SlowCommandLog is a pymongo command listener on the Motor client. Queries
+and writes that take longer than the threshold are reduced to their shape
+(the filter, pipeline or sort with literal values replaced by their type,
+so "price < 300" and "price < 500" are one shape) and kept in a ring buffer
+with their duration and the number of documents returned. The first time a
+shape is seen slow, `explain` is run for it in the background and the
+winning plan, keys and documents examined are stored with the shape; a
+COLLSCAN or a large examined/returned ratio points at a missing index.
+A find or aggregate that leaves a cursor open is timed until the cursor is
+exhausted or killed: its getMore batches count towards the same shape, so an
+unbounded `to_list(length=None)` shows up with its full cost.
+Shapes are kept per process, least recently seen dropped first.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from bson.regex import Regex
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+# Commands with a query shape that `explain` accepts
+EXPLAINABLE_COMMANDS = {"find", "aggregate", "count", "distinct", "update", "delete", "findAndModify"}
+# Commands that open a cursor whose getMore batches are attributed back to them
+CURSOR_COMMANDS = {"find", "aggregate"}
+# Commands followed only to time the cursors above
+_CURSOR_FOLLOW_UPS = {"getMore", "killCursors"}
+_TRACKED_COMMANDS = EXPLAINABLE_COMMANDS | _CURSOR_FOLLOW_UPS
+# Stages whose arguments are kept as written: they define the shape rather than vary per request
+VERBATIM_STAGES = {"$sort", "$project", "$group", "$addFields", "$set", "$unset"}
+# Session and routing fields that explain rejects or that do not belong to the query
+_INTERNAL_FIELDS = {"lsid", "txnNumber", "autocommit", "startTransaction", "writeConcern", "readConcern"}
+
+
+def _placeholder(value: Any) -> str:
+    if isinstance(value, bool):
+        return "?bool"
+    if isinstance(value, (int, float)):
+        return "?number"
+    if isinstance(value, str):
+        return "?string"
+    if isinstance(value, (Regex, re.Pattern)):
+        return "?regex"
+    if isinstance(value, datetime):
+        return "?date"
+    if isinstance(value, ObjectId):
+        return "?objectId"
+    if value is None:
+        return "?null"
+    return f"?{type(value).__name__}"
+
+
+def value_shape(value: Any) -> Any:
+    """Operators and field names kept, literals replaced by a type placeholder"""
+    if isinstance(value, dict):
+        return {key: value_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if any(isinstance(item, (dict, list, tuple)) for item in value):
+            return [value_shape(item) for item in value]
+        return "?array"
+    return _placeholder(value)
+
+
+def _pipeline_shape(pipeline: List[Dict[str, Any]]) -> List[Any]:
+    shape = []
+    for stage in pipeline:
+        name = next(iter(stage), None)
+        if name in VERBATIM_STAGES:
+            shape.append(json.loads(json.dumps(stage, default=str)))
+        elif name == "$lookup" and "pipeline" in stage[name]:
+            shape.append({name: {**value_shape(stage[name]), "pipeline": _pipeline_shape(stage[name]["pipeline"])}})
+        else:
+            shape.append(value_shape(stage))
+    return shape
+
+
+def command_shape(command_name: str, command: Dict[str, Any]) -> Dict[str, Any]:
+    """The parts of a command that decide its plan, normalized"""
+    if command_name == "find":
+        return {
+            "filter": value_shape(command.get("filter", {})),
+            "sort": command.get("sort"),
+            "projection": sorted(command.get("projection") or {}),
+            "limit": "limit" in command
+        }
+    if command_name == "aggregate":
+        return {"pipeline": _pipeline_shape(command.get("pipeline", []))}
+    if command_name == "count":
+        return {"query": value_shape(command.get("query", {}))}
+    if command_name == "distinct":
+        return {"key": command.get("key"), "query": value_shape(command.get("query", {}))}
+    if command_name == "findAndModify":
+        return {"query": value_shape(command.get("query", {})), "sort": command.get("sort")}
+    if command_name in ("update", "delete"):
+        statements = command.get("updates" if command_name == "update" else "deletes") or [{}]
+        first = statements[0]
+        return {"q": value_shape(first.get("q", {})), "multi": bool(first.get("multi") or first.get("limit") == 0),
+                "statements": len(statements)}
+    return {}
+
+
+def _walk_plan(plan: Dict[str, Any], stages: List[str], indexes: List[str]):
+    if not isinstance(plan, dict):
+        return
+    # Slot-based plans nest the classic tree under queryPlan
+    if "queryPlan" in plan:
+        _walk_plan(plan["queryPlan"], stages, indexes)
+        return
+    if "stage" in plan:
+        stages.append(plan["stage"])
+    if plan.get("indexName"):
+        indexes.append(plan["indexName"])
+    if "inputStage" in plan:
+        _walk_plan(plan["inputStage"], stages, indexes)
+    for child in plan.get("inputStages", []):
+        _walk_plan(child, stages, indexes)
+
+
+def _find_key(document: Any, key: str) -> Optional[Any]:
+    """First value under `key`, searching depth first (aggregate explains nest it in stages)"""
+    if isinstance(document, dict):
+        if key in document:
+            return document[key]
+        values = document.values()
+    elif isinstance(document, list):
+        values = document
+    else:
+        return None
+    for value in values:
+        found = _find_key(value, key)
+        if found is not None:
+            return found
+    return None
+
+
+def summarize_explain(explain: Dict[str, Any]) -> Dict[str, Any]:
+    """Winning plan stages and indexes, keys/documents examined and documents returned"""
+    stages: List[str] = []
+    indexes: List[str] = []
+    planner = _find_key(explain, "queryPlanner") or {}
+    _walk_plan(planner.get("winningPlan", {}), stages, indexes)
+    execution = _find_key(explain, "executionStats") or {}
+    docs_examined = execution.get("totalDocsExamined")
+    returned = execution.get("nReturned")
+    return {
+        "stages": stages,
+        "indexes": indexes,
+        "collection_scan": "COLLSCAN" in stages,
+        "keys_examined": execution.get("totalKeysExamined"),
+        "docs_examined": docs_examined,
+        "returned": returned,
+        "examined_per_returned": round(docs_examined / returned, 1) if docs_examined is not None and returned else None,
+        "execution_ms": execution.get("executionTimeMillis")
+    }
+
+
+def _returned(command_name: str, reply: Dict[str, Any]) -> Optional[int]:
+    cursor = reply.get("cursor")
+    if isinstance(cursor, dict):
+        return len(cursor.get("firstBatch") or cursor.get("nextBatch") or [])
+    if command_name in ("count", "update", "delete"):
+        return reply.get("n")
+    if command_name == "distinct":
+        return len(reply.get("values") or [])
+    if command_name == "findAndModify":
+        return 1 if reply.get("value") is not None else 0
+    return None
+
+
+def explain_command(command_name: str, command: Dict[str, Any]) -> Dict[str, Any]:
+    """The command as `explain` takes it: without session, routing and write concern fields"""
+    return {
+        key: value for key, value in command.items()
+        if not key.startswith("$") and key not in _INTERNAL_FIELDS
+    }
+
+
+class SlowCommandLog(monitoring.CommandListener):
+    """Ring buffer of slow MongoDB commands grouped by shape, explained once per shape"""
+
+    def __init__(self, threshold_ms: float = 100.0, buffer_size: int = 200, max_shapes: int = 500,
+                 max_cursors: int = 1000, explain: bool = True, explain_verbosity: str = "executionStats", explain_queue_size: int = 20):
+        self.threshold_ms = threshold_ms
+        self.max_shapes = max_shapes
+        self.max_cursors = max_cursors
+        self.explain = explain
+        self.explain_verbosity = explain_verbosity
+        self.entries: Deque[Dict[str, Any]] = deque(maxlen=buffer_size)
+        self.shapes: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._started: Dict[Tuple[Any, int], Tuple[Dict[str, Any], float]] = {}
+        # Open cursors by (database, cursor id), oldest first
+        self._cursors: "OrderedDict[Tuple[str, int], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._client = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._explain_queue: Optional[asyncio.Queue] = None
+        self._explain_queue_size = explain_queue_size
+        self._task: Optional[asyncio.Task] = None
+        self.counters = {"slow": 0, "explained": 0, "explain_errors": 0, "explains_dropped": 0}
+
+    # Listener callbacks run on the thread that issued the command
+
+    def started(self, event):
+        if event.command_name in _TRACKED_COMMANDS:
+            with self._lock:
+                self._started[(event.connection_id, event.request_id)] = (event.command, time.time())
+
+    def _finished(self, event, reply: Optional[Dict[str, Any]], error: Optional[str]):
+        if event.command_name not in _TRACKED_COMMANDS:
+            return
+        with self._lock:
+            started = self._started.pop((event.connection_id, event.request_id), None)
+        if started is None:
+            return
+        command, started_at = started
+        duration_ms = event.duration_micros / 1000
+        if event.command_name == "getMore":
+            self._cursor_batch(event.database_name, command.get("getMore"), duration_ms, reply, error)
+            return
+        if event.command_name == "killCursors":
+            for cursor_id in command.get("cursors") or []:
+                self._close_cursor(event.database_name, cursor_id)
+            return
+        returned = _returned(event.command_name, reply) if reply else None
+        cursor_id = (reply or {}).get("cursor", {}).get("id") if event.command_name in CURSOR_COMMANDS else None
+        if cursor_id:
+            # Recorded once the cursor is drained, with the time of all its batches
+            self._open_cursor(event.database_name, cursor_id, {
+                "command_name": event.command_name,
+                "command": command,
+                "started_at": started_at,
+                "duration_ms": duration_ms,
+                "returned": returned or 0,
+                "batches": 1
+            })
+            return
+        self._record_if_slow(event.database_name, event.command_name, command, started_at, duration_ms,
+                             returned, error)
+
+    def _open_cursor(self, database: str, cursor_id: int, state: Dict[str, Any]):
+        evicted = []
+        with self._lock:
+            self._cursors[(database, int(cursor_id))] = state
+            while len(self._cursors) > self.max_cursors:
+                evicted.append(self._cursors.popitem(last=False))
+        for (evicted_database, _), evicted_state in evicted:
+            self._record_cursor(evicted_database, evicted_state, None)
+
+    def _cursor_batch(self, database: str, cursor_id: Optional[int], duration_ms: float,
+                      reply: Optional[Dict[str, Any]], error: Optional[str]):
+        key = (database, int(cursor_id or 0))
+        with self._lock:
+            state = self._cursors.get(key)
+            if state is None:
+                return
+            state["duration_ms"] += duration_ms
+            state["returned"] += (_returned("getMore", reply) if reply else None) or 0
+            state["batches"] += 1
+            finished = error is not None or not (reply or {}).get("cursor", {}).get("id")
+            if finished:
+                del self._cursors[key]
+        if finished:
+            self._record_cursor(database, state, error)
+
+    def _close_cursor(self, database: str, cursor_id: int):
+        with self._lock:
+            state = self._cursors.pop((database, int(cursor_id)), None)
+        if state is not None:
+            self._record_cursor(database, state, None)
+
+    def _record_cursor(self, database: str, state: Dict[str, Any], error: Optional[str]):
+        self._record_if_slow(database, state["command_name"], state["command"], state["started_at"],
+                             state["duration_ms"], state["returned"], error, state["batches"])
+
+    def _record_if_slow(self, database: str, command_name: str, command: Dict[str, Any], started_at: float,
+                        duration_ms: float, returned: Optional[int], error: Optional[str], batches: int = 1):
+        if duration_ms < self.threshold_ms:
+            return
+        try:
+            self._record(database, command_name, command, started_at, duration_ms, returned, error, batches)
+        except Exception as e:
+            logger.error(f"Error recording slow command: {str(e)}")
+
+    def succeeded(self, event):
+        self._finished(event, event.reply, None)
+
+    def failed(self, event):
+        self._finished(event, None, str(event.failure.get("errmsg", event.failure)))
+
+    def _record(self, database: str, command_name: str, command: Dict[str, Any], started_at: float,
+                duration_ms: float, returned: Optional[int], error: Optional[str], batches: int):
+        collection = command.get(command_name)
+        shape = command_shape(command_name, command)
+        shape_text = json.dumps(shape, sort_keys=True, default=str)
+        key = f"{database}.{collection}:{command_name}:{shape_text}"
+        shape_id = hashlib.sha1(key.encode()).hexdigest()[:12]
+        entry = {
+            "at": datetime.utcfromtimestamp(started_at),
+            "shape_id": shape_id,
+            "database": database,
+            "collection": collection,
+            "command": command_name,
+            "duration_ms": round(duration_ms, 1),
+            "returned": returned,
+            "batches": batches,
+            "error": error
+        }
+        new_shape = False
+        with self._lock:
+            self.counters["slow"] += 1
+            self.entries.append(entry)
+            stats = self.shapes.get(shape_id)
+            if stats is None:
+                new_shape = True
+                stats = self.shapes[shape_id] = {
+                    "shape_id": shape_id,
+                    "database": database,
+                    "collection": collection,
+                    "command": command_name,
+                    "shape": shape,
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "first_seen": entry["at"],
+                    "explain": None
+                }
+                while len(self.shapes) > self.max_shapes:
+                    self.shapes.popitem(last=False)
+            self.shapes.move_to_end(shape_id)
+            stats["count"] += 1
+            stats["total_ms"] = round(stats["total_ms"] + duration_ms, 1)
+            stats["max_ms"] = max(stats["max_ms"], entry["duration_ms"])
+            stats["last_seen"] = entry["at"]
+        if new_shape and self.explain and self._loop is not None:
+            request = (shape_id, database, explain_command(command_name, command))
+            self._loop.call_soon_threadsafe(self._enqueue_explain, request)
+
+    # Explains run on the event loop, one at a time
+
+    def _enqueue_explain(self, request):
+        try:
+            self._explain_queue.put_nowait(request)
+        except asyncio.QueueFull:
+            self.counters["explains_dropped"] += 1
+
+    async def _explain(self, shape_id: str, database: str, command: Dict[str, Any]):
+        try:
+            explain = await self._client[database].command({"explain": command, "verbosity": self.explain_verbosity})
+            summary = summarize_explain(explain)
+            self.counters["explained"] += 1
+        except Exception as e:
+            self.counters["explain_errors"] += 1
+            summary = {"error": str(e)}
+        with self._lock:
+            stats = self.shapes.get(shape_id)
+            if stats is not None:
+                stats["explain"] = summary
+
+    async def _explain_loop(self):
+        while True:
+            await self._explain(*await self._explain_queue.get())
+
+    async def start(self, client):
+        """Run explains for new slow shapes through `client` (the explain itself is not captured)"""
+        if self._task is not None:
+            return
+        self._client = client
+        self._loop = asyncio.get_running_loop()
+        self._explain_queue = asyncio.Queue(maxsize=self._explain_queue_size)
+        self._task = asyncio.create_task(self._explain_loop())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._loop = None
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def clear(self):
+        with self._lock:
+            self._cursors.clear()
+            self.entries.clear()
+            self.shapes.clear()
+
+    def report(self, limit: int = 50) -> Dict[str, Any]:
+        """Latest slow commands and the shapes ranked by total time"""
+        with self._lock:
+            entries = list(self.entries)[-limit:][::-1] if limit > 0 else []
+            shapes = sorted((dict(stats) for stats in self.shapes.values()), key=lambda s: s["total_ms"], reverse=True)
+        return {
+            "threshold_ms": self.threshold_ms,
+            "entries": entries,
+            "shapes": shapes[:limit],
+            **self.counters
+        }
@@ -0,0 +1,242 @@
+"""In-memory brand/model index of phone specs for the listing form lookups.
+
+The listing-creation form asks for brands, then models of a brand, then the
+specs of one model on every step. The index merges the built-in spec table
+with the phone_specs collection and answers from dicts: brand -> models and
+a case-insensitive (brand, model) map that also accepts common aliases
+("Galaxy S24+" / "galaxy s24 plus", "Samsung Galaxy S24", "iphone15pro").
+Phones synced under a sub-brand ("Galaxy", "iPhone") are listed under the
+brand itself.
+
+It is loaded at startup. Single writes made through the API are applied in
+place; bulk writes mark it dirty and it is rebuilt in the background while
+the previous snapshot keeps serving (max_age covers writes made by other
+processes).
+"""
+import asyncio
+import logging
+import re
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Fields read from phone_specs to build a form entry
+CATALOG_SPEC_PROJECTION = {
+    "brand": 1, "model": 1, "battery_mah": 1, "display_size": 1, "camera_mp": 1,
+    "processor": 1, "chipset": 1, "operating_system": 1, "os": 1, "network_5g": 1,
+    "colors": 1, "storage_gb": 1, "ram_gb": 1, "release_year": 1, "numeric": 1
+}
+
+# Alternative brand names people type, by normalized key
+BRAND_ALIASES = {
+    "iphone": "apple",
+    "galaxy": "samsung",
+    "pixel": "google",
+    "redmi": "xiaomi",
+    "poco": "xiaomi",
+    "mi": "xiaomi",
+    "one plus": "oneplus"
+}
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_name(text: Any) -> str:
+    """Case-insensitive lookup key: lowercase words, '+' spelled out, punctuation dropped"""
+    text = str(text or "").casefold().replace("+", " plus ")
+    return " ".join(_NON_ALNUM.sub(" ", text).split())
+
+
+def canonical_brand(brand: Any) -> str:
+    """Normalized brand key with aliases folded into the brand they belong to"""
+    key = normalize_name(brand)
+    return BRAND_ALIASES.get(key, key)
+
+
+def model_keys(brand: Any, model: Any) -> List[str]:
+    """Keys a model can be looked up by: full name, name without the brand, and both without spaces"""
+    key = normalize_name(model)
+    keys = [key]
+    for prefix in dict.fromkeys([normalize_name(brand), canonical_brand(brand)]):
+        if prefix and key.startswith(prefix + " "):
+            keys.append(key[len(prefix) + 1:])
+    keys.extend([k.replace(" ", "") for k in keys])
+    return list(dict.fromkeys(k for k in keys if k))
+
+
+def _number(value: Any) -> str:
+    return f"{value:g}" if isinstance(value, float) else str(value)
+
+
+def build_form_specs(phone: Dict[str, Any]) -> Dict[str, Any]:
+    """Transform a phone_specs document to the listing form format of the built-in spec table"""
+    numeric = phone.get("numeric") or {}
+    colors = phone.get("colors")
+    if isinstance(colors, str):
+        colors = [color.strip() for color in colors.split(",") if color.strip()]
+    specs = {
+        "battery": f"{_number(numeric['battery_mah'])}mAh" if numeric.get("battery_mah") else phone.get("battery_mah"),
+        "screen_size": f"{_number(numeric['display_inches'])} inch" if numeric.get("display_inches") else phone.get("display_size"),
+        "camera": phone.get("camera_mp"),
+        "processor": phone.get("processor") or phone.get("chipset"),
+        "operating_system": phone.get("operating_system") or phone.get("os"),
+        "network": "5G" if phone.get("network_5g") == "Yes" else "4G",
+        "colors": colors or [],
+        "storage_options": [f"{_number(numeric['storage_gb'])}GB"] if numeric.get("storage_gb") else [],
+        "ram": f"{_number(numeric['ram_gb'])}GB" if numeric.get("ram_gb") else phone.get("ram_gb"),
+        "launch_year": phone.get("release_year")
+    }
+    return {key: value for key, value in specs.items() if value not in (None, "", [])}
+
+
+class SpecCatalog:
+    """Brand -> model -> specs index over the built-in table and phone_specs"""
+
+    def __init__(self, collection, builtin: Optional[Dict[str, Dict[str, Dict[str, Any]]]] = None, max_age: float = 300.0):
+        self.collection = collection
+        self.builtin = builtin or {}
+        self.max_age = max_age
+        # brand key -> display brand
+        self._brands: Dict[str, str] = {}
+        # brand key -> model key -> display model
+        self._models: Dict[str, Dict[str, str]] = {}
+        # (brand key, model key) -> form specs
+        self._specs: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        # (brand key, alias key) -> model key
+        self._aliases: Dict[Tuple[str, str], str] = {}
+        self._built_at = 0.0
+        self._loaded = False
+        self._dirty = True
+        self._lock = asyncio.Lock()
+        self._rebuild_task: Optional[asyncio.Task] = None
+
+    def mark_dirty(self):
+        """Called after bulk phone_specs writes; the index is rebuilt on the next lookup"""
+        self._dirty = True
+
+    def _stale(self) -> bool:
+        return self._dirty or time.monotonic() - self._built_at > self.max_age
+
+    def _add(self, brand: str, model: str, specs: Dict[str, Any], merge: bool = False):
+        brand_key = canonical_brand(brand)
+        model_key = normalize_name(model)
+        if not brand_key or not model_key:
+            return
+        # Phones synced under an alias ("Galaxy") are listed under the brand's own spelling once seen
+        if brand_key not in self._brands or normalize_name(brand) == brand_key:
+            self._brands[brand_key] = str(brand).strip()
+        self._models.setdefault(brand_key, {})[model_key] = str(model).strip()
+        existing = self._specs.get((brand_key, model_key)) if merge else None
+        self._specs[(brand_key, model_key)] = {**existing, **specs} if existing else dict(specs)
+        for alias in model_keys(brand, model):
+            # Real names win over aliases of other models
+            if alias == model_key or (brand_key, alias) not in self._aliases:
+                self._aliases[(brand_key, alias)] = model_key
+
+    def _rebuild_from(self, phones: Iterable[Dict[str, Any]]):
+        self._brands, self._models, self._specs, self._aliases = {}, {}, {}, {}
+        for brand, models in self.builtin.items():
+            for model, specs in models.items():
+                self._add(brand, model, specs)
+        for phone in phones:
+            self._add(phone.get("brand"), phone.get("model"), build_form_specs(phone), merge=True)
+
+    async def refresh(self):
+        """Rebuild the index if it is dirty or too old (one rebuild at a time)"""
+        if not self._stale():
+            return
+        async with self._lock:
+            if not self._stale():
+                return
+            # Cleared before reading so writes made during the rebuild mark it dirty again
+            self._dirty = False
+            try:
+                phones = [phone async for phone in self.collection.find({}, CATALOG_SPEC_PROJECTION)]
+            except Exception:
+                self._dirty = True
+                raise
+            self._rebuild_from(phones)
+            self._built_at = time.monotonic()
+            self._loaded = True
+
+    async def _background_refresh(self):
+        try:
+            await self.refresh()
+        except Exception as e:
+            logger.error(f"Error rebuilding spec catalog: {str(e)}")
+
+    async def _ready(self):
+        """Load on first use; afterwards serve the current snapshot and rebuild in the background"""
+        if not self._loaded:
+            await self.refresh()
+        elif self._stale() and (self._rebuild_task is None or self._rebuild_task.done()):
+            self._rebuild_task = asyncio.create_task(self._background_refresh())
+
+    def apply(self, phone: Dict[str, Any]):
+        """Index a phone_specs document written through the API"""
+        self._add(phone.get("brand"), phone.get("model"), build_form_specs(phone), merge=True)
+        if self._lock.locked():
+            self._dirty = True
+
+    def discard(self, phone: Dict[str, Any]):
+        """Drop a deleted (or renamed) phone_specs document, falling back to the built-in entry"""
+        brand_key = canonical_brand(phone.get("brand"))
+        model_key = normalize_name(phone.get("model"))
+        if (brand_key, model_key) not in self._specs:
+            return
+        self._specs.pop((brand_key, model_key))
+        self._models[brand_key].pop(model_key, None)
+        self._aliases = {key: target for key, target in self._aliases.items()
+                         if not (key[0] == brand_key and target == model_key)}
+        for brand, models in self.builtin.items():
+            if canonical_brand(brand) != brand_key:
+                continue
+            for model, specs in models.items():
+                if normalize_name(model) == model_key:
+                    self._add(brand, model, specs)
+        if not self._models[brand_key]:
+            del self._models[brand_key]
+            del self._brands[brand_key]
+        if self._lock.locked():
+            self._dirty = True
+
+    def _brand_key(self, brand: str) -> Optional[str]:
+        key = canonical_brand(brand)
+        return key if key in self._brands else None
+
+    async def brands(self) -> List[str]:
+        await self._ready()
+        return sorted(self._brands.values(), key=str.casefold)
+
+    async def models(self, brand: str) -> Optional[List[str]]:
+        """Model names of a brand, or None when the brand is unknown"""
+        await self._ready()
+        brand_key = self._brand_key(brand)
+        if brand_key is None:
+            return None
+        return sorted(self._models[brand_key].values(), key=str.casefold)
+
+    async def specs(self, brand: str, model: str) -> Optional[Dict[str, Any]]:
+        """Form specs of a model, or None when the brand or model is unknown"""
+        await self._ready()
+        brand_key = self._brand_key(brand)
+        if brand_key is None:
+            return None
+        for alias in model_keys(brand, model):
+            model_key = self._aliases.get((brand_key, alias))
+            if model_key is not None:
+                return self._specs[(brand_key, model_key)]
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "brands": len(self._brands),
+            "models": len(self._specs),
+            "aliases": len(self._aliases),
+            "age_seconds": round(time.monotonic() - self._built_at, 1) if self._loaded else None,
+            "dirty": self._dirty
+        }
+
+    def __len__(self) -> int:
+        return len(self._specs)
@@ -0,0 +1,107 @@
+"""Streaming row readers for phone spec bulk imports.
+
+Uploads are read from disk a chunk of rows at a time, so an import keeps a
+flat memory profile no matter how large the sheet is. CSV is parsed with the
+standard library; .xlsx workbooks are read with openpyxl in read-only mode
+when it is installed.
+"""
+import asyncio
+import csv
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import openpyxl
+except ImportError:  # Excel import is optional
+    openpyxl = None
+
+# (row number in the sheet, row values keyed by header)
+ImportRow = Tuple[int, Dict[str, str]]
+
+CSV_EXTENSIONS = (".csv",)
+EXCEL_EXTENSIONS = (".xlsx",)
+SUPPORTED_EXTENSIONS = CSV_EXTENSIONS + EXCEL_EXTENSIONS
+
+
+def import_format(filename: str) -> Optional[str]:
+    """Return "csv" or "xlsx" for a supported upload name, else None"""
+    name = (filename or "").lower()
+    if name.endswith(CSV_EXTENSIONS):
+        return "csv"
+    if name.endswith(EXCEL_EXTENSIONS):
+        return "xlsx"
+    return None
+
+
+def excel_supported() -> bool:
+    return openpyxl is not None
+
+
+def _cell_text(value: Any) -> str:
+    """Render a spreadsheet cell the way it would appear in a CSV export"""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _iter_csv(path: Path) -> Iterator[ImportRow]:
+    with open(path, newline="", encoding="utf-8-sig") as handle:
+        reader = csv.DictReader(handle, restval="")
+        for row_num, row in enumerate(reader, start=2):  # Row 1 is the header
+            yield row_num, {key: value or "" for key, value in row.items() if key is not None}
+
+
+def _iter_xlsx(path: Path) -> Iterator[ImportRow]:
+    if openpyxl is None:
+        raise ValueError("Excel import requires openpyxl to be installed")
+    # Blobs have no file extension, which openpyxl checks for paths but not for file objects
+    with open(path, "rb") as handle:
+        workbook = openpyxl.load_workbook(handle, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            columns = [_cell_text(name).strip() for name in header]
+            for row_num, values in enumerate(rows, start=2):
+                if values is None or all(value is None for value in values):
+                    continue
+                yield row_num, {
+                    column: _cell_text(value)
+                    for column, value in zip(columns, values)
+                    if column
+                }
+        finally:
+            workbook.close()
+
+
+def iter_rows(path: Path, file_format: str) -> Iterator[ImportRow]:
+    if file_format == "xlsx":
+        return _iter_xlsx(path)
+    return _iter_csv(path)
+
+
+async def iter_row_chunks(path: Path, file_format: str, chunk_size: int) -> AsyncIterator[List[ImportRow]]:
+    """Yield lists of up to chunk_size rows, parsing each chunk in a worker thread"""
+    rows = iter_rows(path, file_format)
+
+    def next_chunk() -> List[ImportRow]:
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                break
+        return chunk
+
+    while True:
+        chunk = await asyncio.to_thread(next_chunk)
+        if not chunk:
+            return
+        yield chunk
@@ -0,0 +1,148 @@
+"""Canonical numeric values for free-text phone specifications.
+
+Specs arrive as display strings ("8GB", "4441 mAh", "6.7 inches", "48 MP").
+They are parsed once at write time into a `numeric` sub-document so browse
+filters such as "at least 8 GB RAM" are indexed range queries instead of
+regular expressions:
+
+    {"ram_gb": 8, "storage_gb": 256, "battery_mah": 4441,
+     "display_inches": 6.7, "camera_mp": 48}
+
+Values that cannot be parsed are left out of the sub-document.
+"""
+import re
+from typing import Any, Callable, Dict, Optional, Tuple
+
+NUMBER = r"(\d+(?:[.,]\d+)?)"
+
+MEMORY_PATTERN = re.compile(NUMBER + r"\s*(tb|gb|mb)?", re.IGNORECASE)
+BATTERY_PATTERN = re.compile(NUMBER + r"\s*mah", re.IGNORECASE)
+CAMERA_PATTERN = re.compile(NUMBER + r"\s*mp", re.IGNORECASE)
+BARE_NUMBER_PATTERN = re.compile(NUMBER)
+THOUSANDS_SEPARATOR_PATTERN = re.compile(r"(?<=\d),(?=\d{3}(?!\d))")
+
+MEMORY_UNITS_GB = {"tb": 1024.0, "gb": 1.0, "mb": 1 / 1024}
+
+# Plausible ranges; anything outside is treated as a parse miss
+DISPLAY_INCHES_RANGE = (1.0, 20.0)
+BATTERY_MAH_RANGE = (100.0, 30000.0)
+
+
+def _text(value: Any) -> str:
+    """Spec text with thousands separators removed ("3,274 mAh" -> "3274 mAh")"""
+    return THOUSANDS_SEPARATOR_PATTERN.sub("", str(value or ""))
+
+
+def _to_float(text: str) -> float:
+    return float(text.replace(",", "."))
+
+
+def _clean(value: float) -> Any:
+    """Store whole numbers as ints and round the rest"""
+    return int(value) if float(value).is_integer() else round(value, 2)
+
+
+def parse_memory_gb(value: Any) -> Optional[float]:
+    """"8GB", "12GB RAM", "256GB Built-in", "1TB", "512MB", "256" (bare numbers are GB)"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return _clean(float(value)) if value > 0 else None
+    match = MEMORY_PATTERN.search(_text(value))
+    if not match:
+        return None
+    amount = _to_float(match.group(1)) * MEMORY_UNITS_GB[(match.group(2) or "gb").lower()]
+    return _clean(amount) if amount > 0 else None
+
+
+def parse_battery_mah(value: Any) -> Optional[float]:
+    """"4441 mAh", "5000mAh Li-Ion", "4000" """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        amount = float(value)
+    else:
+        text = _text(value)
+        match = BATTERY_PATTERN.search(text) or BARE_NUMBER_PATTERN.search(text)
+        if not match:
+            return None
+        amount = _to_float(match.group(1))
+    low, high = BATTERY_MAH_RANGE
+    return _clean(amount) if low <= amount <= high else None
+
+
+def parse_display_inches(value: Any) -> Optional[float]:
+    """"6.7 inches", "6.1 inch", "6.8\"", "6.1" """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        amount = float(value)
+    else:
+        match = BARE_NUMBER_PATTERN.search(_text(value))
+        if not match:
+            return None
+        amount = _to_float(match.group(1))
+    low, high = DISPLAY_INCHES_RANGE
+    return _clean(amount) if low <= amount <= high else None
+
+
+def parse_camera_mp(value: Any) -> Optional[float]:
+    """"48 MP", "108MP Triple", "50 MP + 12 MP" (largest sensor), "12" """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return _clean(float(value)) if value > 0 else None
+    text = _text(value)
+    amounts = [_to_float(match) for match in CAMERA_PATTERN.findall(text)]
+    if not amounts:
+        match = BARE_NUMBER_PATTERN.search(text)
+        amounts = [_to_float(match.group(1))] if match else []
+    amount = max(amounts) if amounts else 0
+    return _clean(amount) if amount > 0 else None
+
+
+# numeric field -> (parser, source fields tried in order)
+SPEC_NUMERIC_SOURCES: Dict[str, Tuple[Callable[[Any], Optional[float]], Tuple[str, ...]]] = {
+    "ram_gb": (parse_memory_gb, ("ram_gb", "ram")),
+    "storage_gb": (parse_memory_gb, ("storage_gb", "storage")),
+    "battery_mah": (parse_battery_mah, ("battery_mah", "battery_capacity")),
+    "display_inches": (parse_display_inches, ("display_size", "display_size_legacy")),
+    "camera_mp": (parse_camera_mp, ("camera_mp", "main_camera"))
+}
+
+LISTING_NUMERIC_SOURCES: Dict[str, Tuple[Callable[[Any], Optional[float]], Tuple[str, ...]]] = {
+    "ram_gb": (parse_memory_gb, ("ram",)),
+    "storage_gb": (parse_memory_gb, ("storage",)),
+    "battery_mah": (parse_battery_mah, ("battery",)),
+    "display_inches": (parse_display_inches, ("screen_size",)),
+    "camera_mp": (parse_camera_mp, ("camera",))
+}
+
+NUMERIC_FIELDS = tuple(SPEC_NUMERIC_SOURCES)
+
+
+def _build_numbers(document: Dict[str, Any], sources) -> Dict[str, Any]:
+    numbers = {}
+    for field, (parser, source_fields) in sources.items():
+        for source in source_fields:
+            value = parser(document.get(source))
+            if value is not None:
+                numbers[field] = value
+                break
+    return numbers
+
+
+def build_spec_numbers(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """Numeric sub-document for a phone_specs document"""
+    return _build_numbers(spec, SPEC_NUMERIC_SOURCES)
+
+
+def build_listing_numbers(listing: Dict[str, Any]) -> Dict[str, Any]:
+    """Numeric sub-document for a phone listing"""
+    return _build_numbers(listing, LISTING_NUMERIC_SOURCES)
+
+
+def build_numeric_range_filter(ranges: Dict[str, Tuple[Optional[float], Optional[float]]]) -> Dict[str, Any]:
+    """Mongo filter on numeric.<field> for each (min, max) pair that has a bound"""
+    query = {}
+    for field, (minimum, maximum) in ranges.items():
+        bounds = {}
+        if minimum is not None:
+            bounds["$gte"] = minimum
+        if maximum is not None:
+            bounds["$lte"] = maximum
+        if bounds:
+            query[f"numeric.{field}"] = bounds
+    return query
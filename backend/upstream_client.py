@@ -0,0 +1,199 @@
+"""Pooled, resilient HTTP client for the external phone specifications API.
+
+One aiohttp session per process with a bounded connection pool (overall and
+per host) and keep-alive, so a catalog sync reuses a handful of connections
+instead of opening one per phone. Each request gets connect/read/total
+timeouts and is retried on connection errors, timeouts and retryable status
+codes with full-jitter exponential backoff (honouring Retry-After). A circuit
+breaker stops calling an upstream that keeps failing and lets a single trial
+request through after a cool-down.
+"""
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Statuses worth retrying: the request may succeed on another attempt
+RETRY_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+
+class UpstreamError(Exception):
+    """The upstream answered with an error or could not be reached"""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class CircuitOpenError(UpstreamError):
+    """Raised without calling the upstream while the circuit is open"""
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures, half-opens after `reset_timeout`"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._trial_started: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+        return self._state
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now (only one trial while half-open)"""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN:
+            now = time.monotonic()
+            # A trial that never reported back (e.g. cancelled) is given up after reset_timeout
+            if self._trial_started is None or now - self._trial_started >= self.reset_timeout:
+                self._trial_started = now
+                return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self._state = self.CLOSED
+        self._trial_started = None
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_started = None
+        if self._state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self._state != self.OPEN:
+                logger.warning(f"Upstream circuit opened after {self.failures} failures")
+            self._state = self.OPEN
+            self._opened_at = time.monotonic()
+
+
+class UpstreamClient:
+    """JSON GET client with connection pooling, timeouts, retries and a circuit breaker"""
+
+    def __init__(
+        self,
+        base_url: str,
+        limit: int = 100,
+        limit_per_host: int = 20,
+        keepalive_timeout: float = 30.0,
+        connect_timeout: float = 3.0,
+        read_timeout: float = 10.0,
+        total_timeout: float = 30.0,
+        retries: int = 3,
+        backoff_base: float = 0.2,
+        backoff_max: float = 5.0,
+        verify_ssl: bool = True,
+        breaker: Optional[CircuitBreaker] = None
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = aiohttp.ClientTimeout(
+            total=total_timeout, sock_connect=connect_timeout, sock_read=read_timeout
+        )
+        self.retries = max(0, retries)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.verify_ssl = verify_ssl
+        self.breaker = breaker or CircuitBreaker()
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.requests = 0
+        self.retried = 0
+        self.failed = 0
+        self.rejected = 0
+
+    async def session(self) -> aiohttp.ClientSession:
+        """Shared session, created on first use inside the running event loop"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=300,
+                ssl=None if self.verify_ssl else False
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self.timeout,
+                headers={"Accept": "application/json"}
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Full-jitter exponential backoff, never shorter than the upstream's Retry-After"""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_max))
+        return delay
+
+    async def get_json(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """GET base_url + path and decode the JSON body"""
+        if not self.breaker.allow():
+            self.rejected += 1
+            raise CircuitOpenError("Phone specifications API circuit is open")
+
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        session = await self.session()
+        last_error: Optional[UpstreamError] = None
+        retry_after: Optional[float] = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.retried += 1
+                await asyncio.sleep(self._backoff(attempt - 1, retry_after))
+            self.requests += 1
+            retry_after = None
+            try:
+                async with session.get(url, params=params) as response:
+                    if response.status < 400:
+                        data = await response.json(content_type=None)
+                        self.breaker.record_success()
+                        return data
+                    last_error = UpstreamError(f"GET {url} returned {response.status}", status=response.status)
+                    header = response.headers.get("Retry-After", "")
+                    retry_after = float(header) if header.isdigit() else None
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                last_error = UpstreamError(f"GET {url} failed: {type(e).__name__}: {str(e)}")
+                continue
+            if last_error.status not in RETRY_STATUSES:
+                # The upstream is healthy, the request itself was rejected
+                self.breaker.record_success()
+                raise last_error
+
+        self.failed += 1
+        self.breaker.record_failure()
+        raise last_error
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "base_url": self.base_url,
+            "requests": self.requests,
+            "retries": self.retried,
+            "failed_requests": self.failed,
+            "circuit_rejections": self.rejected,
+            "circuit_state": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "pool_limit": self.limit,
+            "pool_limit_per_host": self.limit_per_host
+        }
@@ -0,0 +1,114 @@
+"""Write-behind view counting for listing pages.
+
+Page views are counted in memory and coalesced per listing, then written
+with one unordered bulk_write of $inc updates every few seconds (or sooner
+when many listings are pending). Reading a listing no longer turns into a
+write on its document. Repeat views from the same client can optionally be
+ignored for a time window.
+"""
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Any, Dict, Hashable, Optional
+
+from pymongo import UpdateOne
+
+from cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounter:
+    """Coalesces listing view increments and flushes them in batches"""
+
+    def __init__(
+        self,
+        collection,
+        flush_interval: float = 5.0,
+        max_pending: int = 5000,
+        dedup_window: float = 0.0,
+        dedup_size: int = 100000
+    ):
+        self.collection = collection
+        self.flush_interval = flush_interval
+        self.max_pending = max(1, max_pending)
+        self._pending: Dict[Any, int] = defaultdict(int)
+        self._recent = TTLCache(max_size=dedup_size, ttl=dedup_window) if dedup_window > 0 else None
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.recorded = 0
+        self.deduplicated = 0
+        self.flushed = 0
+
+    def record(self, listing_id: Any, client_key: Optional[Hashable] = None) -> bool:
+        """Count a view; returns False when it repeats a recent view by the same client"""
+        if self._recent is not None and client_key is not None:
+            key = (listing_id, client_key)
+            if self._recent.get(key, count=False) is not None:
+                self.deduplicated += 1
+                return False
+            self._recent.set(key, True)
+        self._pending[listing_id] += 1
+        self.recorded += 1
+        if len(self._pending) >= self.max_pending:
+            self._wakeup.set()
+        return True
+
+    def pending(self, listing_id: Any) -> int:
+        """Views of a listing that have not been written yet"""
+        return self._pending.get(listing_id, 0)
+
+    async def flush(self) -> int:
+        """Write all pending increments; returns the number of listings updated"""
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, defaultdict(int)
+            operations = [UpdateOne({"_id": listing_id}, {"$inc": {"views": count}})
+                          for listing_id, count in batch.items()]
+            try:
+                await self.collection.bulk_write(operations, ordered=False)
+            except Exception as e:
+                # Keep the counts for the next flush rather than losing them
+                logger.error(f"Error flushing view counts: {str(e)}")
+                for listing_id, count in batch.items():
+                    self._pending[listing_id] += count
+                return 0
+            self.flushed += len(batch)
+            return len(batch)
+
+    async def start(self):
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        """Stop the flush loop and write whatever is still pending"""
+        if self._task is not None:
+            # Let an in-flight flush finish instead of cancelling it mid-write
+            self._stopping = True
+            self._wakeup.set()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    async def _flush_loop(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending_listings": len(self._pending),
+            "pending_views": sum(self._pending.values()),
+            "recorded": self.recorded,
+            "deduplicated": self.deduplicated,
+            "flushed_listings": self.flushed,
+            "flush_interval_seconds": self.flush_interval
+        }
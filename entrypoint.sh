@@ -5,17 +5,32 @@ set -e
 cd /backend || { echo "Backend directory not found"; exit 1; }
 
 echo "Starting FastAPI backend"
-# Start Uvicorn with proper host binding
-uvicorn server:app --host 0.0.0.0 --port 8001 &
+# Gunicorn with one uvicorn worker per core (WEB_CONCURRENCY overrides, see gunicorn.conf.py);
+# SERVER_MODE=single runs a single uvicorn process instead
+if [ "${SERVER_MODE:-workers}" = "single" ]; then
+    uvicorn server:app --host 0.0.0.0 --port 8001 &
+else
+    gunicorn -c gunicorn.conf.py server:app &
+fi
 BACKEND_PID=$!
 
-echo "Waiting for backend to start..."
-sleep 30
-
-if ! kill -0 $BACKEND_PID 2>/dev/null; then
-    echo "Backend failed to start at initialization, exiting"
-    exit 1
-fi
+echo "Waiting for backend to become ready..."
+# Poll /api/readyz every half second; if steps keep failing, serve anyway after READY_TIMEOUT
+# seconds since the backend keeps retrying them in the background
+READY_TIMEOUT=${READY_TIMEOUT:-120}
+polls=0
+until python3 -c "import urllib.request; urllib.request.urlopen('http://127.0.0.1:8001/api/readyz', timeout=2)" 2>/dev/null; do
+    if ! kill -0 $BACKEND_PID 2>/dev/null; then
+        echo "Backend failed to start at initialization, exiting"
+        exit 1
+    fi
+    if [ "$polls" -ge $((READY_TIMEOUT * 2)) ]; then
+        echo "Backend not ready after ${READY_TIMEOUT}s, starting nginx anyway"
+        break
+    fi
+    sleep 0.5
+    polls=$((polls + 1))
+done
 
 # Start Nginx
 nginx -g 'daemon off;' &
@@ -23,6 +38,8 @@ NGINX_PID=$!
 
 # Handle termination signals
 trap 'kill $BACKEND_PID $NGINX_PID; exit 0' SIGTERM SIGINT
+# Graceful worker reload
+trap 'kill -HUP $BACKEND_PID' SIGHUP
 
 # Check if processes are still running
 while kill -0 $BACKEND_PID 2>/dev/null && kill -0 $NGINX_PID 2>/dev/null; do
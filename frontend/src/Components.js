@@ -2204,6 +2204,12 @@ export const HeroSearchBar = ({ onSearch }) => {
                     </div>
                   </div>
 
+                  {syncResult.successful_imports > 0 && (
+                    <div className="text-sm text-gray-600">
+                      {syncResult.inserted || 0} new, {syncResult.updated || 0} updated, {syncResult.unchanged || 0} unchanged
+                    </div>
+                  )}
+
                   {syncResult.imported_phones && syncResult.imported_phones.length > 0 && (
                     <div>
                       <h5 className="font-medium text-gray-900 mb-2">Successfully Imported Phones:</h5>
@@ -6779,6 +6785,55 @@ export const BrandSearchPage = ({ brand, onBack, onViewListing }) => {
   );
 };
 
+// KYC documents are private blobs served only to admins, so they are fetched with the token
+const PrivateDocumentImage = ({ src, alt }) => {
+  const [objectUrl, setObjectUrl] = useState(null);
+  const [failed, setFailed] = useState(false);
+
+  useEffect(() => {
+    if (!src || !src.startsWith('/api/admin/blobs/')) {
+      setObjectUrl(src);
+      return undefined;
+    }
+    let cancelled = false;
+    let createdUrl = null;
+    setFailed(false);
+    fetch(`${process.env.REACT_APP_BACKEND_URL}${src}`, {
+      headers: {
+        'Authorization': `Bearer ${localStorage.getItem('token')}`
+      }
+    })
+      .then((response) => (response.ok ? response.blob() : Promise.reject(new Error(`HTTP ${response.status}`))))
+      .then((blob) => {
+        if (cancelled) return;
+        createdUrl = URL.createObjectURL(blob);
+        setObjectUrl(createdUrl);
+      })
+      .catch(() => {
+        if (!cancelled) setFailed(true);
+      });
+    return () => {
+      cancelled = true;
+      if (createdUrl) URL.revokeObjectURL(createdUrl);
+    };
+  }, [src]);
+
+  if (failed) {
+    return <span className="text-sm text-red-600">Could not load document</span>;
+  }
+  if (!objectUrl) {
+    return <span className="text-sm text-gray-500">Loading...</span>;
+  }
+  return (
+    <img
+      src={objectUrl}
+      alt={alt}
+      className="max-w-full h-auto rounded border"
+      style={{ maxHeight: '200px' }}
+    />
+  );
+};
+
 // User Management Component
 const UserManagement = () => {
   const [users, setUsers] = useState([]);
@@ -7241,11 +7296,9 @@ const UserManagement = () => {
                     <div>
                       <span className="text-sm font-medium text-gray-500">Business License:</span>
                       <div className="mt-1">
-                        <img 
-                          src={selectedUser.kyc_documents.business_license} 
-                          alt="Business License" 
-                          className="max-w-full h-auto rounded border"
-                          style={{ maxHeight: '200px' }}
+                        <PrivateDocumentImage
+                          src={selectedUser.kyc_documents.business_license}
+                          alt="Business License"
                         />
                       </div>
                     </div>
@@ -7254,11 +7307,9 @@ const UserManagement = () => {
                     <div>
                       <span className="text-sm font-medium text-gray-500">CNIC Front:</span>
                       <div className="mt-1">
-                        <img 
-                          src={selectedUser.kyc_documents.cnic_front} 
-                          alt="CNIC Front" 
-                          className="max-w-full h-auto rounded border"
-                          style={{ maxHeight: '200px' }}
+                        <PrivateDocumentImage
+                          src={selectedUser.kyc_documents.cnic_front}
+                          alt="CNIC Front"
                         />
                       </div>
                     </div>
@@ -7267,11 +7318,9 @@ const UserManagement = () => {
                     <div>
                       <span className="text-sm font-medium text-gray-500">CNIC Back:</span>
                       <div className="mt-1">
-                        <img 
-                          src={selectedUser.kyc_documents.cnic_back} 
-                          alt="CNIC Back" 
-                          className="max-w-full h-auto rounded border"
-                          style={{ maxHeight: '200px' }}
+                        <PrivateDocumentImage
+                          src={selectedUser.kyc_documents.cnic_back}
+                          alt="CNIC Back"
                         />
                       </div>
                     </div>
@@ -7385,6 +7434,45 @@ const UserManagement = () => {
   );
 };
 
+// Consecutive failed status checks tolerated before giving up on a job
+const JOB_POLL_MAX_FAILURES = 5;
+
+// Sync and import endpoints start a background job; poll it until it finishes
+const waitForJob = async (data) => {
+  if (!data.job_id || data.status !== 'in_progress') return data;
+  const jobFailed = (message) => ({ ...data, success: false, status: 'failed', errors: [message] });
+  let failures = 0;
+  while (true) {
+    await new Promise((resolve) => setTimeout(resolve, 2000));
+    let response;
+    try {
+      response = await fetch(`${process.env.REACT_APP_BACKEND_URL}/api/jobs/${data.job_id}`, {
+        headers: {
+          'Authorization': `Bearer ${localStorage.getItem('token')}`
+        }
+      });
+    } catch (error) {
+      response = null;
+    }
+    if (response && [401, 403, 404].includes(response.status)) {
+      return jobFailed(response.status === 404 ? 'Job not found' : 'Not authorized to follow this job');
+    }
+    if (!response || !response.ok) {
+      failures += 1;
+      if (failures >= JOB_POLL_MAX_FAILURES) {
+        return jobFailed('Could not get the job status, please check again later');
+      }
+      continue;
+    }
+    failures = 0;
+    const job = await response.json();
+    if (job.status === 'completed') return job.result;
+    if (job.status === 'failed' || job.status === 'cancelled') {
+      return { ...data, success: false, status: job.status, errors: [job.error || `Job ${job.status}`] };
+    }
+  }
+};
+
 // Phone Specs Manager Component
 const PhoneSpecsManager = () => {
   const [phoneSpecs, setPhoneSpecs] = useState([]);
@@ -7523,11 +7611,14 @@ const PhoneSpecsManager = () => {
       
       const response = await fetch(`${process.env.REACT_APP_BACKEND_URL}/api/phone-specs/bulk-import`, {
         method: 'POST',
+        headers: {
+          'Authorization': `Bearer ${localStorage.getItem('token')}`
+        },
         body: formData,
       });
 
       if (response.ok) {
-        const result = await response.json();
+        const result = await waitForJob(await response.json());
         setUploadResult(result);
         await loadPhoneSpecs(); // Refresh the list
         setUploadFile(null);
@@ -7602,11 +7693,14 @@ const PhoneSpecsManager = () => {
     setSyncResult(null);
     try {
       const response = await fetch(`${process.env.REACT_APP_BACKEND_URL}/api/phone-api/sync/popular-brands`, {
-        method: 'POST'
+        method: 'POST',
+        headers: {
+          'Authorization': `Bearer ${localStorage.getItem('token')}`
+        }
       });
       
       if (response.ok) {
-        const data = await response.json();
+        const data = await waitForJob(await response.json());
         setSyncResult(data);
         if (data.success) {
           await loadPhoneSpecs(); // Refresh the phone specs list
@@ -7627,11 +7721,14 @@ const PhoneSpecsManager = () => {
     setSyncResult(null);
     try {
       const response = await fetch(`${process.env.REACT_APP_BACKEND_URL}/api/phone-api/sync/brand/${brandName}`, {
-        method: 'POST'
+        method: 'POST',
+        headers: {
+          'Authorization': `Bearer ${localStorage.getItem('token')}`
+        }
       });
       
       if (response.ok) {
-        const data = await response.json();
+        const data = await waitForJob(await response.json());
         setSyncResult(data);
         if (data.success) {
           await loadPhoneSpecs();
@@ -7677,20 +7774,29 @@ const PhoneSpecsManager = () => {
                 let response;
                 if (choice.toLowerCase() === 'popular') {
                   response = await fetch(`${process.env.REACT_APP_BACKEND_URL}/api/phone-api/sync/popular-brands`, {
-                    method: 'POST'
+                    method: 'POST',
+                    headers: {
+                      'Authorization': `Bearer ${localStorage.getItem('token')}`
+                    }
                   });
                 } else if (choice.toLowerCase() === 'all') {
                   response = await fetch(`${process.env.REACT_APP_BACKEND_URL}/api/phone-api/sync/all-brands`, {
-                    method: 'POST'
+                    method: 'POST',
+                    headers: {
+                      'Authorization': `Bearer ${localStorage.getItem('token')}`
+                    }
                   });
                 } else {
                   response = await fetch(`${process.env.REACT_APP_BACKEND_URL}/api/phone-api/sync/brand/${choice}`, {
-                    method: 'POST'
+                    method: 'POST',
+                    headers: {
+                      'Authorization': `Bearer ${localStorage.getItem('token')}`
+                    }
                   });
                 }
                 
                 if (response.ok) {
-                  const data = await response.json();
+                  const data = await waitForJob(await response.json());
                   if (data.success) {
                     // Immediate refresh
                     await loadPhoneSpecs();
@@ -8066,7 +8172,7 @@ const PhoneSpecsManager = () => {
                   <div className="bg-blue-50 border border-blue-200 rounded-lg p-4 mb-6">
                     <h4 className="font-medium text-blue-900 mb-2">Instructions:</h4>
                     <ul className="text-sm text-blue-800 space-y-1">
-                      <li>• Upload a CSV file with phone specifications</li>
+                      <li>• Upload a CSV or Excel (.xlsx) file with phone specifications</li>
                       <li>• Required fields: brand, model</li>
                       <li>• Download the template below to see all supported fields</li>
                       <li>• The system will skip duplicates and report any errors</li>
@@ -8095,14 +8201,14 @@ const PhoneSpecsManager = () => {
                             <span>Upload a file</span>
                             <input
                               type="file"
-                              accept=".csv"
+                              accept=".csv,.xlsx"
                               onChange={(e) => setUploadFile(e.target.files[0])}
                               className="sr-only"
                             />
                           </label>
                           <p className="pl-1">or drag and drop</p>
                         </div>
-                        <p className="text-xs text-gray-500">CSV files only</p>
+                        <p className="text-xs text-gray-500">CSV or Excel (.xlsx) files</p>
                       </div>
                     </div>
                     
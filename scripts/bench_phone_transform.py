@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Microbenchmark of transform_api_phone_to_db_format (transforms per second).
+
+Runs the transform over every phone name in the mock catalog's golden cases:
+
+  cold       classification cache cleared before each pass (first sync)
+  warm       classification memoized (repeat syncs of the same catalog)
+  classify   name classification only, cold
+
+    python scripts/bench_phone_transform.py --passes 20
+"""
+import argparse
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "backend"))
+
+from phone_transform import classify_name, transform_api_phone_to_db_format  # noqa: E402
+
+GOLDEN_FILE = ROOT_DIR / "tests" / "golden" / "phone_transform.json"
+
+
+def run(label: str, passes: int, inputs, call, clear_cache: bool):
+    elapsed = 0.0
+    for _ in range(passes):
+        if clear_cache:
+            classify_name.cache_clear()
+        start = time.perf_counter()
+        for item in inputs:
+            call(item)
+        elapsed += time.perf_counter() - start
+    count = passes * len(inputs)
+    print(f"  {label:<10} {count / elapsed:12,.0f} /s   {elapsed / count * 1e6:8.2f} us each")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--passes", type=int, default=20)
+    args = parser.parse_args()
+
+    # The mock catalog has phones the transform rejects; keep their error logs out of the timings
+    logging.disable(logging.CRITICAL)
+    with open(GOLDEN_FILE, encoding="utf-8") as f:
+        cases = json.load(f)["cases"]
+    phones = [{"DeviceName": name, "Brand": brand} for name, brand, _ in cases]
+    names = [(name.lower(), brand.lower()) for name, brand, _ in cases]
+
+    print(f"{len(phones)} phones x {args.passes} passes")
+    run("cold", args.passes, phones, transform_api_phone_to_db_format, clear_cache=True)
+    run("warm", args.passes, phones, transform_api_phone_to_db_format, clear_cache=False)
+    run("classify", args.passes, names, lambda pair: classify_name(*pair), clear_cache=True)
+
+
+if __name__ == "__main__":
+    main()
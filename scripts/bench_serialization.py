@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""Benchmark list-endpoint serialization: Pydantic response_model vs fast_json.
+
+Compares, for a page of listings and a page of phone specs:
+
+  pydantic   handler builds PhoneListing(**doc) objects, FastAPI validates
+             them again against response_model and encodes with json.dumps
+  fast_json  handler returns model_list_response(docs, Model), which
+             projects the trusted documents and encodes them with orjson
+
+Both paths are timed through real FastAPI routes (TestClient, no database)
+and as bare encode calls, and the script checks they produce the same JSON.
+
+    python scripts/bench_serialization.py --page-size 50 --requests 300
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "bench_serialization")
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+
+from fast_json import FastJSONResponse, model_list_response, orjson  # noqa: E402
+from server import PhoneListing, PhoneSpec  # noqa: E402
+
+
+def make_listing(index: int) -> dict:
+    """A listing document shaped like the ones create_listing stores"""
+    return {
+        "_id": str(uuid.uuid4()),
+        "brand": ["Samsung", "Apple", "Xiaomi", "Oppo"][index % 4],
+        "model": f"Model {index}",
+        "condition": "Excellent",
+        "price": 50000 + index * 250,
+        "storage": "256GB",
+        "ram": "8GB",
+        "city": ["Karachi", "Lahore", "Islamabad"][index % 3],
+        "description": "Lightly used phone with original box and charger. " * 3,
+        "seller_name": "Seller Name",
+        "seller_phone": "03001234567",
+        "seller_email": f"seller{index}@example.com",
+        "features": ["Fingerprint", "Face Unlock", "Fast Charging"],
+        "battery": "5000 mAh",
+        "screen_size": "6.7 inches",
+        "camera": "108MP",
+        "processor": "Snapdragon 8 Gen 2",
+        "operating_system": "Android 14",
+        "network": "5G",
+        "color": "Black",
+        "photos": [f"/api/blobs/{uuid.uuid4().hex}" for _ in range(4)],
+        "purchase_year": 2023,
+        "warranty_months": 6,
+        "box_included": True,
+        "accessories_included": ["Charger", "Cable"],
+        "battery_health": "90-100%",
+        "seller_type": "Individual",
+        "numeric": {"ram_gb": 8, "storage_gb": 256, "battery_mah": 5000, "display_inches": 6.7, "camera_mp": 108},
+        "facets": {"brand": "samsung", "city": "karachi"},
+        "created_at": datetime(2024, 1, 1) + timedelta(minutes=index),
+        "views": index,
+        "is_featured": index % 5 == 0,
+        "is_active": True
+    }
+
+
+def make_spec(index: int) -> dict:
+    """A phone_specs document with every PhoneSpec field populated"""
+    spec = {
+        "_id": str(uuid.uuid4()),
+        "brand": "Samsung",
+        "model": f"Galaxy {index}",
+        "numeric": {"ram_gb": 8, "storage_gb": 256, "battery_mah": 5000},
+        "created_at": datetime(2024, 1, 1),
+        "updated_at": datetime(2024, 6, 1)
+    }
+    for name, field in PhoneSpec.model_fields.items():
+        key = field.alias or name
+        if key not in spec:
+            spec[key] = 100000 + index if field.annotation == Optional[int] else f"{name} value {index}"
+    return spec
+
+
+def build_app(listings: List[dict], specs: List[dict]) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/pydantic/listings", response_model=List[PhoneListing])
+    async def pydantic_listings():
+        return [PhoneListing(**listing) for listing in listings]
+
+    @app.get("/fast/listings", response_model=List[PhoneListing], response_class=FastJSONResponse)
+    async def fast_listings():
+        return model_list_response(listings, PhoneListing)
+
+    @app.get("/pydantic/specs", response_model=List[PhoneSpec])
+    async def pydantic_specs():
+        return specs
+
+    @app.get("/fast/specs", response_model=List[PhoneSpec], response_class=FastJSONResponse)
+    async def fast_specs():
+        return model_list_response(specs, PhoneSpec)
+
+    return app
+
+
+def pydantic_encode(documents: List[dict], model) -> bytes:
+    """What the old handlers plus response_model did, minus the HTTP layer"""
+    adapter = TypeAdapter(List[model])
+    objects = [model(**document).model_dump(by_alias=True) for document in documents]
+    content = adapter.dump_python(adapter.validate_python(objects), mode="json", by_alias=True)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def timed(label: str, runs: int, call) -> float:
+    call()
+    start = time.perf_counter()
+    for _ in range(runs):
+        call()
+    per_call = (time.perf_counter() - start) / runs
+    print(f"  {label:<34} {per_call * 1000:8.3f} ms")
+    return per_call
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=300)
+    args = parser.parse_args()
+
+    listings = [make_listing(index) for index in range(args.page_size)]
+    specs = [make_spec(index) for index in range(args.page_size)]
+    client = TestClient(build_app(listings, specs))
+    print(f"encoder: {'orjson ' + orjson.__version__ if orjson else 'json (orjson not installed)'}")
+    print(f"page size: {args.page_size}, runs: {args.requests}")
+
+    for kind, documents, model in (("listings", listings, PhoneListing), ("specs", specs, PhoneSpec)):
+        legacy_body = client.get(f"/pydantic/{kind}").content
+        fast_body = client.get(f"/fast/{kind}").content
+        if json.loads(legacy_body) != json.loads(fast_body):
+            sys.exit(f"{kind}: fast_json output differs from the response_model output")
+        print(f"\n{kind} ({len(fast_body)} bytes, outputs identical)")
+        slow = timed("request, response_model", args.requests, lambda: client.get(f"/pydantic/{kind}"))
+        fast = timed("request, fast_json", args.requests, lambda: client.get(f"/fast/{kind}"))
+        print(f"  {'speedup':<34} {slow / fast:8.2f}x")
+        slow = timed("encode, pydantic", args.requests, lambda: pydantic_encode(documents, model))
+        fast = timed("encode, fast_json", args.requests, lambda: model_list_response(documents, model).body)
+        print(f"  {'speedup':<34} {slow / fast:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
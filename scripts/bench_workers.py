@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""Throughput of the API under gunicorn for different worker counts.
+
+Starts `gunicorn -c gunicorn.conf.py server:app` from backend/ once per
+worker count, drives it with concurrent keep-alive clients for a fixed time
+and reports requests per second, latency percentiles and the speedup over
+the first worker count. MONGO_URL / DB_NAME are taken from the environment
+(or backend/.env) as for a normal start; pick paths whose work you want to
+measure:
+
+    python scripts/bench_workers.py --workers 1,2,4 --duration 15 \\
+        --path "/api/listings?limit=20" --path /api/phone-specs/compare
+
+Throughput only scales up to the number of cores; run it on the target
+machine size.
+"""
+import argparse
+import asyncio
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import aiohttp
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+
+
+def start_server(workers: int, port: int) -> subprocess.Popen:
+    command = [
+        sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "server:app",
+        "--workers", str(workers), "--bind", f"127.0.0.1:{port}",
+        # No recycling in the middle of a measurement
+        "--max-requests", "0"
+    ]
+    return subprocess.Popen(command, cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                            start_new_session=True)
+
+
+def stop_server(process: subprocess.Popen):
+    if process.poll() is None:
+        os.killpg(process.pid, signal.SIGTERM)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+            process.wait()
+
+
+async def wait_until_serving(base_url: str, path: str, process: subprocess.Popen, timeout: float):
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"gunicorn exited with status {process.returncode}")
+            try:
+                async with session.get(base_url + path) as response:
+                    await response.read()
+                    return
+            except aiohttp.ClientError:
+                await asyncio.sleep(0.5)
+    raise RuntimeError(f"Server did not answer within {timeout:.0f}s")
+
+
+async def drive(base_url: str, paths, concurrency: int, duration: float):
+    """Requests per second, latencies (s) and error count over `duration` seconds"""
+    latencies = []
+    errors = 0
+    deadline = time.monotonic() + duration
+
+    async def client(session: aiohttp.ClientSession, offset: int):
+        nonlocal errors
+        i = offset
+        while time.monotonic() < deadline:
+            path = paths[i % len(paths)]
+            i += 1
+            start = time.perf_counter()
+            try:
+                async with session.get(base_url + path) as response:
+                    await response.read()
+                    if response.status >= 500:
+                        errors += 1
+                        continue
+            except aiohttp.ClientError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        started = time.monotonic()
+        await asyncio.gather(*(client(session, n) for n in range(concurrency)))
+        elapsed = time.monotonic() - started
+    return len(latencies) / elapsed, latencies, errors
+
+
+def percentile(values, fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated worker counts")
+    parser.add_argument("--path", action="append", dest="paths", help="request path (repeatable)")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds measured per worker count")
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--startup-timeout", type=float, default=120.0)
+    args = parser.parse_args()
+    paths = args.paths or ["/api/listings?limit=20"]
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    print(f"{os.cpu_count()} cores, {args.concurrency} clients, {args.duration:.0f}s per run, paths: {', '.join(paths)}")
+    print(f"{'workers':>8} {'req/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7} {'speedup':>8}")
+    baseline = None
+    for workers in [int(n) for n in args.workers.split(",")]:
+        process = start_server(workers, args.port)
+        try:
+            await wait_until_serving(base_url, paths[0], process, args.startup_timeout)
+            await drive(base_url, paths, args.concurrency, args.warmup)
+            rate, latencies, errors = await drive(base_url, paths, args.concurrency, args.duration)
+        finally:
+            stop_server(process)
+        baseline = baseline or rate
+        print(f"{workers:>8} {rate:>10,.0f} {statistics.median(latencies) * 1000 if latencies else 0:>8.1f} "
+              f"{percentile(latencies, 0.99) * 1000:>8.1f} {errors:>7} {rate / baseline if baseline else 0:>7.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Local stub of the external phone specifications API.
+
+Serves the backend's built-in mock catalog over HTTP with configurable
+latency and error rate, so catalog sync throughput and the client's retry
+and circuit breaker behaviour can be exercised offline:
+
+    python scripts/phone_api_stub.py --port 8099 --latency-ms 80 --error-rate 0.05
+    PHONE_API_BASE_URL=http://127.0.0.1:8099 uvicorn server:app --port 8001
+    # then trigger a sync (POST /api/phone-api/sync/popular-brands) and
+    # compare job durations / GET /api/admin/phone-api/stats across settings
+
+Endpoints: GET /brands, GET /brands/{brand}/phones, GET /phones/{name} and
+GET /stats (request counters of the stub itself).
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+from aiohttp import web
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "phone_api_stub")
+# The stub serves the mock catalog, never another upstream
+os.environ.pop("PHONE_API_BASE_URL", None)
+
+from server import PhoneSpecsAPIClient  # noqa: E402
+
+
+def build_app(latency_ms: float, jitter_ms: float, error_rate: float, error_status: int) -> web.Application:
+    catalog = PhoneSpecsAPIClient()
+    counters = {"requests": 0, "errors": 0, "started_at": time.time()}
+
+    @web.middleware
+    async def simulate_upstream(request, handler):
+        if request.path == "/stats":
+            return await handler(request)
+        counters["requests"] += 1
+        delay = max(0.0, latency_ms + random.uniform(-jitter_ms, jitter_ms)) / 1000
+        await asyncio.sleep(delay)
+        if random.random() < error_rate:
+            counters["errors"] += 1
+            headers = {"Retry-After": "1"} if error_status in (429, 503) else None
+            return web.json_response({"error": "simulated upstream failure"}, status=error_status, headers=headers)
+        return await handler(request)
+
+    async def brands(request):
+        return web.json_response(await catalog.get_brands())
+
+    async def brand_phones(request):
+        phones = await catalog.get_brand_phones(request.match_info["brand"])
+        if not phones:
+            raise web.HTTPNotFound()
+        return web.json_response(phones)
+
+    async def phone_details(request):
+        return web.json_response(await catalog.get_phone_details(request.match_info["name"]))
+
+    async def stats(request):
+        elapsed = time.time() - counters["started_at"]
+        return web.json_response({
+            **counters,
+            "requests_per_second": round(counters["requests"] / elapsed, 2) if elapsed else 0.0
+        })
+
+    app = web.Application(middlewares=[simulate_upstream])
+    app.add_routes([
+        web.get("/brands", brands),
+        web.get("/brands/{brand}/phones", brand_phones),
+        web.get("/phones/{name}", phone_details),
+        web.get("/stats", stats)
+    ])
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="mean response latency")
+    parser.add_argument("--jitter-ms", type=float, default=20.0, help="uniform +/- jitter on the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=503, help="status code of simulated failures")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    app = build_app(args.latency_ms, args.jitter_ms, args.error_rate, args.error_status)
+    web.run_app(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
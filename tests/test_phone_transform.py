@@ -0,0 +1,92 @@
+"""Golden-file test for transform_api_phone_to_db_format.
+
+tests/golden/phone_transform.json holds the documents produced for every
+phone of the mock catalog (with both the catalog brand and the first word of
+the name as Brand) plus hand-picked edge cases. Outputs are stored once as
+"profiles" (every field except brand/model/api_device_name) and each case
+points at its profile, or at null when the transform rejects the phone.
+
+After an intentional change to the rules, regenerate it with:
+
+    python tests/test_phone_transform.py --update
+"""
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from phone_transform import transform_api_phone_to_db_format  # noqa: E402
+
+GOLDEN_FILE = Path(__file__).resolve().parent / "golden" / "phone_transform.json"
+
+# Fields that are random or time-based
+VOLATILE_FIELDS = ("_id", "created_at", "updated_at")
+# Fields copied from the input, stored per case instead of in the profile
+CASE_FIELDS = ("brand", "model", "api_device_name")
+
+
+def load_golden():
+    with open(GOLDEN_FILE, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def profile_of(document):
+    if document is None:
+        return None
+    return {k: v for k, v in document.items() if k not in VOLATILE_FIELDS and k not in CASE_FIELDS}
+
+
+GOLDEN = load_golden()
+
+
+@pytest.mark.parametrize("device_name,brand,profile_index", GOLDEN["cases"],
+                         ids=[f"{brand}|{name}" for name, brand, _ in GOLDEN["cases"]])
+def test_transform_matches_golden(device_name, brand, profile_index):
+    document = transform_api_phone_to_db_format({"DeviceName": device_name, "Brand": brand})
+    if profile_index is None:
+        assert document is None
+        return
+    assert document is not None
+    assert (document["brand"], document["model"], document["api_device_name"]) == (brand, device_name, device_name)
+    assert profile_of(document) == GOLDEN["profiles"][profile_index]
+
+
+def test_transform_sets_fresh_metadata():
+    first = transform_api_phone_to_db_format({"DeviceName": "Galaxy S24 Ultra", "Brand": "Galaxy"})
+    second = transform_api_phone_to_db_format({"DeviceName": "Galaxy S24 Ultra", "Brand": "Galaxy"})
+    assert first["_id"] != second["_id"]
+    assert first["created_at"] <= second["updated_at"]
+
+
+def update_golden():
+    """Rewrite the golden file from the current transform, keeping its cases"""
+    profiles, index, cases = [], {}, []
+    for device_name, brand, _ in GOLDEN["cases"]:
+        profile = profile_of(transform_api_phone_to_db_format({"DeviceName": device_name, "Brand": brand}))
+        if profile is None:
+            cases.append([device_name, brand, None])
+            continue
+        key = json.dumps(profile, sort_keys=True)
+        if key not in index:
+            index[key] = len(profiles)
+            profiles.append(profile)
+        cases.append([device_name, brand, index[key]])
+    lines = ["{", '  "profiles": [']
+    lines.append(",\n".join("    " + json.dumps(profile, sort_keys=True, ensure_ascii=False) for profile in profiles))
+    lines.append("  ],")
+    lines.append('  "cases": [')
+    lines.append(",\n".join("    " + json.dumps(case, ensure_ascii=False) for case in cases))
+    lines.append("  ]")
+    lines.append("}")
+    GOLDEN_FILE.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    print(f"Wrote {len(cases)} cases, {len(profiles)} profiles to {GOLDEN_FILE}")
+
+
+if __name__ == "__main__":
+    if "--update" in sys.argv:
+        update_golden()
+    else:
+        sys.exit(pytest.main([__file__, "-q"]))